@@ -69,4 +69,25 @@ datafile_ext = ".txt"
 #########################################
 trials_per_practice_block = 6
 
+# Motion capture
+natnet_async_client = False     # serve NatNet sockets from an asyncio event loop (see AsyncNatNetClient.py)
+prewarm_tracker = True          # connect to Motive in the background during setup, rather than at the first trial
+natnet_capture = True           # record packets received to GripAperture_<participant>.natcap (see CaptureLog.py)
+natnet_replay = None            # capture to replay in place of a live connection (see Replay.py for headless runs)
+natnet_replay_speed = 1.0       # replay speed, as a multiple of real time
+hand_rigid_body_ID = 1          # rigid body used to detect hand at rest / movement onset
+mocap_rest_detection = True     # if False (or hand untracked), the spacebar hold is used instead
+
+# Logging (see Logs.py): level, JSON-lines log file (None for none), and whether to also log to the console
+log_level = "INFO"
+log_file = "GripAperture_session.log"
+log_to_console = True
+
+# Live tracking monitor, served at http://127.0.0.1:8765/ (see Monitor.py)
+live_monitor = False
+
+# Post-trial screening (see TrialScreening.py); trials failing for any of these reasons are recycled
+screen_trials = True
+recycle_trials_on = ["lost_frames", "occluded", "no_movement", "anticipation"]
+
 
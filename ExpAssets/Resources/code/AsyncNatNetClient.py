@@ -0,0 +1,168 @@
+# asyncio transport for NatNetClient
+#
+#   Same settings, listeners & unpacking as NatNetClient, but rather than two blocking
+#   receive threads (each polled against a stop flag, with a 2s socket timeout), both
+#   sockets are served by asyncio DatagramProtocols on a single event loop, run in one
+#   dedicated thread. The loop is started once (natNetLoop.start()) and outlives any number
+#   of startup()/shutdown() cycles; shutdown() merely closes the transports, so returns
+#   immediately.
+#
+#   Commands may be issued concurrently, from the loop (await client.request(...)) or from
+#   any other thread (client.send_command_async(...), returning a concurrent Future); either
+#   way, responses are matched to requests by the client's commandTracker (see CommandTracker.py).
+
+import time
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Tuple, Union
+
+from NatNetClient import NatNetClient, log
+from CommandTracker import COMMAND_TIMEOUT, COMMAND_RETRIES
+
+
+# # # # # # # # # # # # # #
+# Event loop thread       #
+# # # # # # # # # # # # # #
+
+class natNetLoop:
+    _loop = None
+    _thread = None
+    _lock = threading.Lock()
+
+    # Starts the shared loop thread, if not already running; returns the loop
+    @classmethod
+    def start(cls) -> asyncio.AbstractEventLoop:
+        with cls._lock:
+            if cls._loop is None or not cls._thread.is_alive():
+                cls._loop = asyncio.new_event_loop()
+                cls._thread = threading.Thread(target=cls._loop.run_forever, name="natNetLoop", daemon=True)
+                cls._thread.start()
+
+        return cls._loop
+
+    @classmethod
+    def stop(cls) -> None:
+        with cls._lock:
+            if cls._loop is None:
+                return
+
+            cls._loop.call_soon_threadsafe(cls._loop.stop)
+            cls._thread.join()
+            cls._loop.close()
+            cls._loop = cls._thread = None
+
+
+# # # # # # # # # # # # # #
+# Protocols               #
+# # # # # # # # # # # # # #
+
+class natNetDataProtocol(asyncio.DatagramProtocol):
+    def __init__(self, client: "AsyncNatNetClient") -> None:
+        self.client = client
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        self.client.last_packet_received = time.perf_counter()
+        self.client.process_message(data)
+
+    def error_received(self, exc: Exception) -> None:
+        log.error("Data socket error occurred: %s", exc)
+
+
+class natNetCommandProtocol(asyncio.DatagramProtocol):
+    def __init__(self, client: "AsyncNatNetClient") -> None:
+        self.client = client
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        self.client.process_message(data)
+
+        # unicast servers need to be kept aware of the client
+        if not self.client.settings['use_multicast']:
+            self.client.send_keep_alive(self.client.command_socket, self.client.settings["server_ip"], self.client.settings["command_port"])
+
+    def error_received(self, exc: Exception) -> None:
+        log.error("Command socket error occurred: %s", exc)
+
+
+# # # # # # # # # # # # # #
+# Client                  #
+# # # # # # # # # # # # # #
+
+class AsyncNatNetClient(NatNetClient):
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.loop = None
+        self.data_transport = None
+        self.command_transport = None
+
+    # Runs coroutine on the loop thread, blocking until done
+    def _run(self, coroutine: Any) -> Any:
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def _open(self) -> None:
+        self.data_transport, _ = await self.loop.create_datagram_endpoint(
+            lambda: natNetDataProtocol(self), sock=self.data_socket)
+        self.command_transport, _ = await self.loop.create_datagram_endpoint(
+            lambda: natNetCommandProtocol(self), sock=self.command_socket)
+
+    def startup(self) -> bool:
+        self.server_info_received.clear()
+        if self.capture is not None:
+            self.capture.mark()
+        self.loop = natNetLoop.start()
+
+        self.data_socket = self.create_data_socket()
+        if self.data_socket is None:
+            log.error("Could not open data channel")
+            return False
+
+        self.command_socket = self.create_command_socket()
+        if self.command_socket is None:
+            log.error("Could not open command channel")
+            return False
+        self.settings["is_locked"] = True
+
+        self._run(self._open())
+
+        server = (self.settings["server_ip"], self.settings["command_port"])
+        self.send_request(self.command_socket, self.NAT_CONNECT, "", server)
+        self.send_request(self.command_socket, self.NAT_REQUEST_FRAMEOFDATA, "", server)
+
+        # Model definitions: those held are served straight away, & re-requested regardless (see NatNetClient.startup())
+        if self.current_descriptions is None and self.settings["trust_cached_descriptions"]:
+            self.current_descriptions = self.description_cache.latest()
+
+        if self.current_descriptions is not None:
+            self.description_listener(self.current_descriptions)
+        self.request_model_definitions()
+        return True
+
+    async def _close(self) -> None:
+        for transport in (self.data_transport, self.command_transport):
+            if transport is not None:
+                transport.close()
+
+    # Closes transports (& their sockets); no threads to join, so returns immediately
+    def shutdown(self) -> None:
+        if self.loop is None:
+            return
+
+        self.commands.cancel_all()
+        self.modeldef_pending = False
+        if self.modeldef_timer is not None:
+            self.modeldef_timer.cancel()
+        self._run(self._close())
+        self.data_transport = self.command_transport = None
+
+    # # # #
+    # Commands
+    # # # #
+
+    # Sends a command (NAT_REQUEST), resolving to the server's response; await on the loop
+    async def request(self, command_str: str, timeout: float = COMMAND_TIMEOUT, retries: int = COMMAND_RETRIES) -> Union[int, str]:
+        return await asyncio.wrap_future(self.request_command(command_str, timeout, retries))
+
+    # As request(), callable from any thread; returns a concurrent.futures.Future
+    def send_command_async(self, command_str: str, timeout: float = COMMAND_TIMEOUT, retries: int = COMMAND_RETRIES) -> Future:
+        return self.request_command(command_str, timeout, retries)
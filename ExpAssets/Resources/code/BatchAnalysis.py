@@ -0,0 +1,374 @@
+# Study-level batch extraction of per-trial kinematics
+#
+#   Usage: python BatchAnalysis.py <study_dir> [--workers N] [--max-worker-mem MB]
+#                                  [--aperture-markers ID ID] [--rigid-fill] [--cutoff HZ]
+#                                  [--max-gap N] [--force]
+#
+#   Rigid body trajectories are screened for occlusion (tracking_validity, mean marker
+#   error above MAX_RESIDUAL & zeroed positions) and short gaps are interpolated before
+#   kinematics are computed; per-trial gap statistics are reported alongside the kinematic
+#   measures.
+#
+#   Aperture markers are screened (occluded flag, residual & zeroed positions) and gap filled the same
+#   way before aperture is computed. With --rigid-fill, a marker belonging to a rigid body is
+#   first reconstructed from that body's pose, interpolating only what that can't cover.
+#
+#   Any directory beneath <study_dir> holding a GripAperture_RigidBodies_framedata.csv
+#   (as written by GBYK_GripAperture.clean_up()) is treated as one participant session.
+#   Sessions are farmed out to a process pool, one task per session, so that only a
+#   compact summary row per trial crosses process boundaries. Per-session results are
+#   written alongside their inputs and merged into a single study-level table.
+#
+#   Re-runs are incremental: inputs (and analysis settings) are content-hashed, and
+#   sessions whose hash matches the one recorded in the study's cache file are skipped.
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Tuple, Optional
+
+import numpy as np
+import datatable as dt
+
+from Kinematics import (
+    FRAME_RATE, POSITION_COLS, ROTATION_COLS, group_bounds, trajectory_kinematics,
+    grip_aperture, aperture_kinematics
+)
+from Filters import butter_sos, filtfilt
+from GapFilling import MAX_GAP, MAX_RESIDUAL, invalid_samples, fill_trajectory, align_to_frames
+
+# Files that define a session, and that are hashed to detect changes
+SESSION_MARKER = "GripAperture_RigidBodies_framedata.csv"
+SESSION_INPUTS = (
+    "GripAperture_RigidBodies_framedata.csv",
+    "GripAperture_LabeledMarkerSet_framedata.csv",
+)
+
+# Outputs
+SESSION_RESULTS = "GripAperture_kinematics.csv"
+STUDY_RESULTS = "GripAperture_study_kinematics.csv"
+CACHE_FILE = ".gripaperture_batch_cache.json"
+
+# Columns identifying a trial within exported frame data; a recycled trial's attempts share block & trial numbers
+TRIAL_KEYS = ("participant_id", "block_num", "trial_num", "attempt")
+
+
+# # # # # # # # # # # # # #
+# Session discovery       #
+# # # # # # # # # # # # # #
+
+def find_sessions(study_dir: str) -> List[str]:
+    return sorted(
+        root for root, _, files in os.walk(study_dir)
+        if SESSION_MARKER in files
+    )
+
+
+def hash_session(session_dir: str, settings: Tuple = (), chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256(repr(settings).encode("utf-8"))
+
+    for name in SESSION_INPUTS:
+        path = os.path.join(session_dir, name)
+        if not os.path.exists(path):
+            continue
+
+        digest.update(name.encode("utf-8"))
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def load_cache(study_dir: str) -> Dict[str, Dict]:
+    path = os.path.join(study_dir, CACHE_FILE)
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_cache(study_dir: str, cache: Dict[str, Dict]) -> None:
+    path = os.path.join(study_dir, CACHE_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(cache, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+# # # # # # # # # # # # # #
+# Worker-side functions   #
+# # # # # # # # # # # # # #
+
+# Caps address space of each worker, so one runaway session can't take down the batch
+#       NOTE: resource module is POSIX only; limit is silently skipped elsewhere, or if refused
+def _limit_worker_memory(max_bytes: Optional[int]) -> None:
+    if not max_bytes:
+        return
+
+    try:
+        import resource
+    except ImportError:
+        return
+
+    # soft limit can't exceed the hard limit
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        max_bytes = min(max_bytes, hard)
+
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (max_bytes, hard))
+    except (ValueError, OSError):
+        pass
+
+
+def _column(frame: dt.Frame, name: str) -> np.ndarray:
+    return frame[:, name].to_numpy().ravel()
+
+
+# Frame data predating attempt numbering holds one attempt per trial
+def _trial_keys(frame: dt.Frame) -> List[np.ndarray]:
+    return [
+        _column(frame, key) if key in frame.names or key != "attempt" else np.ones(frame.nrows, dtype=np.int32)
+        for key in TRIAL_KEYS
+    ]
+
+
+# Rigid body poses (position & rotation, invalid samples NaN) & their frame numbers, per (trial, asset_ID)
+def _body_poses(frame: dt.Frame) -> Dict[Tuple, Tuple[np.ndarray, np.ndarray]]:
+    if frame.nrows == 0 or not set(("frame_number",) + ROTATION_COLS) <= set(frame.names):
+        return {}
+
+    keys = _trial_keys(frame)
+    ids = _column(frame, "asset_ID")
+    frame_numbers = _column(frame, "frame_number")
+    pose = frame[:, POSITION_COLS + ROTATION_COLS].to_numpy().astype(np.float64)
+    validity = _column(frame, "tracking_validity") if "tracking_validity" in frame.names else None
+    error = _column(frame, "error") if "error" in frame.names else None
+
+    poses = {}
+    for start, stop in group_bounds(*keys):
+        trial = tuple(key[start] for key in keys)
+        trial_ids = ids[start:stop]
+
+        for asset_ID in np.unique(trial_ids):
+            rows_of = trial_ids == asset_ID
+            invalid = invalid_samples(
+                pose[start:stop][rows_of, :3],
+                validity[start:stop][rows_of] if validity is not None else None,
+                error[start:stop][rows_of] if error is not None else None,
+            )
+            poses[(trial, asset_ID)] = (
+                frame_numbers[start:stop][rows_of], np.where(invalid[:, None], np.nan, pose[start:stop][rows_of])
+            )
+
+    return poses
+
+
+# Grip aperture per trial, from two labeled markers gap filled & paired by frame
+#       NOTE: given body_poses (see _body_poses()), markers on a rigid body are filled from its pose first
+def _aperture_by_trial(session_dir: str, aperture_markers: Tuple[int, int], max_gap: int = MAX_GAP,
+                       body_poses: Dict[Tuple, Tuple[np.ndarray, np.ndarray]] = None) -> Dict[Tuple, np.ndarray]:
+    path = os.path.join(session_dir, "GripAperture_LabeledMarkerSet_framedata.csv")
+    if not os.path.exists(path):
+        return {}
+
+    frame = dt.fread(path)
+    if frame.nrows == 0 or "asset_ID" not in frame.names or "frame_number" not in frame.names:
+        return {}
+
+    keys = _trial_keys(frame)
+    ids = _column(frame, "asset_ID")
+    frame_numbers = _column(frame, "frame_number")
+    pos = frame[:, POSITION_COLS].to_numpy().astype(np.float64)
+    param = _column(frame, "param") if "param" in frame.names else None
+    residual = _column(frame, "residual") if "residual" in frame.names else None
+    parents = _column(frame, "parent_ID") if "parent_ID" in frame.names else None
+
+    apertures = {}
+    for start, stop in group_bounds(*keys):
+        trial = tuple(key[start] for key in keys)
+        trial_ids = ids[start:stop]
+        trial_frames = frame_numbers[start:stop]
+        first, last = trial_frames.min(), trial_frames.max()
+
+        markers = []
+        for marker in aperture_markers:
+            rows_of = trial_ids == marker
+            marker_pos = pos[start:stop][rows_of]
+            invalid = invalid_samples(
+                marker_pos,
+                residual=residual[start:stop][rows_of] if residual is not None else None,
+                param=param[start:stop][rows_of] if param is not None else None,
+            )
+
+            # markers paired by frame, over the trial's frames; rows dropped (or invalid) become NaN samples
+            _, trajectory = align_to_frames(trial_frames[rows_of], np.where(invalid[:, None], np.nan, marker_pos),
+                                            first, last)
+
+            body = {}
+            parent = (trial, parents[start:stop][rows_of][0]) if parents is not None and rows_of.any() else None
+            if body_poses and parent in body_poses:
+                _, body_pose = align_to_frames(*body_poses[parent], first, last)
+                body = {"body_pos": body_pose[:, :3], "body_rot": body_pose[:, 3:],
+                        "body_invalid": invalid_samples(body_pose[:, :3])}
+
+            filled, _ = fill_trajectory(trajectory, invalid_samples(trajectory), max_gap, **body)
+            markers.append(filled)
+
+        apertures[trial] = grip_aperture(*markers)
+
+    return apertures
+
+
+# Extracts kinematics for every trial & rigid body in a session, writing results to disk
+#       NOTE: when cutoff is given, gap-free trajectories are zero-phase low-pass filtered first
+def analyse_session(session_dir: str, frame_rate: float = FRAME_RATE, aperture_markers: Tuple[int, int] = None,
+                    cutoff: float = None, max_gap: int = MAX_GAP, rigid_fill: bool = False) -> Tuple[str, int]:
+    frame = dt.fread(os.path.join(session_dir, SESSION_MARKER))
+
+    keys = _trial_keys(frame)
+    ids = _column(frame, "asset_ID")
+    pos = frame[:, POSITION_COLS].to_numpy().astype(np.float64)
+    validity = _column(frame, "tracking_validity") if "tracking_validity" in frame.names else None
+    error = _column(frame, "error") if "error" in frame.names else None
+    frame_numbers = _column(frame, "frame_number") if "frame_number" in frame.names else None
+
+    apertures = {}
+    if aperture_markers:
+        body_poses = _body_poses(frame) if rigid_fill else None
+        apertures = _aperture_by_trial(session_dir, aperture_markers, max_gap, body_poses)
+    sos = butter_sos(2, cutoff, frame_rate) if cutoff else None
+
+    rows = {name: [] for name in TRIAL_KEYS + ("asset_ID",)}
+    for start, stop in group_bounds(*keys):
+        trial = tuple(key[start] for key in keys)
+        trial_ids = ids[start:stop]
+
+        for asset_ID in np.unique(trial_ids):
+            rows_of = trial_ids == asset_ID
+            trajectory = pos[start:stop][rows_of]
+            invalid = invalid_samples(
+                trajectory,
+                validity[start:stop][rows_of] if validity is not None else None,
+                error[start:stop][rows_of] if error is not None else None,
+            )
+
+            # rows dropped during occlusion reappear as (invalid) NaN samples
+            if frame_numbers is not None:
+                trial_frames = frame_numbers[start:stop]
+                _, trajectory = align_to_frames(trial_frames[rows_of], np.where(invalid[:, None], np.nan, trajectory),
+                                                trial_frames.min(), trial_frames.max())
+                invalid = invalid_samples(trajectory)
+
+            trajectory, gaps = fill_trajectory(trajectory, invalid, max_gap)
+            if sos is not None and np.isfinite(trajectory).all():
+                trajectory = filtfilt(sos, trajectory)
+
+            measures = trajectory_kinematics(trajectory, frame_rate)
+            measures.update({f"gap_{name}": value for name, value in gaps.items()})
+            if trial in apertures:
+                measures.update(aperture_kinematics(apertures[trial], frame_rate))
+
+            for name, value in zip(TRIAL_KEYS, trial):
+                rows[name].append(value)
+            rows["asset_ID"].append(asset_ID)
+
+            for name, value in measures.items():
+                rows.setdefault(name, []).append(value)
+
+    results = dt.Frame(rows)
+    results[:, dt.update(session=os.path.basename(os.path.abspath(session_dir)))]
+    results.to_csv(os.path.join(session_dir, SESSION_RESULTS))
+
+    return session_dir, results.nrows
+
+
+# # # # # # # # # # # # # #
+# Batch driver            #
+# # # # # # # # # # # # # #
+
+def run_batch(study_dir: str, workers: int = None, max_worker_mem: int = None,
+              aperture_markers: Tuple[int, int] = None, frame_rate: float = FRAME_RATE,
+              cutoff: float = None, max_gap: int = MAX_GAP, force: bool = False, rigid_fill: bool = False) -> dt.Frame:
+    sessions = find_sessions(study_dir)
+    cache = {} if force else load_cache(study_dir)
+
+    settings = (frame_rate, aperture_markers, cutoff, max_gap, rigid_fill, MAX_RESIDUAL)
+    hashes = {session: hash_session(session, settings) for session in sessions}
+    stale = [
+        session for session in sessions
+        if cache.get(os.path.relpath(session, study_dir), {}).get("hash") != hashes[session]
+        or not os.path.exists(os.path.join(session, SESSION_RESULTS))
+    ]
+
+    print(f"BatchAnalysis | {len(sessions)} sessions found, {len(stale)} to (re)analyse")
+
+    t0 = time.perf_counter()
+    if stale:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_limit_worker_memory,
+                                 initargs=(max_worker_mem,)) as pool:
+            futures = {
+                pool.submit(
+                    analyse_session, session, frame_rate, aperture_markers, cutoff, max_gap, rigid_fill
+                ): session
+                for session in stale
+            }
+
+            for future in as_completed(futures):
+                session = futures[future]
+                try:
+                    _, n_rows = future.result()
+                except Exception as e:
+                    print(f"BatchAnalysis | {session} failed: {e!r}")
+                    continue
+
+                cache[os.path.relpath(session, study_dir)] = {"hash": hashes[session], "rows": n_rows}
+
+        save_cache(study_dir, cache)
+
+    elapsed = time.perf_counter() - t0
+    print(f"BatchAnalysis | analysed {len(stale)} sessions in {elapsed:.2f}s")
+
+    # Merge per-session results into a single study-level table
+    results = [
+        dt.fread(os.path.join(session, SESSION_RESULTS)) for session in sessions
+        if os.path.exists(os.path.join(session, SESSION_RESULTS))
+    ]
+    study = dt.rbind(*results, force=True) if results else dt.Frame()
+    study.to_csv(os.path.join(study_dir, STUDY_RESULTS))
+
+    return study
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Batch kinematic extraction across participant sessions")
+    parser.add_argument("study_dir")
+    parser.add_argument("--workers", type=int, default=None, help="pool size (default: cpu count)")
+    parser.add_argument("--max-worker-mem", type=int, default=None, help="per-worker memory limit in MB")
+    parser.add_argument("--aperture-markers", type=int, nargs=2, default=None, metavar="ID",
+                        help="labeled marker IDs used to compute grip aperture")
+    parser.add_argument("--rigid-fill", action="store_true",
+                        help="fill aperture marker gaps from their rigid body's pose, before interpolating")
+    parser.add_argument("--frame-rate", type=float, default=FRAME_RATE)
+    parser.add_argument("--cutoff", type=float, default=None, help="zero-phase low-pass cutoff (Hz)")
+    parser.add_argument("--max-gap", type=int, default=MAX_GAP, help="longest gap (frames) to interpolate")
+    parser.add_argument("--force", action="store_true", help="ignore cache, re-analyse every session")
+    args = parser.parse_args(argv)
+
+    max_worker_mem = args.max_worker_mem * 1024 * 1024 if args.max_worker_mem else None
+
+    run_batch(
+        args.study_dir, args.workers, max_worker_mem,
+        tuple(args.aperture_markers) if args.aperture_markers else None,
+        args.frame_rate, args.cutoff, args.max_gap, args.force, args.rigid_fill
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+# Session-scale memory & throughput benchmark, run without SDL/klibs or a NatNet server
+#
+#   Usage: python Benchmark.py [--blocks N] [--trials N] [--rate HZ] [--trial-duration S]
+#                              [--rigid-bodies N] [--markers N] [--seed N] [--realtime]
+#                              [--out DIR] [--json PATH]
+#                              [--max-rss MB] [--max-cleanup MS] [--max-cleanup-growth X]
+#                              [--max-write S] [--min-headroom X]
+#
+#   Synthetic frames (a minimum-jerk reach of the hand, plus a marker set tracking it) are
+#   delivered to an OptiTracker through its frame listeners, exactly as NatNetClient would
+#   deliver them, for a simulated session (default: 2 blocks of 60 trials at 120Hz). After
+#   each trial, the export logic of GBYK_GripAperture.trial_clean_up() is run (export,
+#   screening, annotation & per-trial writes); at the end, the session files are written as
+#   by clean_up().
+#
+#   Measured: frame ingest throughput (per-frame listener time), per-trial clean-up latency
+#   (and its growth from the first trials to the last, which exposes costs that scale with
+#   the session rather than the trial), final write time, and peak RSS. Exits 1 if any
+#   exceeds its threshold, so may be run as a regression check.
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+import datatable as dt
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from OptiTracker import OptiTracker, DATAFRAME_ASSETS, DESCFRAME_ASSETS
+from TrialStore import trialStore
+from TrialScreening import screen_dataframes
+
+# Simulated session
+BLOCKS = 2
+TRIALS_PER_BLOCK = 60
+FRAME_RATE = 120
+TRIAL_DURATION = 3.0
+RIGID_BODIES = 2
+MARKERS = 8
+
+HAND_ID = 1
+MARKER_SET = "Grippy"
+
+# Reach: hand leaves rest after REACH_ONSET (s), covering REACH_DISTANCE (m) in REACH_DURATION (s);
+# a reaction to a go signal given at GO_SIGNAL (s), from which its response time is measured
+GO_SIGNAL = 0.15
+REACH_ONSET = 0.4
+REACH_DURATION = 0.8
+REACH_DISTANCE = 0.3
+POSITION_NOISE = 0.0005
+
+# Server clock (ticks/s) & exposure -> transmit latency (s), as carried in suffix stamps
+CLOCK_FREQUENCY = 10_000_000
+SERVER_LATENCY = 0.003
+
+# Regression thresholds
+MAX_PEAK_RSS_MB = 512
+MAX_CLEANUP_P95_MS = 100
+MAX_CLEANUP_GROWTH = 2.0        # median clean-up of the last trials over that of the first
+MAX_FINAL_WRITE_S = 5.0
+MIN_HEADROOM = 2.0              # frames ingested per second, as a multiple of frame rate
+
+# Trials at either end of the session compared for clean-up growth
+GROWTH_WINDOW = 10
+
+
+# # # # # # # # # # # # # #
+# Synthetic frame source  #
+# # # # # # # # # # # # # #
+
+class syntheticClient:
+    def __init__(self, rate: float = FRAME_RATE, rigid_bodies: int = RIGID_BODIES, markers: int = MARKERS,
+                 trial_duration: float = TRIAL_DURATION, seed: int = 0) -> None:
+        self.rate = rate
+        self.rigid_body_IDs = list(range(HAND_ID, HAND_ID + rigid_bodies))
+        self.markers = markers
+        self.trial_duration = trial_duration
+        self.rng = np.random.default_rng(seed)
+
+        # as on NatNetClient; set by OptiTracker.attach_client()
+        self.frame_data_listener = None
+        self.description_listener = None
+        self.last_packet_received = None
+
+        self.frame_number = 0
+
+    def get_clock_frequency(self) -> int:
+        return CLOCK_FREQUENCY
+
+    # As NatNetClient (with model definitions already held), delivers descriptions on startup
+    def startup(self) -> bool:
+        self.description_listener(self.descriptions())
+        return True
+
+    def shutdown(self) -> None:
+        pass
+
+    def descriptions(self) -> Dict[str, List[List[Dict]]]:
+        return {
+            'MarkerSets': [[
+                {'asset_name': f"Marker{i + 1}", 'parent_name': MARKER_SET} for i in range(self.markers)
+            ]],
+            'RigidBodies': [[
+                {
+                    'asset_type': "RigidBodyMarker", 'asset_ID': asset_ID, 'parent_ID': -1,
+                    'asset_name': f"RigidBody{asset_ID}", 'pos_x': 0.0, 'pos_y': 0.0, 'pos_z': 0.0,
+                    'offset_x': 0.01 * i, 'offset_y': 0.0, 'offset_z': 0.0,
+                    'active_label': 0, 'marker_name': f"Marker{i + 1}",
+                }
+                for i in range(4)
+            ] for asset_ID in self.rigid_body_IDs],
+        }
+
+    # Hand positions over a trial: at rest, then a minimum-jerk reach along x, then held
+    def hand_path(self) -> np.ndarray:
+        t = np.arange(int(self.trial_duration * self.rate)) / self.rate
+        tau = np.clip((t - REACH_ONSET) / REACH_DURATION, 0, 1)
+
+        pos = np.zeros((len(t), 3))
+        pos[:, 0] = REACH_DISTANCE * (10 * tau ** 3 - 15 * tau ** 4 + 6 * tau ** 5)
+        pos[:, 1] = 0.1
+        return pos + self.rng.normal(0, POSITION_NOISE, pos.shape)
+
+    # One trial's frames, shaped as NatNetClient's frameData.export(): row tuples, in FrameFields.py order
+    def trial_frames(self) -> Iterator[Dict[str, List[List[Tuple]]]]:
+        hand = self.hand_path()
+        offsets = self.rng.normal(0, 0.02, (self.markers, 3))
+        latency = int(SERVER_LATENCY * CLOCK_FREQUENCY)
+
+        for pos in hand:
+            self.frame_number += 1
+            stamp = int(self.frame_number / self.rate * CLOCK_FREQUENCY)
+            markers = pos + offsets
+
+            rigid_bodies = [
+                (asset_ID, *(pos.tolist() if asset_ID == HAND_ID else (0.2, 0.0, 0.0)), 1.0, 0.0, 0.0, 0.0, 0.0002, 1)
+                for asset_ID in self.rigid_body_IDs
+            ]
+
+            yield {
+                'Prefix': [[(self.frame_number,)]],
+                'MarkerSets': [[(MARKER_SET, x, y, z) for x, y, z in markers.tolist()]],
+                'LabeledMarkerSet': [[
+                    (i + 1, 0, x, y, z, 0.014, 0, 0.0003) for i, (x, y, z) in enumerate(markers.tolist())
+                ]],
+                'LegacyMarkerSet': [[]],
+                'RigidBodies': [rigid_bodies],
+                'Skeletons': [[]],
+                'AssetMarkers': [[]],
+                'Suffix': [[(0, 0, self.frame_number / self.rate, stamp - latency, stamp, stamp, 0, 0, 0, 0, 0)]],
+            }
+
+    # Delivers a trial's frames to the listener; returns per-frame listener times (s)
+    def play(self, realtime: bool = False) -> np.ndarray:
+        times = []
+        started = time.perf_counter()
+
+        for i, frame_data in enumerate(self.trial_frames()):
+            if realtime:
+                delay = started + i / self.rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            self.last_packet_received = time.perf_counter()
+            self.frame_data_listener(frame_data)
+            times.append(time.perf_counter() - self.last_packet_received)
+
+        return np.asarray(times)
+
+
+# # # # # # # # # # # # # #
+# Measurement             #
+# # # # # # # # # # # # # #
+
+# Peak resident set size (MB) of this process; None where the resource module is unavailable
+#       NOTE: ru_maxrss is in KB on Linux, bytes on macOS
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# Mirrors GBYK_GripAperture.trial_clean_up(): export, screening, annotation & per-trial writes
+def clean_up_trial(tracker: OptiTracker, optidata: trialStore, optidesc: trialStore, screens: List[Dict],
+                   block_num: int, trial_num: int, rt: float) -> None:
+    trial_frames = tracker.dataexport()
+
+    screening = screen_dataframes(trial_frames, HAND_ID, rt, frame_rate=tracker.frame_rate)
+    screening["recycled"] = ";".join(screening.pop("failures"))
+    screens.append({"block_num": block_num, "trial_num": trial_num, **screening})
+
+    annotations = {
+        "participant_id": 1,
+        "practicing": False,
+        "block_num": block_num,
+        "trial_num": trial_num,
+        "task_type": "GBYK",
+        "target_size": "small",
+        "target_loc": "left",
+        "distractor_size": "large",
+        "distractor_loc": "right",
+    }
+
+    optidata.add(trial_frames, annotations, block_num, trial_num)
+    optidesc.add(tracker.descexport(), annotations, block_num, trial_num)
+
+    tracker.prediction_errors()
+
+
+def run_benchmark(directory: str, blocks: int = BLOCKS, trials: int = TRIALS_PER_BLOCK, rate: float = FRAME_RATE,
+                  trial_duration: float = TRIAL_DURATION, rigid_bodies: int = RIGID_BODIES, markers: int = MARKERS,
+                  seed: int = 0, realtime: bool = False) -> Dict[str, Any]:
+    client = syntheticClient(rate, rigid_bodies, markers, trial_duration, seed)
+    tracker = OptiTracker(frame_rate=rate, client=client)
+    tracker.watch_rest(HAND_ID)
+
+    optidata = trialStore(DATAFRAME_ASSETS, "framedata", directory=directory)
+    optidesc = trialStore(DESCFRAME_ASSETS, "framedesc", directory=directory)
+    screens = []
+
+    frame_times, cleanup_times = [], []
+    for block_num in range(1, blocks + 1):
+        for trial_num in range(1, trials + 1):
+            tracker.start()
+            frame_times.append(client.play(realtime))
+            tracker.stop()
+
+            t0 = time.perf_counter()
+            clean_up_trial(tracker, optidata, optidesc, screens, block_num, trial_num,
+                           (REACH_ONSET - GO_SIGNAL) * 1000)
+            cleanup_times.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    optidata.write(append=False)
+    optidesc.write(append=False)
+    dt.Frame(screens).to_csv(os.path.join(directory, "GripAperture_trial_screening.csv"))
+    final_write = time.perf_counter() - t0
+
+    frame_times = np.concatenate(frame_times)
+    cleanup_ms = np.asarray(cleanup_times) * 1000
+    window = max(1, min(GROWTH_WINDOW, len(cleanup_ms) // 2))
+
+    return {
+        "trials": len(cleanup_ms),
+        "frames": len(frame_times),
+        "rows": {asset: optidata.nrows(asset) for asset in DATAFRAME_ASSETS},
+        "frames_per_s": len(frame_times) / frame_times.sum(),
+        "frame_mean_us": frame_times.mean() * 1e6,
+        "frame_p99_us": np.percentile(frame_times, 99) * 1e6,
+        "headroom": len(frame_times) / frame_times.sum() / rate,
+        "cleanup_median_ms": float(np.median(cleanup_ms)),
+        "cleanup_p95_ms": float(np.percentile(cleanup_ms, 95)),
+        "cleanup_max_ms": float(cleanup_ms.max()),
+        "cleanup_growth": float(np.median(cleanup_ms[-window:]) / np.median(cleanup_ms[:window])),
+        "cleanup_ms": cleanup_ms.round(3).tolist(),
+        "final_write_s": final_write,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# Threshold breaches, as messages; empty if none
+def check_thresholds(results: Dict[str, Any], max_rss: float = MAX_PEAK_RSS_MB, max_cleanup: float = MAX_CLEANUP_P95_MS,
+                     max_growth: float = MAX_CLEANUP_GROWTH, max_write: float = MAX_FINAL_WRITE_S,
+                     min_headroom: float = MIN_HEADROOM) -> List[str]:
+    breaches = []
+    if results["peak_rss_mb"] is not None and results["peak_rss_mb"] > max_rss:
+        breaches.append(f"peak RSS {results['peak_rss_mb']:.0f}MB > {max_rss}MB")
+    if results["cleanup_p95_ms"] > max_cleanup:
+        breaches.append(f"p95 clean-up {results['cleanup_p95_ms']:.1f}ms > {max_cleanup}ms")
+    if results["cleanup_growth"] > max_growth:
+        breaches.append(f"clean-up growth {results['cleanup_growth']:.2f}x > {max_growth}x")
+    if results["final_write_s"] > max_write:
+        breaches.append(f"final write {results['final_write_s']:.2f}s > {max_write}s")
+    if results["headroom"] < min_headroom:
+        breaches.append(f"ingest headroom {results['headroom']:.1f}x < {min_headroom}x frame rate")
+
+    return breaches
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Session-scale memory & throughput benchmark, on synthetic frames")
+    parser.add_argument("--blocks", type=int, default=BLOCKS)
+    parser.add_argument("--trials", type=int, default=TRIALS_PER_BLOCK, help="trials per block")
+    parser.add_argument("--rate", type=float, default=FRAME_RATE, help="frame rate (Hz)")
+    parser.add_argument("--trial-duration", type=float, default=TRIAL_DURATION, help="seconds of frames per trial")
+    parser.add_argument("--rigid-bodies", type=int, default=RIGID_BODIES)
+    parser.add_argument("--markers", type=int, default=MARKERS, help="markers in the marker set")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--realtime", action="store_true", help="pace frames at the frame rate")
+    parser.add_argument("--out", default=None, help="directory written to (default: temporary, removed after)")
+    parser.add_argument("--json", default=None, help="write results to this path")
+    parser.add_argument("--max-rss", type=float, default=MAX_PEAK_RSS_MB, help="peak RSS threshold (MB)")
+    parser.add_argument("--max-cleanup", type=float, default=MAX_CLEANUP_P95_MS, help="p95 clean-up threshold (ms)")
+    parser.add_argument("--max-cleanup-growth", type=float, default=MAX_CLEANUP_GROWTH,
+                        help="threshold on clean-up time of the last trials over the first")
+    parser.add_argument("--max-write", type=float, default=MAX_FINAL_WRITE_S, help="final write threshold (s)")
+    parser.add_argument("--min-headroom", type=float, default=MIN_HEADROOM,
+                        help="minimum frames ingested per second, as a multiple of frame rate")
+    args = parser.parse_args(argv)
+
+    directory = args.out or tempfile.mkdtemp(prefix="gbyk_benchmark_")
+    os.makedirs(directory, exist_ok=True)
+
+    print(f"Benchmark | {args.blocks}x{args.trials} trials, {args.trial_duration}s @ {args.rate}Hz, "
+          f"{args.rigid_bodies} rigid bodies, {args.markers} markers")
+
+    try:
+        results = run_benchmark(
+            directory, args.blocks, args.trials, args.rate, args.trial_duration,
+            args.rigid_bodies, args.markers, args.seed, args.realtime
+        )
+    finally:
+        if args.out is None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    peak_rss = f"{results['peak_rss_mb']:.0f}MB" if results["peak_rss_mb"] is not None else "n/a"
+    print(f"Benchmark | ingest: {results['frames_per_s']:.0f} frames/s ({results['headroom']:.1f}x frame rate), "
+          f"mean {results['frame_mean_us']:.0f}us, p99 {results['frame_p99_us']:.0f}us per frame")
+    print(f"Benchmark | clean-up: median {results['cleanup_median_ms']:.1f}ms, p95 {results['cleanup_p95_ms']:.1f}ms, "
+          f"max {results['cleanup_max_ms']:.1f}ms, growth {results['cleanup_growth']:.2f}x")
+    print(f"Benchmark | final write: {results['final_write_s']:.2f}s; peak RSS: {peak_rss}")
+
+    breaches = check_thresholds(
+        results, args.max_rss, args.max_cleanup, args.max_cleanup_growth, args.max_write, args.min_headroom
+    )
+    results["breaches"] = breaches
+
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    for breach in breaches:
+        print(f"Benchmark | FAIL: {breach}")
+
+    return 1 if breaches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+# Parallel conversion of a session capture (see CaptureLog.py) into per-asset tables
+#
+#   Usage: python CaptureConvert.py <capture> [--out DIR] [--workers N] [--chunk-frames N]
+#                                   [--format jay|csv] [--natnet-version X.Y]
+#
+#   The capture is indexed (record headers only) and its frames split into contiguous byte
+#   ranges of --chunk-frames frames, never spanning a change of stream version (i.e. a server
+#   info packet). Ranges are decoded in a process pool, each worker reading its own range from
+#   the file, so no packets cross process boundaries. Sections are decoded by the DataUnpackers
+#   classes' row emitters, which read fixed-size records (rigid bodies, labeled & legacy
+#   markers) with struct rather than Construct. Workers return one numpy array per column;
+#   these are joined in frame order and written as one table per asset, each row tagged with
+#   its frame_number and the time (s since capture began) its packet was received.
+#
+#   Force plate & device sections are scanned into per-channel series (see ChannelSeries.py)
+#   and written as ForcePlates / Devices tables, a row per sample, only if any were streamed.
+
+import os
+import sys
+import time
+import struct
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import datatable as dt
+
+from CaptureLog import captureReader
+from StructRegistry import version_key
+from ChannelSeries import channelSeries
+from DataUnpackers import (
+    prefixData, markerSetsData, legacyMarkerSetData, rigidBodiesData, skeletonsData,
+    assetsData, labeledMarkerSetData, forcePlatesData, devicesData, suffixData
+)
+
+NAT_SERVERINFO = 1
+NAT_FRAMEOFDATA = 7
+
+# Frames per range decoded by one task
+CHUNK_FRAMES = 2000
+
+FORMATS = ("jay", "csv")
+
+# Columns added to every asset's rows
+FRAME_COLS = ("frame_number", "received")
+
+# Sections decoded into channelSeries, rather than row emitters
+CHANNEL_UNPACKERS = {'ForcePlates': forcePlatesData, 'Devices': devicesData}
+
+
+class frameRange(NamedTuple):
+    start: int          # file offsets, from & to (exclusive) record boundaries
+    end: int
+    frames: int
+    version: Optional[Tuple[int, ...]]
+
+
+# # # # # # # # # # # # # #
+# Decoding                #
+# # # # # # # # # # # # # #
+
+# (asset, unpacker) in packet order for a stream version, as NatNetClient unpacks them; None: analog channels
+def frame_sections(version: Optional[Tuple[int, ...]]) -> List[Tuple[str, Optional[type]]]:
+    key = version_key(version)
+
+    sections = [
+        ('Prefix', prefixData),
+        ('MarkerSets', markerSetsData),
+        ('LegacyMarkerSet', legacyMarkerSetData),
+        ('RigidBodies', rigidBodiesData),
+        ('Skeletons', skeletonsData),
+    ]
+    if key is None or key >= (4, 1):
+        sections.append(('AssetMarkers', assetsData))
+
+    sections += [
+        ('LabeledMarkerSet', labeledMarkerSetData),
+        ('ForcePlates', None),
+        ('Devices', None),
+        ('Suffix', suffixData),
+    ]
+    return sections
+
+
+# Stream version announced by a NAT_SERVERINFO packet; None if too short to hold one
+def server_version(packet: bytes) -> Optional[Tuple[int, ...]]:
+    return tuple(packet[264:268]) if len(packet) >= 268 else None
+
+
+# Empty column buffers per asset, one list per FIELDS entry (plus FRAME_COLS)
+def column_buffers(version: Optional[Tuple[int, ...]]) -> Dict[str, List[List]]:
+    return {
+        asset: [[] for _ in unpacker.FIELDS + FRAME_COLS]
+        for asset, unpacker in frame_sections(version) if unpacker is not None
+    }
+
+
+# Decodes one NAT_FRAMEOFDATA packet (header included) into columns (& channels, if given); returns bytes consumed
+def decode_frame(packet: bytes, version: Optional[Tuple[int, ...]], columns: Dict[str, List[List]],
+                 received: float = 0.0, channels: channelSeries = None) -> int:
+    offset = 4
+    frame_number = None
+
+    for asset, unpacker in frame_sections(version):
+        if unpacker is None:
+            if channels is None:
+                offset += 8 + struct.unpack_from('<I', packet, offset + 4)[0]
+                continue
+
+            section = CHANNEL_UNPACKERS[asset](packet[offset:], version, lazy=True)
+            channels.append(asset, frame_number, section.channels())
+            offset += section.relative_offset()
+            continue
+
+        section = unpacker(packet[offset:], version, lazy=True)
+        asset_columns = columns[asset]
+        n_fields = len(unpacker.FIELDS)
+
+        n = section.emit(asset_columns[:n_fields])
+        if asset == 'Prefix':
+            frame_number = asset_columns[0][-1]
+
+        asset_columns[n_fields].extend([frame_number] * n)
+        asset_columns[n_fields + 1].extend([received] * n)
+
+        offset += section.relative_offset()
+
+    return offset
+
+
+# Decodes the frames of one range, read from the capture; returns (columns as arrays, frames, CPU time)
+def decode_range(path: str, frame_range: frameRange) -> Tuple[Dict[str, Dict[str, np.ndarray]], int, float]:
+    began = time.process_time()
+    version = frame_range.version
+    columns = column_buffers(version)
+    channels = channelSeries()
+
+    frames = 0
+    for received, packet in captureReader(path).records(frame_range.start, frame_range.end):
+        if len(packet) >= 2 and struct.unpack_from('<H', packet)[0] == NAT_FRAMEOFDATA:
+            decode_frame(packet, version, columns, received, channels)
+            frames += 1
+
+    arrays = {}
+    for asset, unpacker in frame_sections(version):
+        if unpacker is None:
+            continue
+        names = unpacker.FIELDS + FRAME_COLS
+        arrays[asset] = {name: np.asarray(values) for name, values in zip(names, columns[asset])}
+
+    for asset, frame in channels.to_frames().items():
+        arrays[asset] = {name: frame[:, name].to_numpy().ravel() for name in frame.names}
+
+    return arrays, frames, time.process_time() - began
+
+
+# # # # # # # # # # # # # #
+# Splitting & joining     #
+# # # # # # # # # # # # # #
+
+# Splits the capture's frames into ranges of at most chunk_frames, breaking wherever the stream version changes
+def split_capture(path: str, chunk_frames: int = CHUNK_FRAMES,
+                  version: Optional[Tuple[int, ...]] = None) -> List[frameRange]:
+    reader = captureReader(path)
+    ranges = []
+    start = end = None
+    frames = 0
+
+    def close() -> None:
+        if start is not None and frames:
+            ranges.append(frameRange(start, end, frames, version))
+
+    for record in reader.index():
+        if record.message_id == NAT_SERVERINFO:
+            announced = server_version(next(reader.records(record.offset, record.end)).packet)
+            if announced is not None and announced != version:
+                close()
+                start, frames = None, 0
+                version = announced
+
+        elif record.message_id == NAT_FRAMEOFDATA:
+            if start is None or frames == chunk_frames:
+                close()
+                start, frames = record.offset, 0
+            end = record.end
+            frames += 1
+
+    close()
+    return ranges
+
+
+def join_columns(parts: List[Dict[str, Dict[str, np.ndarray]]]) -> Dict[str, dt.Frame]:
+    tables = {}
+    assets = dict.fromkeys(asset for part in parts for asset in part)
+
+    for asset in assets:
+        pieces = [part[asset] for part in parts if asset in part]
+        names = list(pieces[0].keys())
+        if not sum(len(piece[names[0]]) for piece in pieces):
+            continue
+
+        tables[asset] = dt.Frame({
+            name: np.concatenate([piece[name] for piece in pieces]).tolist()
+            if pieces[0][name].dtype == object else np.concatenate([piece[name] for piece in pieces])
+            for name in names
+        })
+
+    return tables
+
+
+def convert_capture(path: str, out_dir: str, workers: int = None, chunk_frames: int = CHUNK_FRAMES,
+                    fmt: str = "jay", version: Optional[Tuple[int, ...]] = None) -> Dict[str, float]:
+    t0 = time.perf_counter()
+    ranges = split_capture(path, chunk_frames, version)
+    split_time = time.perf_counter() - t0
+
+    print(f"CaptureConvert | {sum(r.frames for r in ranges)} frames in {len(ranges)} ranges "
+          f"(indexed in {split_time:.2f}s)")
+
+    t0 = time.perf_counter()
+    if workers == 1:
+        results = [decode_range(path, frame_range) for frame_range in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(decode_range, path, frame_range) for frame_range in ranges]
+            results = [future.result() for future in futures]
+    decode_time = time.perf_counter() - t0
+
+    frames = sum(result[1] for result in results)
+    busy = sum(result[2] for result in results)
+
+    t0 = time.perf_counter()
+    tables = join_columns([result[0] for result in results])
+
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    for asset, table in tables.items():
+        out = os.path.join(out_dir, f"{stem}_{asset}.{fmt}")
+        if fmt == "jay":
+            table.to_jay(out)
+        else:
+            table.to_csv(out)
+    write_time = time.perf_counter() - t0
+
+    stats = {
+        "frames": frames,
+        "ranges": len(ranges),
+        "decode_s": decode_time,
+        "frames_per_s": frames / decode_time if decode_time else 0.0,
+        "speedup": busy / decode_time if decode_time else 0.0,     # decoding CPU time / wall time, i.e. cores kept busy
+        "write_s": write_time,
+    }
+
+    print(f"CaptureConvert | decoded {frames} frames in {decode_time:.2f}s "
+          f"({stats['frames_per_s']:.0f} frames/s, {stats['speedup']:.1f} cores busy)")
+    print(f"CaptureConvert | wrote {len(tables)} tables ({', '.join(f'{a}: {t.nrows}' for a, t in tables.items())}) "
+          f"in {write_time:.2f}s")
+
+    return stats
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Decode a session capture into per-asset tables, in parallel")
+    parser.add_argument("capture")
+    parser.add_argument("--out", default=None, help="output directory (default: alongside the capture)")
+    parser.add_argument("--workers", type=int, default=None, help="pool size (default: cpu count; 1: no pool)")
+    parser.add_argument("--chunk-frames", type=int, default=CHUNK_FRAMES, help="frames per decoding task")
+    parser.add_argument("--format", choices=FORMATS, default="jay", help="jay (columnar binary) or csv")
+    parser.add_argument("--natnet-version", default=None,
+                        help="stream version (e.g. 4.1), for captures lacking server info")
+    args = parser.parse_args(argv)
+
+    version = tuple(int(v) for v in args.natnet_version.split(".")) if args.natnet_version else None
+    out_dir = args.out or os.path.dirname(os.path.abspath(args.capture))
+
+    convert_capture(args.capture, out_dir, args.workers, args.chunk_frames, args.format, version)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+# Session capture of raw NatNet packets, for replay (see ReplayNatNetClient.py) & offline decoding
+#
+#   One file per session, rather than a file per packet: a header, then one record per packet
+#   received, in the order processed:
+#       header:     MAGIC (8 bytes), wall-clock time capture began (f64, epoch s)
+#       record:     host time received (f64, s since capture began), length (u32), packet
+#
+#   Packets are stored whole (message ID & size included), exactly as read off the socket.
+#   A zero-length record marks a client startup(), so a replay can reproduce each connection
+#   (e.g. each trial) as recorded. Writes go through the file's buffer, under a lock, as both
+#   receive threads record; a record cut short (e.g. by a crash) ends the capture when read.
+#   An existing capture is never overwritten: capture_path() numbers a session's further
+#   captures (e.g. after a restart), and captureWriter refuses a path already taken.
+
+import os
+import time
+import struct
+import threading
+from typing import BinaryIO, Iterator, List, NamedTuple
+
+from Logs import get_logger
+
+log = get_logger("natnet.capture")
+
+MAGIC = b"NNCAPT01"
+HEADER = struct.Struct('<8sd')
+RECORD = struct.Struct('<dI')
+
+CAPTURE_EXT = ".natcap"
+
+
+class recordIndex(NamedTuple):
+    offset: int         # of the record (not the packet) in the file
+    time: float
+    length: int
+    message_id: int     # -1 for startup marks
+
+    @property
+    def end(self) -> int:
+        return self.offset + RECORD.size + self.length
+
+
+class capturedPacket(NamedTuple):
+    time: float         # s since capture began
+    packet: bytes       # empty for startup marks
+
+    @property
+    def is_mark(self) -> bool:
+        return not self.packet
+
+
+class captureWriter:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.started = time.perf_counter()
+        self.packets = 0
+
+        self._lock = threading.Lock()
+        self._file = open(path, 'xb')     # raises FileExistsError rather than overwrite an earlier capture
+        self._file.write(HEADER.pack(MAGIC, time.time()))
+
+    def write(self, packet: bytes, received: float = None) -> None:
+        if received is None:
+            received = time.perf_counter()
+
+        with self._lock:
+            if self._file is None:
+                return
+
+            self._file.write(RECORD.pack(received - self.started, len(packet)))
+            self._file.write(packet)
+            self.packets += 1
+
+    # Marks a client startup
+    def mark(self) -> None:
+        self.write(b"")
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class captureReader:
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+
+        if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"captureReader() | {path} is not a NatNet capture")
+
+        _, self.began = HEADER.unpack(header)
+
+    @staticmethod
+    def _records(f: BinaryIO, end: int = None) -> Iterator[capturedPacket]:
+        while end is None or f.tell() < end:
+            record = f.read(RECORD.size)
+            if not record:
+                return
+
+            if len(record) < RECORD.size:
+                log.warning("Capture ends mid-record (offset %d)", f.tell() - len(record))
+                return
+
+            received, length = RECORD.unpack(record)
+            packet = f.read(length)
+            if len(packet) < length:
+                log.warning("Capture ends mid-packet (offset %d)", f.tell() - len(packet) - RECORD.size)
+                return
+
+            yield capturedPacket(received, packet)
+
+    # Every record, marks included, in capture order
+    def __iter__(self) -> Iterator[capturedPacket]:
+        return self.records()
+
+    # Records starting within [start, end) bytes of the file; start must be a record's offset (see index())
+    def records(self, start: int = HEADER.size, end: int = None) -> Iterator[capturedPacket]:
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            yield from self._records(f, end)
+
+    # Location, time & message ID of every record, read without reading the packets themselves
+    def index(self) -> Iterator[recordIndex]:
+        with open(self.path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            f.seek(HEADER.size)
+            while True:
+                offset = f.tell()
+                record = f.read(RECORD.size)
+                if len(record) < RECORD.size:
+                    return
+
+                received, length = RECORD.unpack(record)
+                message_id = struct.unpack('<H', f.read(2))[0] if length >= 2 else -1
+                if f.seek(offset + RECORD.size + length) > size:
+                    return
+
+                yield recordIndex(offset, received, length, message_id)
+
+    # Packets (marks excluded) received between one startup & the next; anything before the first mark is a segment of its own
+    def segments(self) -> Iterator[List[capturedPacket]]:
+        segment, started = [], False
+        for record in self:
+            if record.is_mark:
+                if segment or started:
+                    yield segment
+                segment, started = [], True
+            else:
+                segment.append(record)
+
+        if segment or started:
+            yield segment
+
+
+# Capture path for a session, e.g. capture_path("GripAperture", 3) -> "GripAperture_3.natcap";
+# numbered if taken (by an earlier run of the session), i.e., "GripAperture_3-2.natcap", "GripAperture_3-3.natcap", ...
+def capture_path(prefix: str, session_id: object, directory: str = ".") -> str:
+    path = os.path.join(directory, f"{prefix}_{session_id}{CAPTURE_EXT}")
+
+    run = 1
+    while os.path.exists(path):
+        run += 1
+        path = os.path.join(directory, f"{prefix}_{session_id}-{run}{CAPTURE_EXT}")
+
+    return path
@@ -0,0 +1,320 @@
+# Structural integrity check of a session capture (see CaptureLog.py)
+#
+#   Usage: python CaptureVerify.py <capture> [--natnet-version X.Y] [--deep] [--limit N]
+#
+#   Frame packets are walked section by section from counts & sizes alone, without decoding
+#   values: each section's declared packet_size must equal the bytes its children account for,
+#   and the walk must end exactly at the end of the packet (the suffix & end of data tag).
+#   Force plates & devices are walked too. Packet headers (declared size) & frame numbers
+#   (strictly increasing within each recorded connection) are checked for all frames at once,
+#   with numpy over a memory map of the capture.
+#
+#   With --deep, every section is also decoded by its DataUnpackers class, as NatNetClient
+#   would, and the offset it reaches compared with the walk's; a disagreement on data that
+#   walks cleanly points at the decoder, rather than the data.
+#
+#   For each bad packet, the first bad offset is reported, within the packet & the file.
+#   Exits 1 if anything is found.
+
+import os
+import sys
+import mmap
+import time
+import struct
+import argparse
+from collections import Counter
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from CaptureLog import captureReader, RECORD
+from CaptureConvert import frame_sections, server_version, CHANNEL_UNPACKERS, NAT_SERVERINFO, NAT_FRAMEOFDATA
+from StructRegistry import version_key
+
+U32 = struct.Struct('<I')
+SECTION_HEADER = struct.Struct('<II')   # child_count, packet_size
+
+# Fixed child sizes, as laid out in DataStructures.py
+MARKER_SIZE = 12            # pos_x/y/z
+LABELED_MARKER_SIZE = 26    # encoded_id, pos_x/y/z, size, param, residual
+RIGID_BODY_SIZE = 38        # asset_ID, pos, rot, error, tracking_validity (or param)
+ASSET_MARKER_SIZE = 26      # asset_ID, pos, marker_size, param, residual
+
+SUFFIX_SIZE = 50            # NatNet 4.1 on, with precision timestamps
+SUFFIX_SIZE_LEGACY = 42
+END_OF_DATA_SIZE = 4        # zero tag closing every frame; not read by the suffix structures
+
+# Problems listed in full; the rest are only counted
+REPORT_LIMIT = 20
+
+
+class layoutError(Exception):
+    def __init__(self, offset: int, message: str) -> None:
+        super().__init__(message)
+        self.offset = offset
+        self.message = message
+
+
+class packetProblem(NamedTuple):
+    record_offset: int      # of the capture record holding the packet
+    frame_number: int       # as read from the prefix; -1 if unreadable
+    section: str
+    packet_offset: int      # first bad byte, relative to the packet (message ID & size included; negative: record header)
+    message: str
+
+    @property
+    def file_offset(self) -> int:
+        return self.record_offset + RECORD.size + self.packet_offset
+
+
+# # # # # # # # # # # # # #
+# Section layouts         #
+# # # # # # # # # # # # # #
+
+# Each walker takes the packet, the position of its first child & the section's (declared) end, and
+# returns where its children end; counts are bounded by the bytes left, so garbage can't run away
+
+def _count(packet: bytes, pos: int, end: int, min_size: int, what: str) -> int:
+    if pos + 4 > end:
+        raise layoutError(pos, f"{what} count runs past packet_size")
+
+    count = U32.unpack_from(packet, pos)[0]
+    if count * min_size > end - pos - 4:
+        raise layoutError(pos, f"{count} {what} can't fit in the {end - pos - 4} bytes left")
+    return count
+
+
+def _fixed(size: int) -> Callable[[bytes, int, int, int], int]:
+    def walk(packet: bytes, pos: int, count: int, end: int) -> int:
+        return pos + count * size
+    return walk
+
+
+def _marker_sets(packet: bytes, pos: int, count: int, end: int) -> int:
+    for _ in range(count):
+        nul = packet.find(b"\0", pos, end)
+        if nul < 0:
+            raise layoutError(pos, "marker set name unterminated")
+        pos = nul + 1
+        pos += 4 + _count(packet, pos, end, MARKER_SIZE, "markers") * MARKER_SIZE
+    return pos
+
+
+def _skeletons(packet: bytes, pos: int, count: int, end: int) -> int:
+    for _ in range(count):
+        pos += 4
+        pos += 4 + _count(packet, pos, end, RIGID_BODY_SIZE, "skeleton bones") * RIGID_BODY_SIZE
+    return pos
+
+
+def _assets(packet: bytes, pos: int, count: int, end: int) -> int:
+    for _ in range(count):
+        pos += 4
+        pos += 4 + _count(packet, pos, end, RIGID_BODY_SIZE, "asset rigid bodies") * RIGID_BODY_SIZE
+        pos += 4 + _count(packet, pos, end, ASSET_MARKER_SIZE, "asset markers") * ASSET_MARKER_SIZE
+    return pos
+
+
+# Force plates & devices alike: ID, channel count, then per channel a frame count & that many float32s
+def _channels(packet: bytes, pos: int, count: int, end: int) -> int:
+    for _ in range(count):
+        pos += 4
+        channels = _count(packet, pos, end, 4, "channels")
+        pos += 4
+        for _ in range(channels):
+            pos += 4 + _count(packet, pos, end, 4, "channel frames") * 4
+    return pos
+
+
+# asset -> (walker, minimum bytes per child)
+SECTION_LAYOUTS: Dict[str, Tuple[Callable[[bytes, int, int, int], int], int]] = {
+    'MarkerSets': (_marker_sets, 5),
+    'LegacyMarkerSet': (_fixed(MARKER_SIZE), MARKER_SIZE),
+    'RigidBodies': (_fixed(RIGID_BODY_SIZE), RIGID_BODY_SIZE),
+    'Skeletons': (_skeletons, 8),
+    'AssetMarkers': (_assets, 12),
+    'LabeledMarkerSet': (_fixed(LABELED_MARKER_SIZE), LABELED_MARKER_SIZE),
+    'ForcePlates': (_channels, 8),
+    'Devices': (_channels, 8),
+}
+
+
+def suffix_size(version: Optional[Tuple[int, ...]]) -> int:
+    key = version_key(version)
+    return SUFFIX_SIZE if key is None or key >= (4, 1) else SUFFIX_SIZE_LEGACY
+
+
+# # # # # # # # # # # # # #
+# Checks                  #
+# # # # # # # # # # # # # #
+
+# Walks one NAT_FRAMEOFDATA packet; returns (section, packet offset, message) for the first problem, or None
+def verify_frame(packet: bytes, version: Optional[Tuple[int, ...]], deep: bool = False) -> Optional[Tuple[str, int, str]]:
+    size = len(packet)
+    pos = 4
+
+    for asset, unpacker in frame_sections(version):
+        if asset == 'Prefix':
+            if size < pos + 4:
+                return asset, pos, "frame number runs past end of packet"
+            pos += 4
+            continue
+
+        if asset == 'Suffix':
+            expected = suffix_size(version) + END_OF_DATA_SIZE
+            if size - pos != expected:
+                return asset, pos, f"{size - pos} bytes remain for a {expected} byte suffix (end of data tag included)"
+            if U32.unpack_from(packet, size - END_OF_DATA_SIZE)[0] != 0:
+                return asset, size - END_OF_DATA_SIZE, "end of data tag isn't 0"
+            reached = size - END_OF_DATA_SIZE
+        else:
+            if pos + SECTION_HEADER.size > size:
+                return asset, pos, "section header runs past end of packet"
+
+            count, declared = SECTION_HEADER.unpack_from(packet, pos)
+            end = pos + SECTION_HEADER.size + declared
+            if end > size:
+                return asset, pos + 4, f"packet_size {declared} runs past end of packet ({size - pos - 8} bytes left)"
+
+            walker, min_size = SECTION_LAYOUTS[asset]
+            if count * min_size > declared:
+                return asset, pos, f"{count} children can't fit in packet_size {declared}"
+
+            try:
+                reached = walker(packet, pos + SECTION_HEADER.size, count, end)
+            except layoutError as e:
+                return asset, e.offset, e.message
+
+            if reached != end:
+                return asset, min(reached, end), f"children occupy {reached - pos - 8} bytes; packet_size declares {declared}"
+
+        unpacker = unpacker or CHANNEL_UNPACKERS.get(asset)
+        if deep and unpacker is not None:
+            try:
+                decoded = pos + unpacker(packet[pos:], version).relative_offset()
+            except Exception as e:
+                return asset, pos, f"{unpacker.__name__} failed to decode: {e}"
+
+            if decoded != reached:
+                return asset, min(decoded, reached), f"{unpacker.__name__} consumed {decoded - pos} bytes; layout spans {reached - pos}"
+
+        pos = reached
+
+    return None
+
+
+# Declared payload size (u16 at 2) & frame number (u32 at 4) of each frame packet, gathered from the mapped capture
+def frame_headers(buffer: np.ndarray, offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    packets = offsets + RECORD.size
+    bytes_at = lambda n: buffer[packets + n].astype(np.uint32)
+
+    declared = bytes_at(2) | bytes_at(3) << 8
+    frame_numbers = bytes_at(4) | bytes_at(5) << 8 | bytes_at(6) << 16 | bytes_at(7) << 24
+    return declared, frame_numbers
+
+
+def verify_capture(path: str, version: Optional[Tuple[int, ...]] = None, deep: bool = False) -> Tuple[List[packetProblem], Dict[str, float]]:
+    t0 = time.perf_counter()
+    reader = captureReader(path)
+    index = list(reader.index())
+
+    problems: Dict[int, packetProblem] = {}
+
+    def report(problem: packetProblem) -> None:
+        held = problems.get(problem.record_offset)
+        if held is None or problem.packet_offset < held.packet_offset:
+            problems[problem.record_offset] = problem
+
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        buffer = np.frombuffer(mm, dtype=np.uint8)
+
+        # Records: connection (count of startup marks so far) & stream version in effect for each frame
+        frames, connections, versions = [], [], []
+        connection = 0
+        for record in index:
+            if record.message_id == -1:
+                connection += 1
+            elif record.message_id == NAT_SERVERINFO:
+                start = record.offset + RECORD.size
+                version = server_version(mm[start:start + record.length]) or version
+            elif record.message_id == NAT_FRAMEOFDATA:
+                if record.length < 8:
+                    report(packetProblem(record.offset, -1, 'Header', record.length, "packet too short for a frame number"))
+                    continue
+                frames.append(record)
+                connections.append(connection)
+                versions.append(version)
+
+        expected_end = index[-1].end if index else mm.size()
+        if expected_end < mm.size():
+            report(packetProblem(expected_end, -1, 'Capture', -RECORD.size, f"capture ends mid-record ({mm.size() - expected_end} bytes)"))
+
+        # Headers & frame numbers, all frames at once
+        offsets = np.fromiter((record.offset for record in frames), dtype=np.int64, count=len(frames))
+        lengths = np.fromiter((record.length for record in frames), dtype=np.int64, count=len(frames))
+        declared, frame_numbers = frame_headers(buffer, offsets)
+
+        for i in np.flatnonzero(declared != (lengths - 4) & 0xFFFF):
+            report(packetProblem(int(offsets[i]), int(frame_numbers[i]), 'Header', 2,
+                                 f"declares {declared[i]} bytes; packet holds {lengths[i] - 4}"))
+
+        connection_ids = np.asarray(connections)
+        same_connection = connection_ids[1:] == connection_ids[:-1]
+        for i in np.flatnonzero(same_connection & (frame_numbers[1:] <= frame_numbers[:-1])) + 1:
+            report(packetProblem(int(offsets[i]), int(frame_numbers[i]), 'Prefix', 4,
+                                 f"frame number {frame_numbers[i]} follows {frame_numbers[i - 1]}"))
+
+        # Sections, packet by packet
+        for i, record in enumerate(frames):
+            start = record.offset + RECORD.size
+            found = verify_frame(mm[start:start + record.length], versions[i], deep)
+            if found is not None:
+                report(packetProblem(record.offset, int(frame_numbers[i]), *found))
+
+        del buffer
+
+    elapsed = time.perf_counter() - t0
+    stats = {
+        "records": len(index),
+        "frames": len(frames),
+        "bad_packets": len(problems),
+        "seconds": elapsed,
+        "frames_per_s": len(frames) / elapsed if elapsed else 0.0,
+    }
+    return sorted(problems.values()), stats
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check the structure of every frame in a session capture")
+    parser.add_argument("capture")
+    parser.add_argument("--natnet-version", default=None,
+                        help="stream version (e.g. 4.1), for captures lacking server info")
+    parser.add_argument("--deep", action="store_true", help="also decode each section, comparing offsets reached")
+    parser.add_argument("--limit", type=int, default=REPORT_LIMIT, help="problems to list (0: all)")
+    args = parser.parse_args(argv)
+
+    version = tuple(int(v) for v in args.natnet_version.split(".")) if args.natnet_version else None
+    problems, stats = verify_capture(args.capture, version, args.deep)
+
+    print(f"CaptureVerify | {os.path.basename(args.capture)}: {stats['frames']} frames of {stats['records']} records "
+          f"checked in {stats['seconds']:.2f}s ({stats['frames_per_s']:.0f} frames/s)")
+
+    if not problems:
+        print("CaptureVerify | no problems found")
+        return 0
+
+    by_section = Counter(problem.section for problem in problems)
+    print(f"CaptureVerify | {len(problems)} bad packets ({', '.join(f'{s}: {n}' for s, n in by_section.most_common())})")
+
+    listed = problems if not args.limit else problems[:args.limit]
+    for problem in listed:
+        print(f"CaptureVerify |   file offset {problem.file_offset} (packet {problem.packet_offset:+d}), "
+              f"frame {problem.frame_number}, {problem.section}: {problem.message}")
+    if len(listed) < len(problems):
+        print(f"CaptureVerify |   ... {len(problems) - len(listed)} more")
+
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+# Contiguous per-channel storage of analog (force plate & device) samples
+#
+#   Force plates & analog devices are sampled many times per mocap frame; each frame delivers,
+#   per channel, a float32 array of the samples taken since the last (see channelData.channels()).
+#   Rather than a row per sample, each channel's samples are copied into one preallocated
+#   float32 buffer, alongside the mocap frame number & buffer offset at which each frame's
+#   samples begin. A channel's series is then a single contiguous slice, and any one frame's
+#   samples a sub-slice thereof.
+
+import numpy as np
+import datatable as dt
+from typing import Dict, List, Tuple
+
+# Samples & frames preallocated per channel; ~10s at 1kHz (& 120Hz mocap), grown by doubling when exceeded
+DEFAULT_SAMPLES = 1000 * 10
+DEFAULT_FRAMES = 120 * 10
+
+# Columns of to_frames() output
+CHANNEL_COLS = ('parent_ID', 'channel', 'frame_number', 'sample', 'value')
+
+
+# # # # # # # # # # # # # #
+# Single channel          #
+# # # # # # # # # # # # # #
+
+class channelBuffer:
+    def __init__(self, samples: int = DEFAULT_SAMPLES, frames: int = DEFAULT_FRAMES) -> None:
+        self.nsamples = 0
+        self.nframes = 0
+
+        self._values = np.empty(samples, dtype=np.float32)
+        self._frame_numbers = np.empty(frames, dtype=np.int64)
+        self._starts = np.empty(frames, dtype=np.int64)
+
+    # Appends one frame's samples (single vector copy)
+    def append(self, frame_number: int, samples: np.ndarray) -> None:
+        n = len(samples)
+        if self.nsamples + n > len(self._values):
+            self._values = self._grow(self._values, self.nsamples, self.nsamples + n)
+        if self.nframes == len(self._starts):
+            self._frame_numbers = self._grow(self._frame_numbers, self.nframes, self.nframes + 1)
+            self._starts = self._grow(self._starts, self.nframes, self.nframes + 1)
+
+        self._values[self.nsamples:self.nsamples + n] = samples
+        self._frame_numbers[self.nframes] = frame_number
+        self._starts[self.nframes] = self.nsamples
+
+        self.nsamples += n
+        self.nframes += 1
+
+    @staticmethod
+    def _grow(array: np.ndarray, filled: int, needed: int) -> np.ndarray:
+        size = len(array) * 2
+        while size < needed:
+            size *= 2
+
+        grown = np.empty(size, dtype=array.dtype)
+        grown[:filled] = array[:filled]
+        return grown
+
+    # Filled portion of buffer (view, no copy)
+    def series(self) -> np.ndarray:
+        return self._values[:self.nsamples]
+
+    # Mocap frame numbers, and the offset into series() at which each frame's samples begin
+    def frame_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self._frame_numbers[:self.nframes], self._starts[:self.nframes]
+
+    # Samples of the i-th frame appended (view)
+    def frame(self, i: int) -> np.ndarray:
+        end = self._starts[i + 1] if i + 1 < self.nframes else self.nsamples
+        return self._values[self._starts[i]:end]
+
+    # Mocap frame number & index within that frame, per sample
+    def sample_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        frame_numbers, starts = self.frame_index()
+        counts = np.diff(np.append(starts, self.nsamples))
+
+        sample = np.arange(self.nsamples, dtype=np.int64) - np.repeat(starts, counts)
+        return np.repeat(frame_numbers, counts), sample
+
+
+# # # # # # # # # # # # # #
+# Channels by asset       #
+# # # # # # # # # # # # # #
+
+class channelSeries:
+    def __init__(self) -> None:
+        self.buffers: Dict[Tuple[str, int, int], channelBuffer] = {}   # (asset type, asset_ID, channel) -> buffer
+
+    # Appends one frame's channels, as returned by channelData.channels()
+    def append(self, asset_type: str, frame_number: int, channels: Dict[Tuple[int, int], np.ndarray]) -> None:
+        for (asset_ID, channel), samples in channels.items():
+            key = (asset_type, asset_ID, channel)
+            buffer = self.buffers.get(key)
+            if buffer is None:
+                buffer = self.buffers[key] = channelBuffer()
+
+            buffer.append(frame_number, samples)
+
+    def __len__(self) -> int:
+        return len(self.buffers)
+
+    # Contiguous series of one channel (view); empty if never received
+    def series(self, asset_type: str, asset_ID: int, channel: int) -> np.ndarray:
+        buffer = self.buffers.get((asset_type, asset_ID, channel))
+        return buffer.series() if buffer is not None else np.empty(0, dtype=np.float32)
+
+    # (asset_ID, channel) of each channel received for asset_type
+    def channels(self, asset_type: str) -> List[Tuple[int, int]]:
+        return sorted(key[1:] for key in self.buffers if key[0] == asset_type)
+
+    # Long frames (CHANNEL_COLS, a row per sample) per asset type, assembled from the buffers by vector ops
+    def to_frames(self) -> Dict[str, dt.Frame]:
+        frames = {}
+        for asset_type in sorted({key[0] for key in self.buffers}):
+            columns = {name: [] for name in CHANNEL_COLS}
+
+            for asset_ID, channel in self.channels(asset_type):
+                buffer = self.buffers[(asset_type, asset_ID, channel)]
+                frame_numbers, sample = buffer.sample_index()
+
+                columns['parent_ID'].append(np.full(buffer.nsamples, asset_ID, dtype=np.int32))
+                columns['channel'].append(np.full(buffer.nsamples, channel, dtype=np.int32))
+                columns['frame_number'].append(frame_numbers)
+                columns['sample'].append(sample)
+                columns['value'].append(buffer.series())
+
+            frames[asset_type] = dt.Frame({name: np.concatenate(parts) for name, parts in columns.items()})
+
+        return frames
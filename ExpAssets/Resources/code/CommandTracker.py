@@ -0,0 +1,140 @@
+# Correlates NatNet command requests with their responses
+#
+#   NAT_RESPONSE / NAT_UNRECOGNIZED_REQUEST packets carry no request identifier, so requests
+#   are kept one at a time on the wire: any number may be made concurrently, but each is sent
+#   only once the one before it has settled, and so each response belongs to the request in
+#   flight. Each request is represented by a concurrent.futures.Future, resolved (from
+#   whichever thread reads the command socket) with the response: an int (4 byte responses)
+#   or str. Unrecognized requests fail with ValueError.
+#
+#   Requests left unanswered after `timeout` are re-sent, up to `retries` times, before
+#   failing with TimeoutError. Should a re-sent request then see responses to more than one
+#   attempt, the first settles it and the rest are absorbed (for up to `timeout`) before the
+#   next request is sent, so they can't be mistaken for answers to later requests.
+
+import threading
+import collections
+from concurrent.futures import Future, TimeoutError, CancelledError
+from typing import Callable, Union
+
+# Seconds to wait for a response before re-sending, and times to re-send
+COMMAND_TIMEOUT = 1.0
+COMMAND_RETRIES = 2
+
+NAT_UNRECOGNIZED_REQUEST = 100
+
+
+class _request:
+    def __init__(self, command_str: str, send: Callable[[], int], timeout: float, retries: int) -> None:
+        self.command_str = command_str
+        self.send = send
+        self.timeout = timeout
+        self.retries = retries
+
+        self.future = Future()
+        self.future.set_running_or_notify_cancel()     # settled only by response, timeout or cancel_all()
+        self.sent = 0           # attempts made
+        self.answered = 0       # responses received (late ones included)
+        self.timer = None
+
+
+class commandTracker:
+    def __init__(self) -> None:
+        # re-entrant, as future callbacks (run while settling) may make further requests
+        self._lock = threading.RLock()
+        self._queue = collections.deque()
+        self._current = None
+
+    # Queues a command, sent (via send()) once those before it have settled; returns a Future for its response
+    def request(self, command_str: str, send: Callable[[], int], timeout: float = COMMAND_TIMEOUT,
+                retries: int = COMMAND_RETRIES) -> Future:
+        request = _request(command_str, send, timeout, retries)
+        with self._lock:
+            self._queue.append(request)
+            if self._current is None:
+                self._next()
+
+        return request.future
+
+    # # # #
+    # Called with lock held
+    # # # #
+
+    def _next(self) -> None:
+        self._current = None
+        while self._queue and self._current is None:
+            self._current = self._queue.popleft()
+            self._attempt(self._current)
+
+    def _attempt(self, request: _request) -> None:
+        request.sent += 1
+        try:
+            sent = request.send()
+        except OSError:
+            sent = -1
+
+        if sent < 0:
+            request.future.set_exception(ValueError(f"commandTracker.request() | Could not send '{request.command_str}'"))
+            self._current = None
+            return
+
+        request.timer = threading.Timer(request.timeout, self._expire, (request,))
+        request.timer.daemon = True
+        request.timer.start()
+
+    # # # #
+
+    # Timer callback: re-sends, fails, or (if already answered) stops waiting on late responses
+    def _expire(self, request: _request) -> None:
+        with self._lock:
+            if request is not self._current:
+                return
+
+            if not request.future.done():
+                if request.sent <= request.retries:
+                    self._attempt(request)
+                    if self._current is None:
+                        self._next()
+                    return
+
+                request.future.set_exception(TimeoutError(f"commandTracker.request() | No response to '{request.command_str}' after {request.sent} attempts"))
+
+            self._next()
+
+    # Settles the request in flight; call for each NAT_RESPONSE / NAT_UNRECOGNIZED_REQUEST
+    def resolve(self, message_id: int, response: Union[int, str, None]) -> None:
+        with self._lock:
+            request = self._current
+            if request is None:     # unsolicited, or too late to attribute
+                return
+
+            request.answered += 1
+            if not request.future.done():
+                if message_id == NAT_UNRECOGNIZED_REQUEST:
+                    request.future.set_exception(ValueError(f"commandTracker.resolve() | Server did not recognize '{request.command_str}'"))
+                else:
+                    request.future.set_result(response)
+
+            # every attempt answered; otherwise, the running timer ends the wait for late responses
+            if request.answered >= request.sent:
+                request.timer.cancel()
+                self._next()
+
+    # Number of requests in flight or queued
+    def outstanding(self) -> int:
+        return len(self._queue) + (self._current is not None)
+
+    # Fails all outstanding requests with CancelledError, e.g. at shutdown
+    def cancel_all(self) -> None:
+        with self._lock:
+            pending = list(self._queue)
+            if self._current is not None:
+                self._current.timer.cancel()
+                pending.insert(0, self._current)
+
+            self._queue.clear()
+            self._current = None
+
+            for request in pending:
+                if not request.future.done():
+                    request.future.set_exception(CancelledError(f"commandTracker.cancel_all() | '{request.command_str}' cancelled"))
@@ -16,7 +16,7 @@ dataStruct_Prefix = Struct(
 # Marker & MarkerSet structures
 dataStruct_Marker = Struct(
     'asset_type' /      Computed('Marker'),
-    'parent_name' /     Computed(lambda ctx: ctx._.asset_name),
+    'parent_name' /     Computed(this._.asset_name),
     'pos_x' /           Float32l, 
     'pos_y' /           Float32l, 
     'pos_z' /           Float32l
@@ -44,15 +44,15 @@ dataStruct_MarkerSets = Struct(
 
 
 # Labeled marker structure
-    # some properties need decoding
-def decodeMarkerID(obj, ctx): return (obj.encoded_id & 0x0000ffff)
-def decodeModelID(obj, ctx): return (obj.encoded_id >> 16)
+    # some properties need decoding; expressed via `this` so the Struct remains compilable
+decodeMarkerID = this.encoded_id & 0x0000ffff
+decodeModelID = this.encoded_id >> 16
 
 dataStruct_LabeledMarker = Struct(
     'asset_type' /      Computed("LabeledMarker"),
     'encoded_id' /      Int32ul,
-    'asset_ID' /        Computed(this.encoded_id * decodeMarkerID),
-    'parent_ID' /       Computed(this.encoded_id * decodeModelID),
+    'asset_ID' /        Computed(decodeMarkerID),
+    'parent_ID' /       Computed(decodeModelID),
     'pos_x' /           Float32l,
     'pos_y' /           Float32l,
     'pos_z' /           Float32l,
@@ -65,8 +65,8 @@ dataStruct_LabeledMarker = Struct(
 
 dataStruct_LabeledMarkerSet = Struct(
     'asset_type' /      Computed("LabeledMarkerSet"),
-    'packet_size' /     Int32ul,
     'child_count' /     Int32ul,
+    'packet_size' /     Int32ul,
     'children' /        dataStruct_LabeledMarker[this.child_count],
     'relative_offset' / Tell,
     #Probe()
@@ -185,15 +185,15 @@ dataStruct_Assetss = Struct(
 # Channel & channel frame (ForcePlate & Device) structures
 dataStruct_ChannelFrame = Struct(
     'asset_type' /      Computed("ChannelFrame"),
-    'parent_ID' /       Computed(lambda ctx: ctx._.parent_ID),
-    'parent_type' /     Computed(lambda ctx: ctx._.parent_type),
+    'parent_ID' /       Computed(this._.parent_ID),
+    'parent_type' /     Computed(this._.parent_type),
     'value' /           Float32l
 )
 
 dataStruct_Channel = Struct(
     'asset_type' /      Computed("Channel"),
-    'parent_ID' /       Computed(lambda ctx: ctx._.self_ID),
-    'parent_type' /     Computed(lambda ctx: ctx._.asset_type),
+    'parent_ID' /       Computed(this._.asset_ID),
+    'parent_type' /     Computed(this._.asset_type),
     'child_count' /     Int32ul,
     'children' /        dataStruct_ChannelFrame[this.child_count]
 )
@@ -233,8 +233,8 @@ dataStruct_Devices = Struct(
 
 # Frame Suffix data structures
     # recording and change flags need decoding
-def isRecording(obj, ctx): return (obj.param & 0x01) != 0
-def hasChanged(obj, ctx): return (obj.param & 0x02) != 0
+isRecording = (this.param & 0x01) != 0
+hasChanged = (this.param & 0x02) != 0
 
 dataStruct_Suffix = Struct(
     'asset_type' /                  Computed("Suffix"),
@@ -247,11 +247,26 @@ dataStruct_Suffix = Struct(
     'prec_timestamp_secs' /         Int32ul,
     'prec_timestamp_frac_secs' /    Int32ul,
     'param' /                       Int16sl,
-    'is_recording' /                Computed(this.param * isRecording),
-    'tracked_models_changed' /      Computed(this.param * hasChanged),
+    'is_recording' /                Computed(isRecording),
+    'tracked_models_changed' /      Computed(hasChanged),
     'relative_offset' /             Tell,
     #Probe()
 )
 
+# NatNet < 4.1 suffix; precision timestamps not yet included
+dataStruct_SuffixLegacy = Struct(
+    'asset_type' /                  Computed("Suffix"),
+    'timecode' /                    Int32ul,
+    'timecode_sub' /                Int32ul,
+    'timestamp' /                   Int64ul,
+    'stamp_camera_mid_exposure' /   Int64ul,
+    'stamp_data_received' /         Int64ul,
+    'stamp_transmit' /              Int64ul,
+    'param' /                       Int16sl,
+    'is_recording' /                Computed(isRecording),
+    'tracked_models_changed' /      Computed(hasChanged),
+    'relative_offset' /             Tell,
+)
+
 
 
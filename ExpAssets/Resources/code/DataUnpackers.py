@@ -1,8 +1,15 @@
 # TODO: Document
 
+import struct
+import numpy as np
 from construct import Struct
 from DataStructures import *
-from typing import Tuple, List, Dict, Union
+from StructRegistry import structRegistry
+from FrameFields import (
+    FRAME_FIELDS, PREFIX_ROW, MARKER_ROW, LABELED_MARKER_ROW, LEGACY_MARKER_ROW, RIGID_BODY_ROW, ASSET_MARKER_ROW,
+    CHANNEL_ROW, SUFFIX_ROW
+)
+from typing import Tuple, List, Dict, Union, Iterator, Any
 
 
 
@@ -12,23 +19,35 @@ from typing import Tuple, List, Dict, Union
 # # # # # # # # # # # # # # # # # # # # # # #
 
 class dataUnpacker:
-    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None) -> None:
-        self.natnet_version = NatNetStreamVersion      # implementation unlikely until future updates warrant it
+    # Field order of rows produced by rows()/emit(); set by child classes
+    FIELDS: Tuple[str, ...] = ()
+
+    # Fixed-size child record (struct format), for sections whose children can be read without Construct
+    RECORD: Union[struct.Struct, None] = None
+
+    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None, lazy: bool = False) -> None:
+        self.natnet_version = NatNetStreamVersion      # selects version-appropriate (compiled) structure
         self._structure = self._get_structure()        # asset bespoke parsing structures, see DataStructures.py
         self._framedata = None                         # container for unpacked data
+        self._bytestream = None                        # retained for deferred parsing & record scanning
+        self._records = None                           # raw child records, for RECORD sections
+        self._end = 0                                  # section length, when known without parsing
 
         # parses on init if data
         if unparsed_bytestream is not None:
-            self.parse(unparsed_bytestream)
+            if lazy:
+                self.scan(unparsed_bytestream)
+            else:
+                self.parse(unparsed_bytestream)
 
     # fetch structure corresponding to asset type
     def _get_structure(self) -> Struct:
         """
-        Returns the Struct corresponding to the type of this instance
-        from the FRAMEDATA_STRUCTS mapping.
+        Returns the compiled Struct corresponding to the type of this instance
+        and the stream version, from the FRAMEDATA_REGISTRY.
         """
         try:
-            return FRAMEDATA_STRUCTS[type(self)]
+            return FRAMEDATA_REGISTRY.get(type(self), self.natnet_version)
         except KeyError:
             raise ValueError(f"dataUnpacker._get_structure() | Unrecognized asset type.\n\tExpected: {FRAMEDATA_STRUCTS.keys()}\n\tSupplied: {type(self)}")
     
@@ -36,18 +55,97 @@ class dataUnpacker:
     def relative_offset(self) -> int:
         if self._framedata is not None:
             return self._framedata.relative_offset
-        
-        return 0
+
+        return self._end
     
     # shadows Construct.Struct.parse() method
     def parse(self, unparsed_bytestream: bytes) -> None:
         self._framedata = self._structure.parse(unparsed_bytestream)
 
+        if self.RECORD is not None:
+            self._bytestream = unparsed_bytestream
+            self._records = self._record_view(unparsed_bytestream)
+
+    # Reads only the section header (child_count, packet_size); children are decoded on demand
+    #       NOTE: sections without a RECORD layout are parsed in full
+    def scan(self, unparsed_bytestream: bytes) -> None:
+        if self.RECORD is None:
+            self.parse(unparsed_bytestream)
+            return
+
+        self._bytestream = unparsed_bytestream
+        self._records = self._record_view(unparsed_bytestream)
+        self._end = 8 + struct.unpack_from('<I', unparsed_bytestream, 4)[0]
+
+    # Raw child records; sections nesting them within groups (marker sets, skeletons, assets) override
+    def _record_view(self, unparsed_bytestream: bytes) -> memoryview:
+        child_count = struct.unpack_from('<I', unparsed_bytestream, 0)[0]
+        return memoryview(unparsed_bytestream)[8:8 + child_count * self.RECORD.size]
+
+    # Records of each group, as one run; groups must end where packet_size says the section does
+    def _gather(self, unparsed_bytestream: bytes, spans: List[Tuple[int, int]], end: int) -> Union[memoryview, bytes]:
+        packet_size = struct.unpack_from('<I', unparsed_bytestream, 4)[0]
+        if end != 8 + packet_size:
+            raise ValueError(f"{type(self).__name__}._gather() | Records end at offset {end}; packet_size ({packet_size}) ends at {8 + packet_size}")
+
+        view = memoryview(unparsed_bytestream)
+        if len(spans) == 1:
+            return view[spans[0][0]:spans[0][1]]
+        return b''.join(view[start:stop] for start, stop in spans)
+
+    # Parsed container; parses deferred (scanned) sections on first access
+    def framedata(self) -> Any:
+        if self._framedata is None and self._bytestream is not None:
+            self.parse(self._bytestream)
+
+        return self._framedata
+
     # coerces data parcels into list[dict]; bundling procedure varies by asset type
     #       NOTE: children drop leading entries (obj addr)
     def data(self) -> List[Dict]:
         raise NotImplementedError("AssetDataStruct.data() | Must be implemented by child class.")
 
+    # # # #
+    # Row emitters: decoded values in FIELDS order, without building a dict per child
+    # # # #
+
+    # Parsed children from which rows are read; bundling mirrors data()
+    def _children(self) -> Iterator[Any]:
+        raise NotImplementedError("dataUnpacker._children() | Must be implemented by child class.")
+
+    # Decodes one RECORD tuple into FIELDS order; identity unless fields need decoding
+    def _decode_record(self, record: Tuple) -> Tuple:
+        return record
+
+    # Yields one tuple per child, values ordered as FIELDS
+    def rows(self) -> Iterator[Tuple]:
+        if self._records is not None:
+            if type(self)._decode_record is dataUnpacker._decode_record:
+                return self.RECORD.iter_unpack(self._records)
+            return map(self._decode_record, self.RECORD.iter_unpack(self._records))
+
+        fields = self.FIELDS
+        return (tuple(child[field] for field in fields) for child in self._children())
+
+    # Appends each row to a caller supplied list; returns number of rows appended
+    def emit_rows(self, rows: List[Tuple]) -> int:
+        n = len(rows)
+        rows.extend(self.rows())
+        return len(rows) - n
+
+    # Appends each value to the caller supplied column buffer of its field (one list per FIELDS entry)
+    def emit(self, columns: List[List]) -> int:
+        if len(columns) != len(self.FIELDS):
+            raise ValueError(f"{type(self).__name__}.emit() | Expected {len(self.FIELDS)} columns ({self.FIELDS}); supplied: {len(columns)}")
+
+        n = 0
+        for row in self.rows():
+            for column, value in zip(columns, row):
+                column.append(value)
+            n += 1
+
+        return n
+
 
 
 
@@ -56,121 +154,296 @@ class dataUnpacker:
 # # # # # # # # # # # # # # 
     
 class prefixData(dataUnpacker):
-    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None) -> None:
-        super().__init__(unparsed_bytestream, NatNetStreamVersion)     
+    FIELDS = PREFIX_ROW
+
+    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None, lazy: bool = False) -> None:
+        super().__init__(unparsed_bytestream, NatNetStreamVersion, lazy)
         
     def data(self) -> List[Dict]:
         # Drops terminal entry (relative stream pos)
-        return [dict(list(self._framedata.items())[1:-1])]
+        return [dict(list(self.framedata().items())[1:-1])]
+
+    def _children(self) -> Iterator[Any]:
+        yield self.framedata()
 
 
 class markerSetsData(dataUnpacker):
-    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None) -> None:
-        super().__init__(unparsed_bytestream, NatNetStreamVersion)
+    FIELDS = MARKER_ROW
+    RECORD = struct.Struct('<3f')       # pos_x/y/z, within a named marker set
+
+    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None, lazy: bool = False) -> None:
+        self._set_counts = None                        # (set name, marker count) per marker set
+        super().__init__(unparsed_bytestream, NatNetStreamVersion, lazy)
+
+    # Walks set names & marker counts; markers of every set gathered into one run
+    def _record_view(self, unparsed_bytestream: bytes) -> Union[memoryview, bytes]:
+        child_count = struct.unpack_from('<I', unparsed_bytestream, 0)[0]
+        set_counts, spans, pos = [], [], 8
+
+        for _ in range(child_count):
+            terminator = unparsed_bytestream.index(b'\x00', pos)
+            marker_count = struct.unpack_from('<I', unparsed_bytestream, terminator + 1)[0]
+            set_counts.append((unparsed_bytestream[pos:terminator].decode('utf8'), marker_count))
+
+            pos = terminator + 5
+            spans.append((pos, pos + marker_count * self.RECORD.size))
+            pos += marker_count * self.RECORD.size
+
+        records = self._gather(unparsed_bytestream, spans, pos)
+        self._set_counts = set_counts
+        return records
+
+    # Set name leads each marker's position
+    def rows(self) -> Iterator[Tuple]:
+        if self._records is None:
+            return super().rows()
+
+        positions = self.RECORD.iter_unpack(self._records)
+        return ((set_name, *next(positions)) for set_name, n in self._set_counts for _ in range(n))
 
     def data(self) -> List[Dict]:
         return [dict(list(marker.items())[1:]) 
-                for marker_set in self._framedata.children
+                for marker_set in self.framedata().children
                 for marker in marker_set.children]
+
+    def _children(self) -> Iterator[Any]:
+        return (marker for marker_set in self.framedata().children for marker in marker_set.children)
     
 # if you thought these'd come with labels, you're wrong.
 class labeledMarkerSetData(dataUnpacker):
-    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None) -> None:
-        super().__init__(unparsed_bytestream, NatNetStreamVersion)
+    FIELDS = LABELED_MARKER_ROW
+    RECORD = struct.Struct('<I4fhf')    # encoded_id, pos_x/y/z, size, param, residual
+
+    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None, lazy: bool = False) -> None:
+        super().__init__(unparsed_bytestream, NatNetStreamVersion, lazy)
 
     def data(self) -> List[Dict]:
         return [dict(list(labeledMarker.items())[1:]) 
-                for labeledMarker in self._framedata.children]
+                for labeledMarker in self.framedata().children]
+
+    def _children(self) -> Iterator[Any]:
+        return iter(self.framedata().children)
+
+    # encoded_id -> (marker ID, model ID); see decodeMarkerID/decodeModelID
+    def _decode_record(self, record: Tuple) -> Tuple:
+        encoded_id, pos_x, pos_y, pos_z, size, param, residual = record
+        return (encoded_id & 0x0000ffff, encoded_id >> 16, pos_x, pos_y, pos_z, size, param, residual)
 
 # no idea what these are; not documented in SDK
 # NOTE: untested, unpacking breaks upon reaching them; without documentation I'm struggling to confirm correct structuring
 class legacyMarkerSetData(dataUnpacker):
-    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None) -> None:
-        super().__init__(unparsed_bytestream, NatNetStreamVersion)
+    FIELDS = LEGACY_MARKER_ROW
+    RECORD = struct.Struct('<3f')
+
+    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None, lazy: bool = False) -> None:
+        super().__init__(unparsed_bytestream, NatNetStreamVersion, lazy)
 
     def data(self) -> List[Dict]:
         return [dict(list(legacyMarker.items())[1:]) 
-                for legacyMarker in self._framedata.children]
+                for legacyMarker in self.framedata().children]
+
+    def _children(self) -> Iterator[Any]:
+        return iter(self.framedata().children)
 
 
 class rigidBodiesData(dataUnpacker):
-    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None) -> None:
-        super().__init__(unparsed_bytestream, NatNetStreamVersion)
+    FIELDS = RIGID_BODY_ROW
+    RECORD = struct.Struct('<I8fh')     # see dataStruct_RigidBody
+
+    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None, lazy: bool = False) -> None:
+        super().__init__(unparsed_bytestream, NatNetStreamVersion, lazy)
 
     def data(self) -> List[Dict]:
 
         return [dict(list(rigidBody.items())[1:])
-                for rigidBody in self._framedata.children]
+                for rigidBody in self.framedata().children]
+
+    def _children(self) -> Iterator[Any]:
+        return iter(self.framedata().children)
 
 
 # instead of giving rigid body collectives a shared ID, they gave them their own class
 class skeletonsData(dataUnpacker):
-    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None) -> None:
-        super().__init__(unparsed_bytestream, NatNetStreamVersion)
+    FIELDS = RIGID_BODY_ROW
+    RECORD = rigidBodiesData.RECORD
+
+    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None, lazy: bool = False) -> None:
+        super().__init__(unparsed_bytestream, NatNetStreamVersion, lazy)
+
+    # Walks skeleton IDs & bone counts; bones of every skeleton gathered into one run
+    def _record_view(self, unparsed_bytestream: bytes) -> Union[memoryview, bytes]:
+        child_count = struct.unpack_from('<I', unparsed_bytestream, 0)[0]
+        spans, pos = [], 8
+
+        for _ in range(child_count):
+            bone_count = struct.unpack_from('<I', unparsed_bytestream, pos + 4)[0]
+            pos += 8
+            spans.append((pos, pos + bone_count * self.RECORD.size))
+            pos += bone_count * self.RECORD.size
+
+        return self._gather(unparsed_bytestream, spans, pos)
 
     def data(self) -> List[Dict]:
         return [dict(list(rigidBody.items())[1:]) 
-                for skeleton in self._framedata.children
+                for skeleton in self.framedata().children
                 for rigidBody in skeleton.children]
+
+    def _children(self) -> Iterator[Any]:
+        return (rigidBody for skeleton in self.framedata().children for rigidBody in skeleton.children)
     
 # I think this is in the dictionary under "redundancy"
+#       NOTE: rows()/emit() cover asset markers only (as logged by NatNetClient)
 class assetsData(dataUnpacker):
-    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None) -> None:
-        super().__init__(unparsed_bytestream, NatNetStreamVersion)
+    FIELDS = ASSET_MARKER_ROW
+    RECORD = struct.Struct('<I4fhf')    # see dataStruct_AssetMarker
+    RIGID_BODY_RECORD = struct.Struct('<I8fh')
+
+    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None, lazy: bool = False) -> None:
+        super().__init__(unparsed_bytestream, NatNetStreamVersion, lazy)
+
+    # Walks each asset's counts, stepping over its rigid bodies; markers of every asset gathered into one run
+    def _record_view(self, unparsed_bytestream: bytes) -> Union[memoryview, bytes]:
+        child_count = struct.unpack_from('<I', unparsed_bytestream, 0)[0]
+        spans, pos = [], 8
+
+        for _ in range(child_count):
+            rigid_body_count = struct.unpack_from('<I', unparsed_bytestream, pos + 4)[0]
+            pos += 8 + rigid_body_count * self.RIGID_BODY_RECORD.size
+
+            marker_count = struct.unpack_from('<I', unparsed_bytestream, pos)[0]
+            pos += 4
+            spans.append((pos, pos + marker_count * self.RECORD.size))
+            pos += marker_count * self.RECORD.size
+
+        return self._gather(unparsed_bytestream, spans, pos)
 
     # NOTE: out of necessity, not choice
     def data(self, asset_type) -> List[Dict]:
         if (asset_type == "AssetRigidBodies"):
             return [dict(list(assetRigidBody.items())[1:]) 
-                    for assetRigidBody in self._framedata.rigid_body_children]
-                    # for asset in self._framedata.children
-                    # for assetRigidBody in asset.rigid_bodies]
+                    for asset in self.framedata().children
+                    for assetRigidBody in asset.rigid_body_children]
         
         elif (asset_type == "AssetMarkers"):
             return [dict(list(assetMarker.items())[1:]) 
-                    for assetMarker in self._framedata.marker_children]
-                    # for asset in self._framedata.children
-                    # for assetMarker in asset.markers]
+                    for asset in self.framedata().children
+                    for assetMarker in asset.marker_children]
         else:
             raise ValueError(f"assetData.export() | asset_type must be 'AssetRigidBodies' or 'AssetMarkers'; type supplied: {asset_type}")
 
+    def _children(self) -> Iterator[Any]:
+        return (assetMarker for asset in self.framedata().children for assetMarker in asset.marker_children)
 
-# NOTE: untested, cannot verify that calibration matrices are correctly parsed
-class forcePlatesData(dataUnpacker):
-    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None) -> None:
-        super().__init__(unparsed_bytestream, NatNetStreamVersion)
 
-    def data(self) -> List[Dict]:
-        return [dict(list(frame.items())[1:]) 
-                for forcePlate in self._framedata.children 
-                for channel in forcePlate.children
-                for frame in channel.children
-                ]
+# Analog channels (force plates & devices): per asset, channel_count channels, each a frame count & that many float32s
+#       Scanning walks the counts alone, guided by & checked against packet_size; channels() then views each
+#       channel's samples in place (one float32 array per channel), so no object is built per sample.
+#       Parsing (Construct) is only done if data() is called.
+class channelData(dataUnpacker):
+    FIELDS = CHANNEL_ROW
+    PARENT_TYPE = None
+    SAMPLE = np.dtype('<f4')
 
+    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None, lazy: bool = False) -> None:
+        self._spans = None                             # (asset_ID, channel, offset, sample count) per channel
+        super().__init__(unparsed_bytestream, NatNetStreamVersion, lazy)
 
-class devicesData(dataUnpacker):
-    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None) -> None:
-        super().__init__(unparsed_bytestream, NatNetStreamVersion)
+    def parse(self, unparsed_bytestream: bytes) -> None:
+        super().parse(unparsed_bytestream)
+        self._bytestream = unparsed_bytestream
+
+    def scan(self, unparsed_bytestream: bytes) -> None:
+        self._bytestream = unparsed_bytestream
+        self._spans = self._walk(unparsed_bytestream)
+
+    def _walk(self, unparsed_bytestream: bytes) -> List[Tuple[int, int, int, int]]:
+        child_count, packet_size = struct.unpack_from('<II', unparsed_bytestream, 0)
+        end = 8 + packet_size
+        if end > len(unparsed_bytestream):
+            raise ValueError(f"{type(self).__name__}._walk() | packet_size ({packet_size}) exceeds bytes supplied ({len(unparsed_bytestream) - 8})")
+
+        spans, pos = [], 8
+        for _ in range(child_count):
+            asset_ID, channel_count = struct.unpack_from('<II', unparsed_bytestream, pos)
+            pos += 8
+            for channel in range(channel_count):
+                n = struct.unpack_from('<I', unparsed_bytestream, pos)[0]
+                spans.append((asset_ID, channel, pos + 4, n))
+                pos += 4 + n * self.SAMPLE.itemsize
+
+                if pos > end:
+                    raise ValueError(f"{type(self).__name__}._walk() | Channels overrun packet_size ({packet_size}) at offset {pos}")
+
+        if pos != end:
+            raise ValueError(f"{type(self).__name__}._walk() | Channels end at offset {pos}; packet_size ({packet_size}) ends at {end}")
+
+        self._end = end
+        return spans
+
+    # (asset_ID, channel) -> this frame's samples, as float32 views onto the bytestream
+    def channels(self) -> Dict[Tuple[int, int], np.ndarray]:
+        if self._spans is None:
+            self._spans = self._walk(self._bytestream)
+
+        return {
+            (asset_ID, channel): np.frombuffer(self._bytestream, dtype=self.SAMPLE, count=n, offset=offset)
+            for asset_ID, channel, offset, n in self._spans
+        }
+
+    def rows(self) -> Iterator[Tuple]:
+        return (
+            (asset_ID, self.PARENT_TYPE, channel, float(value))
+            for (asset_ID, channel), samples in self.channels().items()
+            for value in samples
+        )
 
     def data(self) -> List[Dict]:
-        return [dict(list(frame.items())[1:]) 
-                for device in self._framedata.children 
-                for channel in device.children
+        return [dict(list(frame.items())[1:])
+                for asset in self.framedata().children
+                for channel in asset.children
                 for frame in channel.children
                 ]
 
+    def _children(self) -> Iterator[Any]:
+        return (frame for asset in self.framedata().children for channel in asset.children for frame in channel.children)
+
+
+# NOTE: channel layout verified against synthetic packets only; untested with force plate hardware
+class forcePlatesData(channelData):
+    PARENT_TYPE = "ForcePlate"
+
+    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None, lazy: bool = False) -> None:
+        super().__init__(unparsed_bytestream, NatNetStreamVersion, lazy)
+
+
+class devicesData(channelData):
+    PARENT_TYPE = "Device"
+
+    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None, lazy: bool = False) -> None:
+        super().__init__(unparsed_bytestream, NatNetStreamVersion, lazy)
+
 
 class suffixData(dataUnpacker):
-    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None) -> None:
-        super().__init__(unparsed_bytestream, NatNetStreamVersion)
+    FIELDS = SUFFIX_ROW
+
+    def __init__(self, unparsed_bytestream: bytes = None, NatNetStreamVersion: List[int] = None, lazy: bool = False) -> None:
+        super().__init__(unparsed_bytestream, NatNetStreamVersion, lazy)
 
     def data(self) -> List[Dict]:
-        return [dict(list(self._framedata.items())[1:-1])]
+        return [dict(list(self.framedata().items())[1:-1])]
+
+    def _children(self) -> Iterator[Any]:
+        yield self.framedata()
+
+    # Fields a structure lacks (precision timestamps, before 4.1) are None
+    def rows(self) -> Iterator[Tuple]:
+        suffix = self.framedata()
+        yield tuple(suffix.get(field) for field in self.FIELDS)
     
 
 
 # unpacker class type used to select the correct structure
-# NOTE: potentially will be refactored to allow for keying via stream version
+# NOTE: defaults; version-specific structures are registered with FRAMEDATA_REGISTRY below
 FRAMEDATA_STRUCTS = {
     prefixData:             dataStruct_Prefix,
     markerSetsData:         dataStruct_MarkerSets,
@@ -178,20 +451,25 @@ FRAMEDATA_STRUCTS = {
     legacyMarkerSetData:    dataStruct_LegacyMarkerSet,
     rigidBodiesData:        dataStruct_RigidBodies,
     skeletonsData:          dataStruct_Skeletons,
-    assetsData:             dataStruct_Assets,
+    assetsData:             dataStruct_Assetss,
     forcePlatesData:        dataStruct_ForcePlates,
     devicesData:            dataStruct_Devices,
     suffixData:             dataStruct_Suffix
 }
 
+# keyed by (unpacker, NatNet major.minor); compiled parsers built via FRAMEDATA_REGISTRY.build(version)
+FRAMEDATA_REGISTRY = structRegistry(FRAMEDATA_STRUCTS)
+FRAMEDATA_REGISTRY.register(suffixData, dataStruct_SuffixLegacy, since=(0, 0))
+FRAMEDATA_REGISTRY.register(suffixData, dataStruct_Suffix, since=(4, 1))
+
 # # # # # # # # # # # # #
 # Frame data container  #
 # # # # # # # # # # # # #
-    
+
 class frameData:
     def __init__(self) -> None:
         
-        # Aggregate Frame Data
+        # Aggregate Frame Data; per section, lists of row tuples (in FRAME_FIELDS order, see FrameFields.py)
         self._framedata = {
             'Prefix': [], 
             'MarkerSets': [], 
@@ -201,12 +479,12 @@ class frameData:
             'Skeletons': [],
             #'AssetRigidBodies': [],
             'AssetMarkers': [],
-            #'ForcePlates': [], 
-            #'Devices': [], 
+            'ForcePlates': [],      # per frame: {(asset_ID, channel): float32 samples}, see channelData.channels()
+            'Devices': [],
             'Suffix': []
         }
 
-    def log(self, asset_type: str, asset_frame_data: List[Dict]) -> None:
+    def log(self, asset_type: str, asset_frame_data: List[Tuple]) -> None:
         self._framedata[asset_type].append(asset_frame_data)
 
     # TODO: build back in; or drop, ostensibly unnecessary
@@ -220,7 +498,7 @@ class frameData:
 
     # exporting allows for selective inclusion/exclusion of asset types
         # TODO: make that true
-    def export(self, include: Union[Tuple[str, ...], str] = None, exclude: Union[Tuple[str, ...], str] = None) -> Dict[str, Tuple[Dict, ...]]:
+    def export(self, include: Union[Tuple[str, ...], str] = None, exclude: Union[Tuple[str, ...], str] = None) -> Dict[str, List[List[Tuple]]]:
         # include = self.__validate_export_arg(include, "include")
 
         # if exclude is not None:
@@ -0,0 +1,100 @@
+# Persistent cache of parsed model definitions (NAT_MODELDEF payloads)
+#
+#   Parsed descriptions are keyed by a hash of the raw payload, so an unchanged model
+#   definition is never re-parsed, and are persisted as JSON so the cache survives
+#   across runs. The most recently seen definition (stored, or served from cache) is also
+#   recorded, allowing a client to use it while its own request for definitions is pending.
+
+import os
+import json
+import hashlib
+from typing import Dict, List, Union
+
+from Logs import get_logger
+
+log = get_logger("natnet.descriptions")
+
+DEFAULT_CACHE_DIR = ".natnet_cache"
+LATEST = "latest"
+
+
+class descriptionCache:
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR) -> None:
+        self.cache_dir = cache_dir
+        self._memory = {}
+        self._latest = None                            # key last written as latest, by this instance
+
+    # Hash of a raw MODELDEF payload
+    @staticmethod
+    def key(unparsed_bytestream: bytes) -> str:
+        return hashlib.sha1(bytes(unparsed_bytestream)).hexdigest()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, f"{name}.json")
+
+    # Returns cached descriptions for key (marking them as the latest seen), or None
+    def get(self, key: str) -> Union[Dict[str, List], None]:
+        descriptions = self._load(key)
+        if descriptions is not None:
+            self._mark_latest(key)
+
+        return descriptions
+
+    # Stores descriptions under key, and marks them as the latest seen
+    def put(self, key: str, descriptions: Dict[str, List]) -> None:
+        self._memory[key] = descriptions
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self._path(key), "w") as f:
+                json.dump(descriptions, f)
+        except OSError as e:
+            log.warning("descriptionCache.put() | Could not persist descriptions: %s", e)
+            return
+
+        self._mark_latest(key)
+
+    # Most recently stored (or fetched) descriptions, from this or a previous run
+    def latest(self) -> Union[Dict[str, List], None]:
+        path = self._path(LATEST)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, "r") as f:
+                key = json.load(f)["key"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+        return self._load(key)
+
+    def _load(self, key: str) -> Union[Dict[str, List], None]:
+        if key in self._memory:
+            return self._memory[key]
+
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, "r") as f:
+                self._memory[key] = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        return self._memory[key]
+
+    # Written only when the latest key changes, as a cache hit is the usual case
+    def _mark_latest(self, key: str) -> None:
+        if key == self._latest:
+            return
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self._path(LATEST), "w") as f:
+                json.dump({"key": key}, f)
+        except OSError as e:
+            log.warning("descriptionCache._mark_latest() | Could not persist latest key: %s", e)
+            return
+
+        self._latest = key
@@ -18,7 +18,7 @@ from construct import Int32ul, Float32l, Int32ul
 descStruct_Marker = Struct(
     'asset_type' /          Computed("Marker"),
     'asset_name' /          CString('utf8'),
-    'parent_name' /         Computed(lambda ctx: ctx._.asset_name)
+    'parent_name' /         Computed(this._.asset_name)
 )
 # ----------------------
 
@@ -27,8 +27,8 @@ descStruct_Marker = Struct(
 # ----------------------
 descStruct_MarkerSet = Struct(
     'asset_type' /      Computed("MarkerSet"),
-    'asset_name' /      CString('utf8'),
     'packet_size' /     Int32ul,
+    'asset_name' /      CString('utf8'),
     'child_count' /     Int32ul,
     'children' /        descStruct_Marker[this.child_count],
     'relative_offset' / Tell
@@ -39,22 +39,12 @@ descStruct_MarkerSet = Struct(
 # Structures for Rigid Body descriptions, belonging to skeletons or otherwise
 # --------------------------
 
-descStruct_RigidBodyMarker = Struct(
-    'asset_type' /      Computed("RigidBodyMarker"),
-    'asset_ID' /        Computed(lambda ctx: ctx._.asset_ID),
-    'parent_ID' /       Computed(lambda ctx: ctx._.parent_ID),
-    # 'parent_type' /     Computed(lambda ctx: ctx._.parent_type),
-    # 'parent_name' /     Computed(lambda ctx: ctx._.parent_name),
-    'pos_x' /           Computed(lambda ctx: ctx._.pos_x),
-    'pos_y' /           Computed(lambda ctx: ctx._.pos_y),
-    'pos_z' /           Computed(lambda ctx: ctx._.pos_z),
-    Probe(lookahead=12),
+# Rigid body markers are not packed per-marker; NatNet sends all offsets, then all
+# active labels, then all names. Per-marker records are assembled in rigidBodyDescription.
+descStruct_RigidBodyMarkerOffset = Struct(
     'offset_x' /        Float32l,
     'offset_y' /        Float32l,
     'offset_z' /        Float32l,
-    'active_label' /    Int32ul,
-    'asset_name' /      CString('utf8'),
-    #Probe()
 )
 
 descStruct_RigidBody = Struct(
@@ -71,7 +61,9 @@ descStruct_RigidBody = Struct(
     'pos_z' /           Float32l,
     'child_count' /     Int32ul,
     #Probe(),
-    'children' /        descStruct_RigidBodyMarker[this.child_count],
+    'marker_offsets' /  descStruct_RigidBodyMarkerOffset[this.child_count],
+    'marker_labels' /   Int32ul[this.child_count],
+    'marker_names' /    CString('utf8')[this.child_count],
     'relative_offset'/  Tell,
     #Probe()
 )
@@ -173,8 +165,8 @@ descStruct_ForcePlate_Calibration_Matrix = Struct(
 descStruct_Channel = Struct(
     'asset_type' /      Computed('Channel'),
     'asset_name' /      CString('utf8'),
-    'parent_ID' /       Computed(lambda ctx: ctx._.asset_ID),
-    'parent_type' /     Computed(lambda ctx: ctx._.asset_type)
+    'parent_ID' /       Computed(this._.asset_ID),
+    'parent_type' /     Computed(this._.asset_type)
 )
 
 descStruct_ForcePlate = Struct(
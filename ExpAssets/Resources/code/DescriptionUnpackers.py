@@ -3,6 +3,7 @@
 from construct import Struct
 from typing import List, Dict, Union, Tuple
 from DescriptionStructures import *
+from StructRegistry import structRegistry
 
 
 
@@ -20,7 +21,7 @@ class descriptionUnpacker:
     # Fetches child-appropriate description Struct(), conditioned on motive version
     def _get_structure(self) -> Struct:
         try:
-            return DESCRIPTION_STRUCTS[type(self)]
+            return DESCRIPTION_REGISTRY.get(type(self), self.natnet_version)
         except KeyError:
             raise ValueError(f"MoCapAsset._get_structure() | Unrecognized asset type.\n\tExpected: {DESCRIPTION_STRUCTS.keys()}\n\tSupplied: {type(self)}")
     
@@ -43,6 +44,26 @@ class descriptionUnpacker:
     def data(self) -> List[Dict]:
         raise NotImplementedError("AssetDescriptionStruct.dump() | Must be implemented by child class.")
     
+# Assembles per-marker records for a parsed rigid body description
+def rigid_body_markers(rigid_body) -> List[Dict]:
+    return [
+        {
+            'asset_type': "RigidBodyMarker",
+            'asset_ID': rigid_body.asset_ID,
+            'parent_ID': rigid_body.parent_ID,
+            'asset_name': rigid_body.asset_name,
+            'pos_x': rigid_body.pos_x,
+            'pos_y': rigid_body.pos_y,
+            'pos_z': rigid_body.pos_z,
+            'offset_x': offset.offset_x,
+            'offset_y': offset.offset_y,
+            'offset_z': offset.offset_z,
+            'active_label': label,
+            'marker_name': name,
+        }
+        for offset, label, name in zip(rigid_body.marker_offsets, rigid_body.marker_labels, rigid_body.marker_names)
+    ]
+
 #
 # DescriptionAsset Child classes
 #
@@ -64,8 +85,7 @@ class rigidBodyDescription(descriptionUnpacker):
         super().__init__(unparsed_bytestream, NatNetStreamVersion)
 
     def data(self) -> List[Dict]:
-        return [dict(list(rigidBodyMarker.items())[1:]) 
-                for rigidBodyMarker in self._description.children]
+        return rigid_body_markers(self._description)
     
 # Parses N-i Skeletons, each composed of N-j RigidBodies, each composed of N-k RigidBody(s)
 class skeletonDescription(descriptionUnpacker):
@@ -73,9 +93,9 @@ class skeletonDescription(descriptionUnpacker):
         super().__init__(unparsed_bytestream, NatNetStreamVersion)
 
     def data(self) -> List[Dict]:
-        return [dict(list(rigidBodyMarker.items())[1:]) 
+        return [rigidBodyMarker
                 for rigidBody in self._description.children
-                for rigidBodyMarker in rigidBody.children]
+                for rigidBodyMarker in rigid_body_markers(rigidBody)]
     
 
 class assetDescription(descriptionUnpacker):
@@ -84,9 +104,9 @@ class assetDescription(descriptionUnpacker):
 
     def data(self, asset_type: str) -> List[Dict]:
         if (asset_type == "RigidBodies"):
-            return [dict(list(rigidBodyMarker.items())[1:])
+            return [rigidBodyMarker
                     for rigidBody in self._description.rigid_body_children
-                    for rigidBodyMarker in rigidBody.children]
+                    for rigidBodyMarker in rigid_body_markers(rigidBody)]
         elif (asset_type == "Markers"):
             return [dict(list(marker.items())[1:])
                     for marker in self._description.marker_children]
@@ -139,6 +159,9 @@ DESCRIPTION_STRUCTS = {
     deviceDescription:     descStruct_Device,
     cameraDescription:     descStruct_Camera
 }
+
+# keyed by (unpacker, NatNet major.minor); compiled parsers built via DESCRIPTION_REGISTRY.build(version)
+DESCRIPTION_REGISTRY = structRegistry(DESCRIPTION_STRUCTS)
     
     # Aggregate frame data
 class Descriptions:
@@ -146,8 +169,8 @@ class Descriptions:
         
         # Aggregate Frame Data
         self._descriptions = {
-            'MarkerSets': None, 
-            'RigidBodies': None, 
+            'MarkerSets': [], 
+            'RigidBodies': [], 
             # 'Skeleton': None,
             # 'AssetRigidBody': None,
             # 'AssetMarker': None,
@@ -156,9 +179,9 @@ class Descriptions:
             # 'Camera': None
         }
     
-    # Log frame data for a given asset type
+    # Log description for a given asset type; one entry per described asset
     def log(self, asset_type: str, asset_description: List[Dict]) -> None:
-        self._descriptions[asset_type] = asset_description
+        self._descriptions.setdefault(asset_type, []).append(asset_description)
 
     # Export frame data for desired asset types; also allows for omission
     def __validate_export_arg(self, arg: Union[Tuple[str,...], str], name: str) -> Tuple[str, ...]:
@@ -170,7 +193,7 @@ class Descriptions:
             raise TypeError(f"Descriptions.export() | {name} must be str or tuple thereof")
 
     # Export descriptions for desired asset types; also allows for omission
-    def export(self, include: Union[Tuple[str, ...], str], exclude: Union[Tuple[str, ...], str] = None) -> Dict[str, List[Dict]]:
+    def export(self, include: Union[Tuple[str, ...], str] = None, exclude: Union[Tuple[str, ...], str] = None) -> Dict[str, List[Dict]]:
         # include = self.__validate_export_arg(include, "include")
 
         # if exclude is not None:
@@ -0,0 +1,158 @@
+# Low-pass filters for marker & rigid body trajectories
+#
+#   Both the streaming (per-frame) and batch (whole-table) filters are built from the
+#   same Butterworth second-order sections, so that they agree:
+#       - biquadCascade.step(), applied frame by frame, reproduces sosfilt() exactly
+#       - filtfilt() is sosfilt() run forwards then backwards (zero-phase); its
+#         magnitude response is the square of the streaming filter's
+#
+#   scipy is used for the batch recursion when available; otherwise the same
+#   recursion is run in numpy (vectorized across columns, sequential over frames).
+
+import numpy as np
+from typing import Optional
+
+try:
+    from scipy.signal import sosfilt as _scipy_sosfilt
+except ImportError:
+    _scipy_sosfilt = None
+
+
+# # # # # # # # # # # # # #
+# Filter design           #
+# # # # # # # # # # # # # #
+
+# Butterworth low-pass as second-order sections; rows are [b0, b1, b2, 1, a1, a2]
+def butter_sos(order: int, cutoff: float, frame_rate: float) -> np.ndarray:
+    if order < 2 or order % 2:
+        raise ValueError(f"Filters.butter_sos() | order must be a positive, even integer; got {order}")
+    if not 0 < cutoff < frame_rate / 2:
+        raise ValueError(f"Filters.butter_sos() | cutoff must fall within (0, {frame_rate / 2}); got {cutoff}")
+
+    K = 2.0 * frame_rate
+    Wc = K * np.tan(np.pi * cutoff / frame_rate)  # pre-warped analog cutoff
+
+    sos = np.zeros((order // 2, 6))
+    for k in range(order // 2):
+        # analog section: Wc^2 / (s^2 + 2*Wc*sin(theta)*s + Wc^2), discretized via bilinear transform
+        theta = np.pi * (2 * k + 1) / (2 * order)
+        a1, a0 = 2.0 * Wc * np.sin(theta), Wc ** 2
+        d0 = K ** 2 + a1 * K + a0
+
+        sos[k] = [a0 / d0, 2 * a0 / d0, a0 / d0, 1.0, (2 * a0 - 2 * K ** 2) / d0, (K ** 2 - a1 * K + a0) / d0]
+
+    return sos
+
+
+# Savitzky-Golay convolution coefficients (least-squares polynomial fit over a window)
+def savgol_coeffs(window: int, polyorder: int, deriv: int = 0, frame_rate: float = 1.0) -> np.ndarray:
+    if window % 2 == 0 or window <= polyorder:
+        raise ValueError(f"Filters.savgol_coeffs() | window must be odd & exceed polyorder; got {window}, {polyorder}")
+
+    half = window // 2
+    A = np.vander(np.arange(-half, half + 1), polyorder + 1, increasing=True)
+    coeffs = np.linalg.pinv(A)[deriv] * np.prod(np.arange(1, deriv + 1)) * frame_rate ** deriv
+
+    # reversed for use with np.convolve
+    return coeffs[::-1]
+
+
+# # # # # # # # # # # # # #
+# Streaming filter        #
+# # # # # # # # # # # # # #
+
+# Causal biquad cascade over a fixed number of channels (e.g., pos_x/y/z)
+#       NOTE: all state is allocated up front; step() performs no allocation beyond numpy temporaries
+class biquadCascade:
+    def __init__(self, sos: np.ndarray, n_channels: int = 3) -> None:
+        self.sos = np.asarray(sos, dtype=np.float64)
+        self._state = np.zeros((len(self.sos), 2, n_channels))
+        self._out = np.zeros(n_channels)
+        self._primed = False
+
+    # Sets state to the steady-state response to a constant input, avoiding start-up transients
+    def reset(self, x0: Optional[np.ndarray] = None) -> None:
+        self._primed = x0 is not None
+        if x0 is None:
+            self._state.fill(0.0)
+            return
+
+        for section, (b0, b1, b2, _, a1, a2) in enumerate(self.sos):
+            self._state[section, 1] = (b2 - a2) * x0
+            self._state[section, 0] = (b1 - a1) * x0 + self._state[section, 1]
+
+    # Filters one sample per channel (direct form II, transposed); returns a view of the output buffer
+    def step(self, x: np.ndarray) -> np.ndarray:
+        if not self._primed:
+            self.reset(np.asarray(x, dtype=np.float64))
+
+        y = self._out
+        y[:] = x
+        for section, (b0, b1, b2, _, a1, a2) in enumerate(self.sos):
+            z = self._state[section]
+            x_in = y.copy()
+            y[:] = b0 * x_in + z[0]
+            z[0] = b1 * x_in - a1 * y + z[1]
+            z[1] = b2 * x_in - a2 * y
+
+        return y
+
+
+# # # # # # # # # # # # # #
+# Batch filters           #
+# # # # # # # # # # # # # #
+
+# Causal filtering of whole columns; initial state matches biquadCascade's priming
+def sosfilt(sos: np.ndarray, x: np.ndarray, axis: int = 0) -> np.ndarray:
+    x = np.moveaxis(np.asarray(x, dtype=np.float64), axis, 0)
+    if len(x) == 0:
+        return np.moveaxis(x.copy(), 0, axis)
+
+    cascade = biquadCascade(sos, n_channels=int(np.prod(x.shape[1:])))
+    flat = x.reshape(len(x), -1)
+
+    if _scipy_sosfilt is not None:
+        cascade.reset(flat[0])
+        # scipy's zi layout, with axis 0 filtered, is (n_sections, 2, n_channels): as the cascade's state
+        y, _ = _scipy_sosfilt(cascade.sos, flat, axis=0, zi=cascade._state)
+    else:
+        y = np.empty_like(flat)
+        for i, sample in enumerate(flat):
+            y[i] = cascade.step(sample)
+
+    return np.moveaxis(y.reshape(x.shape), 0, axis)
+
+
+# Zero-phase filtering: forwards then backwards, with odd-extension padding to tame edge effects
+def filtfilt(sos: np.ndarray, x: np.ndarray, axis: int = 0, padlen: int = None) -> np.ndarray:
+    x = np.moveaxis(np.asarray(x, dtype=np.float64), axis, 0)
+    if padlen is None:
+        padlen = 3 * (2 * len(sos) + 1)
+    padlen = min(padlen, len(x) - 1)
+
+    if padlen > 0:
+        head = 2 * x[0] - x[padlen:0:-1]
+        tail = 2 * x[-1] - x[-2:-padlen - 2:-1]
+        x = np.concatenate((head, x, tail))
+
+    y = sosfilt(sos, x)
+    y = sosfilt(sos, y[::-1])[::-1]
+
+    if padlen > 0:
+        y = y[padlen:-padlen]
+
+    return np.moveaxis(y, 0, axis)
+
+
+# Savitzky-Golay smoothing (or differentiation) along an axis; edges use nearest-value padding
+def savgol(x: np.ndarray, window: int, polyorder: int, deriv: int = 0,
+           frame_rate: float = 1.0, axis: int = 0) -> np.ndarray:
+    x = np.moveaxis(np.asarray(x, dtype=np.float64), axis, 0)
+    coeffs = savgol_coeffs(window, polyorder, deriv, frame_rate)
+    half = window // 2
+
+    padded = np.concatenate((np.repeat(x[:1], half, axis=0), x, np.repeat(x[-1:], half, axis=0)))
+    flat = padded.reshape(len(padded), -1)
+
+    y = np.column_stack([np.convolve(flat[:, c], coeffs, mode="valid") for c in range(flat.shape[1])])
+    return np.moveaxis(y.reshape(x.shape), 0, axis)
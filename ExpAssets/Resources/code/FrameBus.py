@@ -0,0 +1,240 @@
+# Shared-memory frame bus: one publisher (the experiment), any number of local subscriber processes
+#
+#   Frames are published as wide float32 rows (see FrameLayout.py) into a ring held in a
+#   multiprocessing.shared_memory block:
+#
+#       header      magic, capacity, max columns, columns in use, layout generation, sequence
+#       layout      JSON list of column names for the current layout generation
+#       stamps      per slot, sequence number of the frame it holds (0 while being written)
+#       frames      per slot, mocap frame number of the frame it holds (int64, kept out of the float32 row)
+#       rows        capacity x max columns, float32
+#
+#   Publishing is a single row copy plus two stamp writes, regardless of how many processes
+#   are subscribed; subscribers never signal back. Subscribers read rows as numpy views onto
+#   the shared block (zero copies), and confirm with valid(seq) that a row wasn't overwritten
+#   while in use, i.e., that the publisher hasn't lapped them (a ring's worth of frames).
+
+import json
+import numpy as np
+from multiprocessing import shared_memory
+from typing import List, Tuple, Union
+
+DEFAULT_NAME = "gbyk_framebus"
+
+# Ring depth (frames); ~4s @ 120Hz
+DEFAULT_CAPACITY = 512
+
+# Widest supported layout, and room reserved for its column names
+MAX_COLUMNS = 1024
+LAYOUT_BYTES = 64 * 1024
+
+MAGIC = 0x4742594B   # "GBYK"
+
+# header fields (int64)
+_MAGIC, _CAPACITY, _MAX_COLUMNS, _COLUMNS, _GENERATION, _SEQUENCE, _LAYOUT_LENGTH = range(7)
+HEADER_FIELDS = 8
+
+
+def _offsets(capacity: int, max_columns: int) -> Tuple[int, int, int, int, int]:
+    header = HEADER_FIELDS * 8
+    layout = header
+    stamps = layout + LAYOUT_BYTES
+    frames = stamps + capacity * 8
+    rows = frames + capacity * 8
+    size = rows + capacity * max_columns * 4
+    return layout, stamps, frames, rows, size
+
+
+class _busView:
+    def __init__(self, shm: shared_memory.SharedMemory, capacity: int, max_columns: int) -> None:
+        self.shm = shm
+        self.capacity = capacity
+        self.max_columns = max_columns
+
+        layout, stamps, frames, rows, _ = _offsets(capacity, max_columns)
+        self.header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf, offset=0)
+        self.layout = np.ndarray((LAYOUT_BYTES,), dtype=np.uint8, buffer=shm.buf, offset=layout)
+        self.stamps = np.ndarray((capacity,), dtype=np.int64, buffer=shm.buf, offset=stamps)
+        self.frames = np.ndarray((capacity,), dtype=np.int64, buffer=shm.buf, offset=frames)
+        self.rows = np.ndarray((capacity, max_columns), dtype=np.float32, buffer=shm.buf, offset=rows)
+
+    # numpy views must be released before the block can be closed
+    def release(self) -> None:
+        self.header = self.layout = self.stamps = self.frames = self.rows = None
+
+
+# # # # # # # # # # # # # #
+# Publisher               #
+# # # # # # # # # # # # # #
+
+class frameBusPublisher:
+    def __init__(self, name: str = DEFAULT_NAME, capacity: int = DEFAULT_CAPACITY,
+                 max_columns: int = MAX_COLUMNS) -> None:
+        size = _offsets(capacity, max_columns)[-1]
+
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # left behind by a publisher that didn't exit cleanly
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        self.name = name
+        self._view = _busView(shm, capacity, max_columns)
+        self._seq = 0
+        self._ncols = 0
+
+        header = self._view.header
+        header[:] = 0
+        header[_CAPACITY] = capacity
+        header[_MAX_COLUMNS] = max_columns
+        self._view.stamps[:] = 0
+        header[_MAGIC] = MAGIC      # last, marks block as initialised
+
+    # Publishes column names; subscribers pick these up when the generation changes
+    def set_layout(self, columns: List[str]) -> None:
+        if len(columns) > self._view.max_columns:
+            raise ValueError(f"frameBusPublisher.set_layout() | Layout has {len(columns)} columns; bus supports {self._view.max_columns}")
+
+        encoded = json.dumps(list(columns)).encode("utf8")
+        if len(encoded) > LAYOUT_BYTES:
+            raise ValueError(f"frameBusPublisher.set_layout() | Column names exceed {LAYOUT_BYTES} bytes")
+
+        header = self._view.header
+        header[_GENERATION] = -abs(header[_GENERATION]) - 1     # negative while being changed
+        self._view.layout[:len(encoded)] = np.frombuffer(encoded, dtype=np.uint8)
+        header[_LAYOUT_LENGTH] = len(encoded)
+        header[_COLUMNS] = len(columns)
+        self._ncols = len(columns)
+        header[_GENERATION] = -header[_GENERATION]
+
+    # Publishes one wide row (float32, current layout) & its frame number; returns its sequence number
+    def publish(self, row: np.ndarray, frame_number: int = -1) -> int:
+        seq = self._seq + 1
+        slot = seq % self._view.capacity
+
+        self._view.stamps[slot] = 0
+        self._view.rows[slot, :self._ncols] = row[:self._ncols]
+        self._view.frames[slot] = frame_number
+        self._view.stamps[slot] = seq
+        self._view.header[_SEQUENCE] = seq
+
+        self._seq = seq
+        return seq
+
+    def close(self) -> None:
+        shm = self._view.shm
+        self._view.header[_MAGIC] = 0
+        self._view.release()
+        shm.close()
+        shm.unlink()
+
+
+# # # # # # # # # # # # # #
+# Subscriber              #
+# # # # # # # # # # # # # #
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        # 3.13+: don't let this process's resource tracker unlink the publisher's block on exit
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+class frameBusSubscriber:
+    def __init__(self, name: str = DEFAULT_NAME) -> None:
+        shm = _attach(name)
+
+        header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf, offset=0)
+        if header[_MAGIC] != MAGIC:
+            del header
+            shm.close()
+            raise ValueError(f"frameBusSubscriber.__init__() | No frame bus published as '{name}'")
+
+        capacity, max_columns = int(header[_CAPACITY]), int(header[_MAX_COLUMNS])
+        del header
+
+        self.name = name
+        self._view = _busView(shm, capacity, max_columns)
+        self.columns = []
+        self._generation = 0
+
+        # start from the present; history still in the ring is available via frames_since(0)
+        self.last_seq = self.sequence()
+
+    def sequence(self) -> int:
+        return int(self._view.header[_SEQUENCE])
+
+    # Re-reads column names if the layout has changed; returns True if it had
+    def refresh_layout(self) -> bool:
+        header = self._view.header
+        generation = int(header[_GENERATION])
+        if generation == self._generation or generation <= 0:
+            return False
+
+        length = int(header[_LAYOUT_LENGTH])
+        columns = json.loads(bytes(self._view.layout[:length]).decode("utf8"))
+        if int(header[_GENERATION]) != generation:
+            return False
+
+        self.columns = columns
+        self._generation = generation
+        return True
+
+    # True while the row for seq is still held in the ring (i.e., a view of it remains valid)
+    def valid(self, seq: int) -> bool:
+        return int(self._view.stamps[seq % self._view.capacity]) == seq
+
+    # View of the row for seq, or None if it has already been overwritten
+    def row(self, seq: int) -> Union[np.ndarray, None]:
+        if not self.valid(seq):
+            return None
+        return self._view.rows[seq % self._view.capacity, :len(self.columns)]
+
+    # Mocap frame number of the frame for seq, or None if it has already been overwritten
+    def frame_number(self, seq: int) -> Union[int, None]:
+        frame_number = int(self._view.frames[seq % self._view.capacity])
+        return frame_number if self.valid(seq) else None
+
+    # Most recent (seq, row view); None until a frame has been published
+    def latest(self) -> Union[Tuple[int, np.ndarray], None]:
+        self.refresh_layout()
+        seq = self.sequence()
+        row = self.row(seq) if seq else None
+        return None if row is None else (seq, row)
+
+    # (seq, row view) of every frame published since seq (default: since last call)
+    #       NOTE: frames the publisher has already lapped are skipped
+    def frames_since(self, seq: int = None) -> List[Tuple[int, np.ndarray]]:
+        self.refresh_layout()
+
+        start = self.last_seq if seq is None else seq
+        end = self.sequence()
+        start = max(start, end - self._view.capacity)
+        self.last_seq = end
+
+        frames = []
+        for s in range(start + 1, end + 1):
+            row = self.row(s)
+            if row is not None:
+                frames.append((s, row))
+
+        return frames
+
+    # Column index of a name in the current layout
+    def column(self, name: str) -> int:
+        return self.columns.index(name)
+
+    def close(self) -> None:
+        shm = self._view.shm
+        self._view.release()
+        shm.close()
@@ -0,0 +1,42 @@
+# Field order of frame data rows, per section, as emitted by the DataUnpackers classes' rows()
+#
+#   NatNetClient delivers each frame as {section: [rows]}, every row a tuple in its section's
+#   order below, rather than a dict per child. Kept apart from DataUnpackers.py (& so from
+#   construct) so consumers, e.g. OptiTracker, can index rows without importing the parsers.
+
+from typing import Dict, Tuple
+
+PREFIX_ROW = ('frame_number',)
+MARKER_ROW = ('parent_name', 'pos_x', 'pos_y', 'pos_z')
+LABELED_MARKER_ROW = ('asset_ID', 'parent_ID', 'pos_x', 'pos_y', 'pos_z', 'size', 'param', 'residual')
+LEGACY_MARKER_ROW = ('pos_x', 'pos_y', 'pos_z')
+RIGID_BODY_ROW = ('asset_ID', 'pos_x', 'pos_y', 'pos_z', 'rot_w', 'rot_x', 'rot_y', 'rot_z', 'error', 'tracking_validity')
+ASSET_MARKER_ROW = ('asset_ID', 'pos_x', 'pos_y', 'pos_z', 'marker_size', 'param', 'residual')
+CHANNEL_ROW = ('parent_ID', 'parent_type', 'channel', 'value')
+
+# all registered suffix structures' fields; precision timestamps arrived with NatNet 4.1 (None before)
+SUFFIX_ROW = ('timecode', 'timecode_sub', 'timestamp', 'stamp_camera_mid_exposure', 'stamp_data_received',
+              'stamp_transmit', 'prec_timestamp_secs', 'prec_timestamp_frac_secs', 'param', 'is_recording',
+              'tracked_models_changed')
+
+# Rows of each section NatNetClient logs to frameData (analog channels are logged as arrays, see channelData)
+FRAME_FIELDS: Dict[str, Tuple[str, ...]] = {
+    'Prefix':           PREFIX_ROW,
+    'MarkerSets':       MARKER_ROW,
+    'LabeledMarkerSet': LABELED_MARKER_ROW,
+    'LegacyMarkerSet':  LEGACY_MARKER_ROW,
+    'RigidBodies':      RIGID_BODY_ROW,
+    'Skeletons':        RIGID_BODY_ROW,
+    'AssetMarkers':     ASSET_MARKER_ROW,
+    'Suffix':           SUFFIX_ROW,
+}
+
+# Positions of fields read per frame by consumers
+FRAME_NUMBER = PREFIX_ROW.index('frame_number')
+ASSET_ID = RIGID_BODY_ROW.index('asset_ID')
+POSITION = slice(RIGID_BODY_ROW.index('pos_x'), RIGID_BODY_ROW.index('pos_z') + 1)
+TRACKING_VALIDITY = RIGID_BODY_ROW.index('tracking_validity')
+MARKER_SET_NAME = MARKER_ROW.index('parent_name')
+MARKER_POSITION = slice(MARKER_ROW.index('pos_x'), MARKER_ROW.index('pos_z') + 1)
+STAMP_EXPOSURE = SUFFIX_ROW.index('stamp_camera_mid_exposure')
+STAMP_TRANSMIT = SUFFIX_ROW.index('stamp_transmit')
@@ -0,0 +1,187 @@
+# Wide, fixed-layout storage of frame data, keyed by model definitions
+#
+#   Rather than one row per asset per frame (type & ID repeated on each), every mocap
+#   frame occupies a single row of a preallocated float32 matrix. Column slots are
+#   assigned from the current model descriptions:
+#       rigid bodies:   asset_ID -> RIGID_BODY_FIELDS
+#       marker sets:    (set name, marker index) -> MARKER_FIELDS
+#   Assets absent from a frame (e.g., untracked) are left as NaN.
+#
+#   A trajectory is then a contiguous column slice of the matrix. Frame numbers are held
+#   alongside, as int64: float32 represents integers exactly only up to 2^24 (~39h @ 120Hz).
+
+import numpy as np
+import datatable as dt
+from typing import Dict, List, Tuple, Any, Union
+
+from FrameFields import (
+    RIGID_BODY_ROW, MARKER_ROW, ASSET_ID, FRAME_NUMBER, MARKER_SET_NAME, MARKER_POSITION
+)
+
+# Stored fields: those of frame data rows, following asset_ID (rigid bodies) / parent_name (markers)
+RIGID_BODY_FIELDS = RIGID_BODY_ROW[ASSET_ID + 1:]
+MARKER_FIELDS = MARKER_ROW[MARKER_POSITION]
+
+# Rows preallocated per buffer; ~1 minute at 120Hz, grown by doubling when exceeded
+DEFAULT_CAPACITY = 120 * 60
+
+
+# # # # # # # # # # # # # #
+# Column layout           #
+# # # # # # # # # # # # # #
+
+class frameLayout:
+    def __init__(self, rigid_body_IDs: List[int], marker_sets: Dict[str, List[str]]) -> None:
+        self.columns = []
+        self.rigid_body_slots = {}
+        self.marker_set_slots = {}
+
+        for asset_ID in rigid_body_IDs:
+            self.rigid_body_slots[asset_ID] = len(self.columns)
+            self.columns += [f"rb{asset_ID}_{field}" for field in RIGID_BODY_FIELDS]
+
+        for set_name, marker_names in marker_sets.items():
+            self.marker_set_slots[set_name] = (len(self.columns), len(marker_names))
+            self.columns += [f"{set_name}:{marker}_{field}" for marker in marker_names for field in MARKER_FIELDS]
+
+        # identifies layout, so buffers can tell whether model definitions have changed
+        self.signature = (tuple(rigid_body_IDs), tuple((k, tuple(v)) for k, v in marker_sets.items()))
+
+    # Builds layout from the output of Descriptions.export()
+    @classmethod
+    def from_descriptions(cls, descriptions: Dict[str, List[List[Dict]]]) -> "frameLayout":
+        rigid_body_IDs = []
+        for rigid_body in descriptions.get('RigidBodies') or []:
+            for marker in rigid_body:
+                if marker['asset_ID'] not in rigid_body_IDs:
+                    rigid_body_IDs.append(marker['asset_ID'])
+
+        marker_sets = {}
+        for marker_set in descriptions.get('MarkerSets') or []:
+            for marker in marker_set:
+                marker_sets.setdefault(marker['parent_name'], []).append(marker['asset_name'])
+
+        return cls(rigid_body_IDs, marker_sets)
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, frameLayout) and self.signature == other.signature
+
+    # Column span of a rigid body (all fields, or a single field)
+    def rigid_body(self, asset_ID: int, field: str = None) -> slice:
+        start = self.rigid_body_slots[asset_ID]
+        if field is None:
+            return slice(start, start + len(RIGID_BODY_FIELDS))
+
+        start += RIGID_BODY_FIELDS.index(field)
+        return slice(start, start + 1)
+
+    # Column span of a marker's position within its marker set
+    def marker(self, set_name: str, index: int) -> slice:
+        start, count = self.marker_set_slots[set_name]
+        if not 0 <= index < count:
+            raise ValueError(f"frameLayout.marker() | {set_name} has {count} markers; index supplied: {index}")
+
+        start += index * len(MARKER_FIELDS)
+        return slice(start, start + len(MARKER_FIELDS))
+
+
+# # # # # # # # # # # # # #
+# Wide frame buffer       #
+# # # # # # # # # # # # # #
+
+class wideFrameBuffer:
+    def __init__(self, layout: frameLayout, capacity: int = DEFAULT_CAPACITY) -> None:
+        self.layout = layout
+        self.nrows = 0
+
+        self._data = np.full((capacity, len(layout)), np.nan, dtype=np.float32)
+        self._frame_numbers = np.full(capacity, -1, dtype=np.int64)
+        self._row = np.full(len(layout), np.nan, dtype=np.float32)
+
+    # Writes one frame, as delivered by NatNetClient's frame_data_listener
+    def write(self, frame_data: Dict[str, List[List[Tuple]]]) -> None:
+        row = self._row
+        row.fill(np.nan)
+
+        prefix = frame_data.get('Prefix')
+        frame_number = prefix[0][0][FRAME_NUMBER] if prefix and prefix[0] else -1
+
+        slots = self.layout.rigid_body_slots
+        for bundle in frame_data.get('RigidBodies', []):
+            for rigid_body in bundle:
+                start = slots.get(rigid_body[ASSET_ID])
+                if start is not None:
+                    row[start:start + len(RIGID_BODY_FIELDS)] = rigid_body[ASSET_ID + 1:]
+
+        marker_slots = self.layout.marker_set_slots
+        for bundle in frame_data.get('MarkerSets', []):
+            counts = {}
+            for marker in bundle:
+                set_name = marker[MARKER_SET_NAME]
+                if set_name not in marker_slots:
+                    continue
+
+                index = counts.get(set_name, 0)
+                counts[set_name] = index + 1
+
+                start, n_markers = marker_slots[set_name]
+                if index < n_markers:
+                    start += index * len(MARKER_FIELDS)
+                    row[start:start + len(MARKER_FIELDS)] = marker[MARKER_POSITION]
+
+        self.write_row(row, frame_number)
+
+    # Single vector write of an already-assembled row (frame number -1 if unknown)
+    def write_row(self, row: np.ndarray, frame_number: int = -1) -> None:
+        if self.nrows == len(self._data):
+            self._grow()
+
+        self._data[self.nrows] = row
+        self._frame_numbers[self.nrows] = frame_number
+        self.nrows += 1
+
+    def _grow(self) -> None:
+        grown = np.full((len(self._data) * 2, len(self.layout)), np.nan, dtype=np.float32)
+        grown[:self.nrows] = self._data[:self.nrows]
+        self._data = grown
+
+        frame_numbers = np.full(len(grown), -1, dtype=np.int64)
+        frame_numbers[:self.nrows] = self._frame_numbers[:self.nrows]
+        self._frame_numbers = frame_numbers
+
+    # Filled portion of buffer (view, no copy)
+    def data(self) -> np.ndarray:
+        return self._data[:self.nrows]
+
+    # Contiguous (N, n_fields) trajectory views
+    def rigid_body(self, asset_ID: int, field: str = None) -> np.ndarray:
+        return self._data[:self.nrows, self.layout.rigid_body(asset_ID, field)]
+
+    def marker(self, set_name: str, index: int) -> np.ndarray:
+        return self._data[:self.nrows, self.layout.marker(set_name, index)]
+
+    # Most recently written row (view), or None if empty
+    def last_row(self) -> Union[np.ndarray, None]:
+        return self._data[self.nrows - 1] if self.nrows else None
+
+    def last_frame_number(self) -> int:
+        return int(self._frame_numbers[self.nrows - 1]) if self.nrows else -1
+
+    def frame_numbers(self) -> np.ndarray:
+        return self._frame_numbers[:self.nrows]
+
+    # frame_number (int64), then the layout's columns (float32)
+    #       NOTE: copied, as dt.Frame wraps the array it's given & this buffer is cleared for reuse
+    def to_frame(self) -> dt.Frame:
+        frame = dt.Frame(frame_number=self.frame_numbers().copy())
+        frame.cbind(dt.Frame(self.data().copy(), names=self.layout.columns))
+        return frame
+
+    # Empties buffer, keeping its allocation
+    def clear(self) -> None:
+        self._data[:self.nrows] = np.nan
+        self._frame_numbers[:self.nrows] = -1
+        self.nrows = 0
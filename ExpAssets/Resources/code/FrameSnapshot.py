@@ -0,0 +1,134 @@
+# Latest-frame snapshot, shared between the NatNet data thread (writer) & experiment loop (reader)
+#
+#   Per rigid body state (frame number, receipt time, position, velocity) is written into one
+#   of two preallocated slots, following a seqlock:
+#       writer: seq -> odd; fill the unpublished slot; seq -> even (publishes that slot)
+#       reader: note seq; read the published slot; re-check seq
+#   As the writer only ever fills the slot not currently published, a read remains valid
+#   unless the writer has begun a *second* write since (i.e., lapped the reader), in which
+#   case the read is simply retried. Readers therefore never block or lock the writer, and
+#   reading is O(1) regardless of how many frames have been received.
+#
+#   There is a single writer (the data thread); any number of readers.
+
+import time
+import numpy as np
+from typing import Dict, NamedTuple, Tuple, Union
+
+# Rigid bodies tracked per snapshot, before slots are reallocated
+MAX_RIGID_BODIES = 16
+
+# Column order of a slot row
+SNAPSHOT_FIELDS = ('frame_number', 'timestamp', 'pos_x', 'pos_y', 'pos_z', 'vel_x', 'vel_y', 'vel_z', 'speed')
+
+# Retries before a reader gives up (only exhausted if the writer laps it repeatedly)
+MAX_READ_ATTEMPTS = 8
+
+
+class rigidBodyState(NamedTuple):
+    frame_number: int
+    timestamp: float                        # host time (time.perf_counter) of receipt
+    pos: Tuple[float, float, float]
+    vel: Tuple[float, float, float]         # per second
+    speed: float
+
+
+class snapshotBuffer:
+    def __init__(self, frame_rate: float, capacity: int = MAX_RIGID_BODIES) -> None:
+        self.frame_rate = frame_rate
+
+        self._slots = self._allocate(capacity)
+        self._rows = {}     # asset_ID -> slot row
+        self._seq = 0       # even: stable, odd: write in progress
+
+        # writer-side state, never read by readers
+        self._previous = {}
+
+    @staticmethod
+    def _allocate(capacity: int) -> Tuple[np.ndarray, np.ndarray]:
+        return (np.full((capacity, len(SNAPSHOT_FIELDS)), np.nan),
+                np.full((capacity, len(SNAPSHOT_FIELDS)), np.nan))
+
+    # Number of frames published; changes iff a new frame is available
+    def sequence(self) -> int:
+        return self._seq // 2
+
+    # # # #
+    # Writer (data thread)
+    # # # #
+
+    # Publishes the positions of one frame; positions maps asset_ID -> (x, y, z)
+    def publish(self, frame_number: int, positions: Dict[int, np.ndarray], timestamp: float = None) -> None:
+        if timestamp is None:
+            timestamp = time.perf_counter()
+
+        for asset_ID in positions:
+            if asset_ID not in self._rows:
+                self._add_row(asset_ID)
+
+        self._seq += 1                                  # odd: write in progress
+        slot = self._slots[(self._seq // 2 + 1) & 1]    # the unpublished slot
+
+        # carry over bodies absent from this frame, so readers see their last known state
+        slot[:] = self._slots[(self._seq // 2) & 1]
+
+        for asset_ID, pos in positions.items():
+            row = slot[self._rows[asset_ID]]
+            row[0] = frame_number
+            row[1] = timestamp
+            row[2:5] = pos
+
+            previous = self._previous.get(asset_ID)
+            if previous is not None and frame_number > previous[0]:
+                row[5:8] = (row[2:5] - previous[1]) * (self.frame_rate / (frame_number - previous[0]))
+                row[8] = np.sqrt(row[5] ** 2 + row[6] ** 2 + row[7] ** 2)
+            else:
+                row[5:9] = np.nan
+
+            self._previous[asset_ID] = (frame_number, row[2:5].copy())
+
+        self._seq += 1                                  # even: slot published
+
+    def _add_row(self, asset_ID: int) -> None:
+        capacity = len(self._slots[0])
+        if len(self._rows) == capacity:
+            # readers hold references to the old slots, which remain valid; swapped in as one assignment
+            grown = self._allocate(capacity * 2)
+            grown[0][:capacity] = self._slots[0]
+            grown[1][:capacity] = self._slots[1]
+            self._slots = grown
+
+        self._rows[asset_ID] = len(self._rows)
+
+    # Forgets velocity history (e.g., between trials); published state is retained
+    def reset(self) -> None:
+        self._previous = {}
+
+    # # # #
+    # Readers (any thread)
+    # # # #
+
+    # Latest state of a rigid body; None if never seen, or if a consistent read couldn't be made
+    def read(self, asset_ID: int) -> Union[rigidBodyState, None]:
+        row_index = self._rows.get(asset_ID)
+        if row_index is None:
+            return None
+
+        for _ in range(MAX_READ_ATTEMPTS):
+            seq = self._seq
+            slots = self._slots
+            if row_index >= len(slots[0]):
+                continue
+
+            row = slots[(seq // 2) & 1][row_index]
+            state = (row[0], row[1], row[2], row[3], row[4], row[5], row[6], row[7], row[8])
+
+            # the published slot is only overwritten by the write after next
+            if self._seq < (seq & ~1) + 3:
+                if np.isnan(state[0]):
+                    return None
+
+                return rigidBodyState(int(state[0]), float(state[1]), tuple(map(float, state[2:5])),
+                                      tuple(map(float, state[5:8])), float(state[8]))
+
+        return None
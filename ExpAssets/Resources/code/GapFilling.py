@@ -0,0 +1,193 @@
+# Gap detection & interpolation for occluded markers and rigid bodies
+#
+#   Samples are flagged invalid when tracking_validity/param say so, when residual
+#   is too large, or when the position has collapsed to the origin (how Motive reports
+#   untracked assets). Runs of invalid samples (gaps) no longer than max_gap frames
+#   are then filled, all gaps at once:
+#       cubic:  Lagrange cubic through the two valid samples either side of the gap
+#               (falls back to linear when only one valid sample bounds each side)
+#       rigid:  marker reconstructed from its parent rigid body's pose and the
+#               marker's mean offset within the rigid body's local frame
+#   Gaps touching either end of a trajectory cannot be interpolated and are left as-is.
+
+import numpy as np
+from typing import Dict, Tuple
+
+from Transforms import quat_rotate
+
+# Gaps longer than this (in frames) are left unfilled; 12 frames = 100ms @ 120Hz
+MAX_GAP = 12
+
+# Labeled markers with a residual above this (m) are considered unreliable
+MAX_RESIDUAL = 0.005
+
+# dataStruct_LabeledMarker.param bit denoting an occluded marker
+OCCLUDED = 0x01
+
+
+# # # # # # # # # # # # # #
+# Gap detection           #
+# # # # # # # # # # # # # #
+
+# Flags unusable samples; any of tracking_validity/residual/param may be omitted
+def invalid_samples(pos: np.ndarray, tracking_validity: np.ndarray = None, residual: np.ndarray = None,
+                    param: np.ndarray = None, max_residual: float = MAX_RESIDUAL) -> np.ndarray:
+    invalid = ~np.isfinite(pos).all(axis=1) | (pos == 0).all(axis=1)
+
+    if tracking_validity is not None:
+        invalid |= (np.asarray(tracking_validity).astype(np.int64) & 0x01) == 0
+    if residual is not None:
+        invalid |= np.asarray(residual) > max_residual
+    if param is not None:
+        invalid |= (np.asarray(param).astype(np.int64) & OCCLUDED) != 0
+
+    return invalid
+
+
+# Start indices & lengths of each run of invalid samples
+def find_gaps(invalid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    edges = np.diff(np.concatenate(([0], invalid.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1)
+    return starts, stops - starts
+
+
+# Re-expands a trajectory with missing rows onto a contiguous frame range, missing frames as NaN
+def align_to_frames(frame_numbers: np.ndarray, pos: np.ndarray,
+                    first: int = None, last: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    frame_numbers = np.asarray(frame_numbers, dtype=np.int64)
+    first = frame_numbers.min() if first is None else first
+    last = frame_numbers.max() if last is None else last
+
+    frames = np.arange(first, last + 1)
+    aligned = np.full((len(frames), pos.shape[1]), np.nan)
+
+    keep = (frame_numbers >= first) & (frame_numbers <= last)
+    aligned[frame_numbers[keep] - first] = pos[keep]
+
+    return frames, aligned
+
+
+# # # # # # # # # # # # # #
+# Gap filling             #
+# # # # # # # # # # # # # #
+
+# Flattened sample indices spanned by each gap, plus the gap each sample belongs to
+def _gap_samples(starts: np.ndarray, lengths: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    owner = np.repeat(np.arange(len(starts)), lengths)
+    within = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return starts[owner] + within, owner
+
+
+# Interpolates all fillable gaps at once; returns filled copy & mask of samples filled
+def fill_gaps_cubic(pos: np.ndarray, invalid: np.ndarray,
+                    max_gap: int = MAX_GAP) -> Tuple[np.ndarray, np.ndarray]:
+    n = len(pos)
+    filled = np.array(pos, dtype=np.float64)
+    was_filled = np.zeros(n, dtype=bool)
+
+    starts, lengths = find_gaps(invalid)
+    stops = starts + lengths
+    bounded = (lengths <= max_gap) & (starts >= 1) & (stops < n)
+    starts, stops, lengths = starts[bounded], stops[bounded], lengths[bounded]
+
+    if not len(starts):
+        return filled, was_filled
+
+    # cubic wherever a second valid sample exists either side of the gap
+    cubic = (starts >= 2) & (stops + 1 < n)
+    cubic[cubic] &= ~invalid[starts[cubic] - 2] & ~invalid[stops[cubic] + 1]
+
+    idx, owner = _gap_samples(starts, lengths)
+    t = (idx - starts[owner]).astype(np.float64)
+    L = lengths[owner].astype(np.float64)
+    is_cubic = cubic[owner]
+
+    # nodes, relative to gap start: -2, -1, L, L+1 (outer two only used when cubic)
+    x0, x1, x2, x3 = -2.0, -1.0, L, L + 1.0
+    s = starts[owner]
+    e = stops[owner]
+
+    p1, p2 = filled[s - 1], filled[e]
+    p0 = filled[np.where(is_cubic, s - 2, s - 1)]
+    p3 = filled[np.where(is_cubic, e + 1, e)]
+
+    w0 = ((t - x1) * (t - x2) * (t - x3)) / ((x0 - x1) * (x0 - x2) * (x0 - x3))
+    w1 = ((t - x0) * (t - x2) * (t - x3)) / ((x1 - x0) * (x1 - x2) * (x1 - x3))
+    w2 = ((t - x0) * (t - x1) * (t - x3)) / ((x2 - x0) * (x2 - x1) * (x2 - x3))
+    w3 = ((t - x0) * (t - x1) * (t - x2)) / ((x3 - x0) * (x3 - x1) * (x3 - x2))
+    cubic_fill = w0[:, None] * p0 + w1[:, None] * p1 + w2[:, None] * p2 + w3[:, None] * p3
+
+    frac = ((t + 1) / (L + 1))[:, None]
+    linear_fill = p1 + frac * (p2 - p1)
+
+    filled[idx] = np.where(is_cubic[:, None], cubic_fill, linear_fill)
+    was_filled[idx] = True
+
+    return filled, was_filled
+
+
+# Reconstructs marker samples from parent rigid body pose; gaps longer than max_gap are left unfilled
+def fill_gaps_rigid(marker_pos: np.ndarray, invalid: np.ndarray, body_pos: np.ndarray,
+                    body_rot: np.ndarray, body_invalid: np.ndarray,
+                    max_gap: int = MAX_GAP) -> Tuple[np.ndarray, np.ndarray]:
+    filled = np.array(marker_pos, dtype=np.float64)
+    was_filled = np.zeros(len(filled), dtype=bool)
+
+    reference = ~invalid & ~body_invalid
+    if not reference.any():
+        return filled, was_filled
+
+    # marker's location in the rigid body's local frame, averaged over co-tracked samples
+    local = quat_rotate(body_rot[reference], marker_pos[reference] - body_pos[reference], inverse=True)
+    offset = local.mean(axis=0)
+
+    starts, lengths = find_gaps(invalid)
+    keep = lengths <= max_gap
+    idx, _ = _gap_samples(starts[keep], lengths[keep])
+    idx = idx[~body_invalid[idx]]
+
+    filled[idx] = body_pos[idx] + quat_rotate(body_rot[idx], np.broadcast_to(offset, (len(idx), 3)))
+    was_filled[idx] = True
+
+    return filled, was_filled
+
+
+# # # # # # # # # # # # # #
+# Per-trial reporting     #
+# # # # # # # # # # # # # #
+
+def gap_statistics(invalid: np.ndarray, was_filled: np.ndarray) -> Dict[str, float]:
+    starts, lengths = find_gaps(invalid)
+    n = len(invalid)
+
+    return {
+        "n_samples": n,
+        "n_invalid": int(invalid.sum()),
+        "n_gaps": len(starts),
+        "longest_gap": int(lengths.max()) if len(lengths) else 0,
+        "n_filled": int(was_filled.sum()),
+        "n_unfilled": int((invalid & ~was_filled).sum()),
+        "prop_valid": float(1 - invalid.mean()) if n else np.nan,
+    }
+
+
+# Flags, fills & summarises one trajectory; invalid samples that couldn't be filled become NaN
+#       NOTE: given a marker's parent rigid body pose (aligned to the same frames), gaps are reconstructed from
+#             it first, and only what it couldn't cover (e.g. the body was lost too) interpolated
+def fill_trajectory(pos: np.ndarray, invalid: np.ndarray = None, max_gap: int = MAX_GAP,
+                    body_pos: np.ndarray = None, body_rot: np.ndarray = None,
+                    body_invalid: np.ndarray = None) -> Tuple[np.ndarray, Dict[str, float]]:
+    if invalid is None:
+        invalid = invalid_samples(pos)
+
+    if body_pos is not None:
+        filled, was_filled = fill_gaps_rigid(pos, invalid, body_pos, body_rot, body_invalid, max_gap)
+        filled, interpolated = fill_gaps_cubic(filled, invalid & ~was_filled, max_gap)
+        was_filled |= interpolated
+    else:
+        filled, was_filled = fill_gaps_cubic(pos, invalid, max_gap)
+
+    filled[invalid & ~was_filled] = np.nan
+
+    return filled, gap_statistics(invalid, was_filled)
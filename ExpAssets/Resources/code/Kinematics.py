@@ -0,0 +1,88 @@
+# Per-trial kinematic measures computed from exported OptiTracker frame data
+#
+#   Functions operate on plain numpy arrays (one row per mocap frame) so they
+#   can be used both offline (BatchAnalysis.py) and on in-memory trial buffers.
+
+import numpy as np
+from typing import Dict, Sequence
+
+# Motive's default streaming rate; override per call when recording at other rates
+FRAME_RATE = 120
+
+# Speed (m/s) a rigid body must exceed to count as moving
+ONSET_VELOCITY = 0.05
+
+# Position columns, as named by dataStruct_RigidBody / dataStruct_LabeledMarker
+POSITION_COLS = ("pos_x", "pos_y", "pos_z")
+
+# Orientation (quaternion) columns, as named by dataStruct_RigidBody
+ROTATION_COLS = ("rot_w", "rot_x", "rot_y", "rot_z")
+
+
+# Frame-to-frame speed (m/s); first frame is assigned a speed of 0
+def speed(pos: np.ndarray, frame_rate: float = FRAME_RATE) -> np.ndarray:
+    if len(pos) < 2:
+        return np.zeros(len(pos))
+
+    step = np.linalg.norm(np.diff(pos, axis=0), axis=1)
+    return np.concatenate(([0.0], step * frame_rate))
+
+
+# Euclidean distance between two marker trajectories (e.g., thumb & index)
+def grip_aperture(marker_a: np.ndarray, marker_b: np.ndarray) -> np.ndarray:
+    return np.linalg.norm(marker_a - marker_b, axis=1)
+
+
+# Summary measures for a single trajectory; times are in ms relative to first frame
+def trajectory_kinematics(pos: np.ndarray, frame_rate: float = FRAME_RATE,
+                          onset_velocity: float = ONSET_VELOCITY) -> Dict[str, float]:
+    n_frames = len(pos)
+    ms_per_frame = 1000.0 / frame_rate
+
+    if n_frames < 2:
+        return {
+            "n_frames": n_frames, "peak_velocity": np.nan, "time_to_peak_velocity": np.nan,
+            "movement_onset": np.nan, "path_length": np.nan,
+        }
+
+    # NaN samples (e.g., unfilled gaps) are ignored
+    v = speed(pos, frame_rate)
+    moving = np.flatnonzero(v > onset_velocity)
+    any_valid = np.isfinite(v).any()
+
+    return {
+        "n_frames": n_frames,
+        "peak_velocity": float(np.nanmax(v)) if any_valid else np.nan,
+        "time_to_peak_velocity": float(np.nanargmax(v) * ms_per_frame) if any_valid else np.nan,
+        "movement_onset": float(moving[0] * ms_per_frame) if len(moving) else np.nan,
+        "path_length": float(np.nansum(v) / frame_rate),
+    }
+
+
+# Summary measures for a grip aperture series
+def aperture_kinematics(aperture: np.ndarray, frame_rate: float = FRAME_RATE) -> Dict[str, float]:
+    if not np.isfinite(aperture).any():
+        return {"peak_aperture": np.nan, "time_to_peak_aperture": np.nan}
+
+    return {
+        "peak_aperture": float(np.nanmax(aperture)),
+        "time_to_peak_aperture": float(np.nanargmax(aperture) * 1000.0 / frame_rate),
+    }
+
+
+# Splits rows into contiguous runs sharing the same key values; returns (start, stop) bounds
+#       NOTE: assumes rows are grouped, as written by trial_clean_up()
+def group_bounds(*keys: Sequence) -> np.ndarray:
+    n = len(keys[0])
+    if n == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    changed = np.zeros(n, dtype=bool)
+    changed[0] = True
+    for key in keys:
+        key = np.asarray(key)
+        changed[1:] |= key[1:] != key[:-1]
+
+    starts = np.flatnonzero(changed)
+    stops = np.append(starts[1:], n)
+    return np.column_stack((starts, stops))
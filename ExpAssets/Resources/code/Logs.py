@@ -0,0 +1,167 @@
+# Logging for the experiment & NatNet client: levelled, rate-limited per category, and non-blocking
+#
+#   Loggers are namespaced by category under "gbyk" (e.g. get_logger("natnet.command")).
+#   Once configure_logging() has been called, records that pass their level and their
+#   category's rate limit (a token bucket; messages dropped meanwhile are counted, and the
+#   count reported with the next record let through) are put on a queue. Formatting and all
+#   I/O (console and/or a JSON-lines file) happen on a listener thread, so the logging thread
+#   (e.g. the NatNet receive thread) never waits on a terminal or disk.
+#
+#   Until then, only warnings & errors are emitted (by the logging module's last-resort stderr
+#   handler). Below the configured level a call reduces to a level check, and message
+#   arguments are formatted only if the record is emitted, so pass them as arguments
+#   (log.debug("size: %d", size)), not as pre-formatted strings.
+#
+#   Structured fields are attached via log_data(), and written as JSON fields in the log file.
+
+import json
+import time
+import queue
+import logging
+import logging.handlers
+import threading
+from typing import Any, Dict, Union
+
+ROOT = "gbyk"
+
+# Default per-category rate limit: records per second, and burst allowance
+DEFAULT_RATE = 10.0
+DEFAULT_BURST = 20
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+
+CONSOLE_FORMAT = "%(asctime)s %(levelname)-7s [%(category)s] %(message)s%(suppressed_note)s"
+
+
+class rateLimitFilter(logging.Filter):
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST) -> None:
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last = time.monotonic()
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+
+            if self.tokens < 1:
+                self.suppressed += 1
+                return False
+
+            self.tokens -= 1
+            record.suppressed = self.suppressed
+            self.suppressed = 0
+            return True
+
+
+class consoleFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        record.category = record.name[len(ROOT) + 1:] or ROOT
+        suppressed = getattr(record, "suppressed", 0)
+        record.suppressed_note = f" ({suppressed} similar suppressed)" if suppressed else ""
+        return super().format(record)
+
+
+class jsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "category": record.name[len(ROOT) + 1:] or ROOT,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        entry.update(getattr(record, "data", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str)
+
+
+# Logger per category, each with its own rate limit
+_filters = {}
+_rates = {}
+_listener = None
+
+
+def get_logger(category: str) -> logging.Logger:
+    logger = logging.getLogger(f"{ROOT}.{category}")
+    if category not in _filters:
+        _filters[category] = rateLimitFilter(*_rates.get(category, (DEFAULT_RATE, DEFAULT_BURST)))
+        logger.addFilter(_filters[category])
+    return logger
+
+
+# Logs msg (%-formatted with args, as logger.log()) with structured fields (written as JSON fields to the log file)
+def log_data(logger: logging.Logger, level: int, msg: str, *args: Any, **data: Any) -> None:
+    if logger.isEnabledFor(level):
+        logger.log(level, msg, *args, extra={"data": data})
+
+
+# Sets per-category rate limits: {category: (records per second, burst)}
+def set_rate_limits(rates: Dict[str, tuple]) -> None:
+    _rates.update(rates)
+    for category, (rate, burst) in rates.items():
+        if category in _filters:
+            _filters[category].rate, _filters[category].burst = rate, burst
+
+
+def configure_logging(level: Union[int, str] = INFO, log_file: str = None, console: bool = True,
+                      rates: Dict[str, tuple] = None) -> None:
+    global _listener
+    shutdown_logging()
+
+    if rates:
+        set_rate_limits(rates)
+
+    handlers = []
+    if console:
+        stream = logging.StreamHandler()
+        stream.setFormatter(consoleFormatter(CONSOLE_FORMAT, "%H:%M:%S"))
+        handlers.append(stream)
+    if log_file is not None:
+        file = logging.FileHandler(log_file, encoding="utf8")
+        file.setFormatter(jsonFormatter())
+        handlers.append(file)
+
+    root = logging.getLogger(ROOT)
+    root.setLevel(level)
+    root.propagate = False
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    if not handlers:
+        root.addHandler(logging.NullHandler())
+        return
+
+    records = queue.SimpleQueue()
+    root.addHandler(logging.handlers.QueueHandler(records))
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+# Flushes queued records and closes handlers; loggers revert to warnings & errors only
+def shutdown_logging() -> None:
+    global _listener
+    if _listener is None:
+        return
+
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+    root = logging.getLogger(ROOT)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(logging.NOTSET)
+    root.propagate = True
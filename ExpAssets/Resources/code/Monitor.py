@@ -0,0 +1,239 @@
+# Live tracking monitor, served to a local browser
+#
+#   A small (single-threaded) HTTP server, running on its own daemon thread, serves:
+#       /           page plotting marker positions (top-down) & grip aperture, plus stream health
+#       /state      JSON snapshot of the tracker: decimated markers, aperture, frame rate,
+#                   dropped frames, per-stage latency & the monitor's own CPU cost
+#
+#   The page polls /state at ~30Hz. However often it's requested, state is rebuilt at most
+#   `rate` times per second (otherwise the cached JSON is re-sent), so the monitor's cost to
+#   the experiment process is bounded regardless of the number of open pages. That cost is
+#   measured (CPU time of the server thread, which handles every request, as a proportion
+#   of wall time) and reported.
+#
+#   The data thread is never touched: state is read from the tracker's latest wide row, which
+#   may occasionally be caught mid-write; acceptable for display purposes.
+
+import json
+import time
+import threading
+import numpy as np
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from typing import Any, Dict, Tuple, Union
+
+from FrameLayout import MARKER_FIELDS
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+# Maximum state refreshes per second
+RATE = 30
+
+# Markers sent per refresh, at most (evenly decimated when there are more)
+MAX_MARKERS = 64
+
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>GBYK tracking monitor</title>
+<style>
+  body { background: #2d2d2d; color: #eee; font: 14px sans-serif; margin: 1em; }
+  canvas { background: #1e1e1e; margin-right: 1em; }
+  td { padding: 0 1em 0 0; }
+</style></head>
+<body>
+<canvas id="markers" width="480" height="480"></canvas>
+<canvas id="aperture" width="480" height="240"></canvas>
+<table id="stats"></table>
+<script>
+const rate = %(rate)d, extent = 1.0, history = [];
+const markers = document.getElementById("markers").getContext("2d");
+const aperture = document.getElementById("aperture").getContext("2d");
+
+function draw(state) {
+  markers.clearRect(0, 0, 480, 480);
+  markers.fillStyle = "#8cf";
+  for (const [x, y, z] of state.markers) {
+    markers.fillRect(240 + x / extent * 240 - 2, 240 + z / extent * 240 - 2, 4, 4);
+  }
+
+  if (state.aperture !== null) { history.push(state.aperture); }
+  if (history.length > 300) { history.shift(); }
+  aperture.clearRect(0, 0, 480, 240);
+  aperture.strokeStyle = "#fc8";
+  aperture.beginPath();
+  history.forEach((a, i) => aperture.lineTo(i * 480 / 300, 240 - a / 0.15 * 240));
+  aperture.stroke();
+
+  const rows = [
+    ["frame", state.frame_number], ["frame rate (Hz)", state.frame_rate.toFixed(1)],
+    ["dropped frames", state.frames_dropped],
+    ["aperture (cm)", state.aperture === null ? "-" : (state.aperture * 100).toFixed(1)],
+  ];
+  for (const [stage, s] of Object.entries(state.latency_ms)) { rows.push([stage + " latency (ms)", s.toFixed(2)]); }
+  rows.push(["monitor CPU (%%)", (state.monitor_cpu * 100).toFixed(2)]);
+  document.getElementById("stats").innerHTML = rows.map(([k, v]) => `<tr><td>${k}</td><td>${v}</td></tr>`).join("");
+}
+
+async function poll() {
+  try { draw(await (await fetch("/state")).json()); } catch (e) {}
+  setTimeout(poll, 1000 / rate);
+}
+poll();
+</script></body></html>
+"""
+
+
+class liveMonitor:
+    def __init__(self, tracker: Any, host: str = HOST, port: int = PORT, rate: float = RATE,
+                 aperture_markers: Tuple[str, str] = None) -> None:
+        self.tracker = tracker
+        self.address = (host, port)
+        self.rate = rate
+
+        # marker column prefixes, e.g. ("Grippy:Marker1", "Grippy:Marker2"); default: first two markers
+        self.aperture_markers = aperture_markers
+
+        self._server = None
+        self._thread = None
+
+        self._state = b"{}"
+        self._built = 0.0
+
+        # frame rate, from frames counted between refreshes
+        self._frame_count = 0
+        self._frame_time = time.perf_counter()
+        self._frame_rate = 0.0
+
+        # monitor CPU cost: server thread CPU time over wall time since start
+        self._cpu = 0.0
+        self._started = None
+
+    # # # #
+    # State
+    # # # #
+
+    def _aperture_columns(self, layout: Any) -> Union[Tuple[slice, slice], None]:
+        prefixes = self.aperture_markers
+        if prefixes is None:
+            names = [c[:-len('_pos_x')] for c in layout.columns if ':' in c and c.endswith('_pos_x')]
+            if len(names) < 2:
+                return None
+            prefixes = names[:2]
+
+        try:
+            starts = [layout.columns.index(f"{prefix}_pos_x") for prefix in prefixes]
+        except ValueError:
+            return None
+
+        return tuple(slice(start, start + len(MARKER_FIELDS)) for start in starts)
+
+    def build_state(self) -> Dict[str, Any]:
+        tracker = self.tracker
+        now = time.perf_counter()
+
+        elapsed = now - self._frame_time
+        if elapsed > 0.25:
+            self._frame_rate = (tracker.dataframe_num - self._frame_count) / elapsed
+            self._frame_count = tracker.dataframe_num
+            self._frame_time = now
+
+        state = {
+            "frame_number": tracker.last_frame_number,
+            "frame_rate": self._frame_rate,
+            "frames_dropped": tracker.frames_dropped,
+            "latency_ms": {stage: value * 1000 for stage, value in tracker.stage_latency.items()},
+            "markers": [],
+            "aperture": None,
+            "monitor_cpu": self._cpu,
+        }
+
+        layout, wideframe = tracker.layout, tracker.wideframe
+        row = wideframe.last_row() if wideframe is not None else None
+        if row is None:
+            return state
+
+        row = row.copy()
+
+        # marker positions, decimated
+        positions = [row[start:start + count * len(MARKER_FIELDS)].reshape(count, len(MARKER_FIELDS))
+                     for start, count in layout.marker_set_slots.values()]
+        if positions:
+            positions = np.concatenate(positions)
+            positions = positions[np.isfinite(positions).all(axis=1)]
+            step = max(1, int(np.ceil(len(positions) / MAX_MARKERS)))
+            state["markers"] = np.round(positions[::step], 4).tolist()
+
+        columns = self._aperture_columns(layout)
+        if columns is not None:
+            aperture = float(np.linalg.norm(row[columns[0]] - row[columns[1]]))
+            state["aperture"] = aperture if np.isfinite(aperture) else None
+
+        return state
+
+    # Cached JSON, rebuilt at most `rate` times per second; called on the server thread
+    def state(self) -> bytes:
+        now = time.perf_counter()
+        if now - self._built >= 1.0 / self.rate:
+            self._cpu = time.thread_time() / max(now - self._started, 1e-9)
+            self._state = json.dumps(self.build_state()).encode("utf8")
+            self._built = now
+
+        return self._state
+
+    # # # #
+    # Server
+    # # # #
+
+    def _handler(self) -> type:
+        monitor = self
+        page = (PAGE % {"rate": self.rate}).encode("utf8")
+
+        class handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path == "/":
+                    body, content_type = page, "text/html"
+                elif self.path == "/state":
+                    body, content_type = monitor.state(), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            # requests aren't logged to the console
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        return handler
+
+    def start(self) -> "liveMonitor":
+        if self._server is not None:
+            return self
+
+        self._server = HTTPServer(self.address, self._handler())
+        self._started = time.perf_counter()
+
+        self._thread = threading.Thread(target=self._server.serve_forever, name="liveMonitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+
+    # Proportion of one CPU used by the monitor, since start()
+    def cpu_usage(self) -> float:
+        return self._cpu
+
+    def url(self) -> str:
+        return f"http://{self.address[0]}:{self.address[1]}/"
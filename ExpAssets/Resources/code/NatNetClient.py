@@ -16,32 +16,28 @@
 
 import socket
 import struct
-from threading import Thread
+from threading import Thread, Event, Timer
 import time
-from datetime import datetime
 from DataUnpackers import *
 from DescriptionUnpackers import *
+from DescriptionCache import descriptionCache
+from CaptureLog import captureWriter
+from CommandTracker import commandTracker, COMMAND_TIMEOUT, COMMAND_RETRIES
+from StructRegistry import version_key
+from Logs import get_logger, log_data, INFO, WARNING
 from construct import Int32ul
+from concurrent.futures import Future, TimeoutError, wait
 from typing import Any, Union, List, Tuple, Callable
 
-from pprint import pprint
-
-def trace( *args ):
-    # uncomment the one you want to use
-    #print( "".join(map(str,args)) )
-    pass
+# See Logs.py; trace messages are only formatted when debug logging is enabled for their category
+log = get_logger("natnet")
+trace = get_logger("natnet.trace").debug
 
 #Used for Data Description functions
-def trace_dd( *args ):
-    # uncomment the one you want to use
-    #print( "".join(map(str,args)) )
-    pass
+trace_dd = get_logger("natnet.descriptions").debug
 
 #Used for MoCap Frame Data functions
-def trace_mf( *args ):
-    # uncomment the one you want to use
-    #print( "".join(map(str,args)) )
-    pass
+trace_mf = get_logger("natnet.frames").debug
 
 def get_message_id(bytestream: bytes) -> int:
     message_id = int.from_bytes( bytestream[0:2], byteorder='little' )
@@ -50,16 +46,6 @@ def get_message_id(bytestream: bytes) -> int:
 
 class NatNetClient:
 
-
-
-
-
-
-    # print_level = 0 off
-    # print_level = 1 on
-    # print_level = >1 on / print every nth mocap frame
-    print_level = 20
-    
     def __init__( self ) -> None:
 
         # Constants denoting asset types
@@ -100,12 +86,39 @@ class NatNetClient:
             # Lock values once run is called
             "is_locked": False,
             # Server has the ability to change bitstream version
-            "can_change_bitstream_version": False
+            "can_change_bitstream_version": False,
+            # Ticks per second of the server's clock (frame suffix stamps), as reported in server info
+            "high_res_clock_frequency": 0,
+            # Where parsed model definitions are persisted between runs
+            "description_cache_dir": ".natnet_cache",
+            # Serve last run's model definitions at first startup, while current ones are requested
+            "trust_cached_descriptions": False
         }
 
         self.frame_data_listener = None
         self.description_listener = None
 
+        # Host time (time.perf_counter) at which the latest data packet was read off the socket
+        self.last_packet_received = 0.0
+
+        # Model definitions; re-requested on startup, and when the frame suffix flags a change
+        self.description_cache = descriptionCache(self.settings["description_cache_dir"])
+        self.current_descriptions = None
+        self.modeldef_pending = False
+        self.modeldef_timer = None
+
+        # Outstanding command requests, resolved as responses arrive (see CommandTracker.py)
+        self.commands = commandTracker()
+
+        # Set once server info has arrived (and parsers are built) after startup()
+        self.server_info_received = Event()
+
+        # Raw packets received are recorded here, when capturing (see CaptureLog.py)
+        self.capture = None
+
+        # Until the server's stream version is known, assume the newest packet layout
+        self.frame_unpack_functions = self.__select_frame_unpackers(None)
+
         self.command_thread = None
         self.data_thread = None
         self.command_socket = None
@@ -145,91 +158,74 @@ class NatNetClient:
     # Functions for unpacking frame data, called by __unpack_frame_data #
     # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
     
+    # Sections are logged as row tuples (FRAME_FIELDS order), via the unpackers' row emitters; fixed-size records
+    # (markers, rigid bodies, skeleton bones, asset markers) are scanned & read by struct, without Construct or a dict per child
     def __unpack_prefix_data(self, unparsed_bytestream: bytes, NatNetStreamVersion: List[int] = None) -> int:        
-        prefix = prefixData(unparsed_bytestream, NatNetStreamVersion)
-        self.frame_data.log("Prefix", prefix.data())
+        prefix = prefixData(unparsed_bytestream, NatNetStreamVersion, lazy=True)
+        self.frame_data.log("Prefix", list(prefix.rows()))
 
         return prefix.relative_offset()
 
     def __unpack_legacy_marker_set_data(self, unparsed_bytestream: bytes, NatNetStreamVersion: List[int] = None) -> int:
-        # Peak ahead to get packet size, TODO: add optional flag to skip, seeking forward in stream
-        nBytes = Int32ul.parse(unparsed_bytestream[4:])
-
-        legacy_marker_set = legacyMarkerSetData(unparsed_bytestream, NatNetStreamVersion)
-        self.frame_data.log("LegacyMarkerSet", legacy_marker_set.data())
+        legacy_marker_set = legacyMarkerSetData(unparsed_bytestream, NatNetStreamVersion, lazy=True)
+        self.frame_data.log("LegacyMarkerSet", list(legacy_marker_set.rows()))
  
         return legacy_marker_set.relative_offset()
 
     def __unpack_labeled_marker_set_data(self, unparsed_bytestream: bytes, NatNetStreamVersion: List[int] = None) -> int:
-        # Peak ahead to get packet size, TODO: add optional flag to skip, seeking forward in stream
-        nBytes = Int32ul.parse(unparsed_bytestream[4:])
-
-        labeled_marker_set = labeledMarkerSetData(unparsed_bytestream, NatNetStreamVersion)
-        self.frame_data.log("LabeledMarkerSet", labeled_marker_set.data())
-        
+        labeled_marker_set = labeledMarkerSetData(unparsed_bytestream, NatNetStreamVersion, lazy=True)
+        self.frame_data.log("LabeledMarkerSet", list(labeled_marker_set.rows()))
 
         return labeled_marker_set.relative_offset()
     
     def __unpack_marker_sets_data(self, unparsed_bytestream: bytes, NatNetStreamVersion: List[int] = None) -> int:
-        # Peak ahead to get packet size, TODO: add optional flag to skip, seeking forward in stream
-        nBytes = Int32ul.parse(unparsed_bytestream[4:])
-
-        marker_sets = markerSetsData(unparsed_bytestream, NatNetStreamVersion)
-        self.frame_data.log("MarkerSets", marker_sets.data())
+        marker_sets = markerSetsData(unparsed_bytestream, NatNetStreamVersion, lazy=True)
+        self.frame_data.log("MarkerSets", list(marker_sets.rows()))
 
         return marker_sets.relative_offset()
 
     def __unpack_rigid_bodies_data(self, unparsed_bytestream: bytes, NatNetStreamVersion: List[int] = None) -> int:
-        # Peak ahead to get packet size, TODO: add optional flag to skip, seeking forward in stream
-        nBytes = Int32ul.parse(unparsed_bytestream[4:])
-
-        rigid_bodies = rigidBodiesData(unparsed_bytestream, NatNetStreamVersion)
-        self.frame_data.log("RigidBodies", rigid_bodies.data())
+        rigid_bodies = rigidBodiesData(unparsed_bytestream, NatNetStreamVersion, lazy=True)
+        self.frame_data.log("RigidBodies", list(rigid_bodies.rows()))
 
         return rigid_bodies.relative_offset()
 
     def __unpack_skeletons_data(self, unparsed_bytestream: bytes, NatNetStreamVersion: List[int] = None) -> int:
-        # Peak ahead to get packet size, TODO: add optional flag to skip, seeking forward in stream
-        nBytes = Int32ul.parse(unparsed_bytestream[4:])
-
-
-        skeletons = skeletonsData(unparsed_bytestream, NatNetStreamVersion)
-        self.frame_data.log("Skeletons", skeletons.data())
+        skeletons = skeletonsData(unparsed_bytestream, NatNetStreamVersion, lazy=True)
+        self.frame_data.log("Skeletons", list(skeletons.rows()))
 
         return skeletons.relative_offset()
 
     def __unpack_assets_data(self, unparsed_bytestream: bytes, NatNetStreamVersion: List[int] = None) -> int:
-        # Peak ahead to get packet size, TODO: add optional flag to skip, seeking forward in stream
-        nBytes = Int32ul.parse(unparsed_bytestream[4:])
-
-        assets = assetsData(unparsed_bytestream, NatNetStreamVersion)
-        #self.frame_data.log("AssetRigidBodies", assets.data("AssetRigidBodies"))
-        self.frame_data.log("AssetMarkers", assets.data("AssetMarkers"))
+        assets = assetsData(unparsed_bytestream, NatNetStreamVersion, lazy=True)
+        self.frame_data.log("AssetMarkers", list(assets.rows()))
 
         return assets.relative_offset()
 
+    # Analog channels are scanned, not parsed: each channel's samples are logged as one float32 array (see channelData)
     def __unpack_force_plates_data(self, unparsed_bytestream: bytes, NatNetStreamVersion: List[int] = None) -> int:
-        # Peak ahead to get packet size, TODO: add optional flag to skip, seeking forward in stream
-        nBytes = Int32ul.parse(unparsed_bytestream[4:])
-
-
-        force_plates = forcePlatesData(unparsed_bytestream)
-        self.frame_data.log("ForcePlates", force_plates.data())
+        force_plates = forcePlatesData(unparsed_bytestream, NatNetStreamVersion, lazy=True)
+        self.frame_data.log("ForcePlates", force_plates.channels())
 
         return force_plates.relative_offset()
 
     def __unpack_devices_data(self, unparsed_bytestream: bytes, NatNetStreamVersion: List[int] = None) -> int:
-        # Peak ahead to get packet size, TODO: add optional flag to skip, seeking forward in stream
-        nBytes = Int32ul.parse(unparsed_bytestream[4:])
-
-        devices = devicesData(unparsed_bytestream)
-        self.frame_data.log("Devices", devices.data())
+        devices = devicesData(unparsed_bytestream, NatNetStreamVersion, lazy=True)
+        self.frame_data.log("Devices", devices.channels())
 
         return devices.relative_offset()
 
+    # Seeks past a section without decoding it, using its declared packet size
+    def __skip_section(self, unparsed_bytestream: bytes, NatNetStreamVersion: List[int] = None) -> int:
+        return 8 + Int32ul.parse(unparsed_bytestream[4:8])
+
     def __unpack_frame_suffix_data(self, unparsed_bytestream: bytes, NatNetStreamVersion: List[int] = None) -> int:
         suffix = suffixData(unparsed_bytestream, NatNetStreamVersion)
-        self.frame_data.log("Suffix", suffix.data())
+        self.frame_data.log("Suffix", list(suffix.rows()))
+
+        # Model definitions are only re-fetched when Motive reports they've changed
+        if suffix._framedata.tracked_models_changed and not self.modeldef_pending:
+            self.request_model_definitions()
 
         return suffix.relative_offset()
 
@@ -237,16 +233,24 @@ class NatNetClient:
         self.frame_data = frameData()
         offset = 0  # Not sure what the first 4 bytes are supposed to be, not documented in the NatNet SDK
 
-        today = datetime.today().strftime('%m-%d')
-        current_time = datetime.now().strftime("%H-%M-%S")
-        with open(f"{today}_at_{current_time}_framedata.bin", 'wb') as f:
-            f.write(unparsed_bytestream)
-        
+        for unpack_function in self.frame_unpack_functions:
+            offset += unpack_function(unparsed_bytestream[offset:], NatNetStreamVersion)
+
+        # frame = self.frame_data.export((
+        #     asset_type for asset_type in self.return_frame_data.keys() 
+        #     if self.return_frame_data[asset_type]
+        # ))
+            
 
 
+        self.frame_data_listener(self.frame_data.export())
         
+        return offset
 
 
+    # Section unpackers, in packet order, for a given stream version (assets introduced in NatNet 4.1)
+    def __select_frame_unpackers(self, NatNetStreamVersion: List[int] = None) -> List[Callable]:
+        version = version_key(NatNetStreamVersion)
 
         unpack_functions = [
             self.__unpack_prefix_data,
@@ -254,27 +258,27 @@ class NatNetClient:
             self.__unpack_legacy_marker_set_data,
             self.__unpack_rigid_bodies_data,
             self.__unpack_skeletons_data,
-            self.__unpack_assets_data,
-            # TODO: Following unpackers are currently inoperational, but also superfluous for present purposes
-            self.__unpack_labeled_marker_set_data,
-            # self.__unpack_force_plates_data,
-            # self.__unpack_devices_data,
-            # self.__unpack_frame_suffix_data
         ]
 
-        for unpack_function in unpack_functions:
-            offset += unpack_function(unparsed_bytestream[offset:], NatNetStreamVersion)
+        if version is None or version >= (4, 1):
+            unpack_functions.append(self.__unpack_assets_data)
 
-        # frame = self.frame_data.export((
-        #     asset_type for asset_type in self.return_frame_data.keys() 
-        #     if self.return_frame_data[asset_type]
-        # ))
-            
+        unpack_functions += [
+            self.__unpack_labeled_marker_set_data,
+            self.__unpack_force_plates_data,
+            self.__unpack_devices_data,
+            self.__unpack_frame_suffix_data
+        ]
 
+        return unpack_functions
 
-        self.frame_data_listener(self.frame_data.export())
-        
-        return offset
+    # Compiles version-appropriate parsers once, so none are built or looked up per packet
+    def build_parsers(self) -> None:
+        version = self.settings["nat_net_stream_version_server"]
+
+        FRAMEDATA_REGISTRY.build(version)
+        DESCRIPTION_REGISTRY.build(version)
+        self.frame_unpack_functions = self.__select_frame_unpackers(version)
 
 
     # Functions for unpacking descriptions, called by __unpack_descriptions #
@@ -283,14 +287,14 @@ class NatNetClient:
     def __unpack_marker_set_description(self, unparsed_bytestream: bytes, NatNetStreamVersion: List[int] = None) -> int:
         nBytes = Int32ul.parse(unparsed_bytestream[4:])
         marker_set = markerSetDescription(unparsed_bytestream, NatNetStreamVersion)
-        self.descriptions.log("MarkerSet", marker_set.data())
+        self.descriptions.log("MarkerSets", marker_set.data())
 
         return marker_set.relative_offset()
 
     def __unpack_rigid_body_description(self, unparsed_bytestream: bytes, NatNetStreamVersion: List[int] = None) -> int:
         nBytes = Int32ul.parse(unparsed_bytestream[4:])
         rigid_body = rigidBodyDescription(unparsed_bytestream, NatNetStreamVersion)
-        self.descriptions.log("RigidBody", rigid_body.data())
+        self.descriptions.log("RigidBodies", rigid_body.data())
 
 
         return rigid_body.relative_offset()
@@ -331,17 +335,24 @@ class NatNetClient:
         return asset.relative_offset()
 
     def __unpack_descriptions(self, unparsed_bytestream: bytes, NatNetStreamVersion: List[int] = None) -> int:
+        self.modeldef_pending = False
+        if self.modeldef_timer is not None:
+            self.modeldef_timer.cancel()
+
+        # Unchanged model definitions are served from cache, rather than re-parsed
+        cache_key = self.description_cache.key(unparsed_bytestream)
+        cached = self.description_cache.get(cache_key)
+
+        if cached is not None:
+            self.current_descriptions = cached
+            self.description_listener(cached)
+            return len(unparsed_bytestream)
+
         self.descriptions = Descriptions()
         offset = 0
 
-
-        today = datetime.today().strftime('%m-%d')
-        current_time = datetime.now().strftime("%H-%M-%S")
-        with open(f"{today}_at_{current_time}_descriptions.bin", 'wb') as f:
-            f.write(unparsed_bytestream)
-        
         # # of data sets to process
-        dataset_count = Int32ul.parse(unparsed_bytestream[4:])
+        dataset_count = Int32ul.parse(unparsed_bytestream[0:4])
         offset += 4
 
         unpack_functions = {
@@ -354,17 +365,23 @@ class NatNetClient:
             # 6: self.__unpack_asset_description
         }
 
+        # each dataset is [data_type][packet_size][payload]; packet_size lets unhandled types be skipped
         for i in range( 0, dataset_count ):
-            data_type = Int32ul.parse(unparsed_bytestream[4:]) 
+            data_type = Int32ul.parse(unparsed_bytestream[offset:offset+4])
             offset += 4
+            packet_size = Int32ul.parse(unparsed_bytestream[offset:offset+4])
 
             if data_type in unpack_functions:
-                offset = unpack_functions[data_type](unparsed_bytestream[offset:], NatNetStreamVersion)
-            else:
-                print(f"NatNetClient.__unpack_descriptions | Decode Error; Supplied unknown asset type: {data_type}")
+                unpack_functions[data_type](unparsed_bytestream[offset:], NatNetStreamVersion)
+            elif data_type > 6:
+                log.warning("NatNetClient.__unpack_descriptions | Decode Error; Supplied unknown asset type: %d", data_type)
 
+            offset += 4 + packet_size
 
-        self.description_listener(self.descriptions.export())
+        self.current_descriptions = self.descriptions.export()
+        self.description_cache.put(cache_key, self.current_descriptions)
+
+        self.description_listener(self.current_descriptions)
         
         return offset
 
@@ -377,27 +394,35 @@ class NatNetClient:
         if message_id == self.NAT_RESPONSE:
             if packet_size == 4:
                 command_response = int.from_bytes(bytestream[offset:offset+4], byteorder='little')
-                trace(f"Command response: {command_response} - {[bytestream[offset+i] for i in range(4)]}")
+                trace("Command response: %d", command_response)
                 offset += 4
             else:
                 message, _, _ = bytes(bytestream[offset:]).partition(b'\0')
                 if message.decode('utf-8').startswith('Bitstream'):
-                    nn_version = self.__unpack_bitstream_info(bytestream[offset:], packet_size)
+                    nn_version = self.__unpack_bitstream_info(message)
                     # Update the server version
                     self.settings["nat_net_stream_version_server"] = [int(v) for v in nn_version] + [0]*(4 - len(nn_version))
-                trace(f"Command response: {message.decode('utf-8')}")
+                trace("Command response: %s", message)
                 offset += len(message) + 1
+                command_response = message.decode('utf-8')
+
+            self.on_command_response(message_id, command_response)
         elif message_id == self.NAT_UNRECOGNIZED_REQUEST:
-            trace(f"Message ID:{message_id:.1f} (NAT_UNRECOGNIZED_REQUEST)")
-            trace(f"Packet Size: {packet_size}")
+            trace("Message ID: %d (NAT_UNRECOGNIZED_REQUEST), packet size: %d", message_id, packet_size)
+            self.on_command_response(message_id, None)
         elif message_id == self.NAT_MESSAGESTRING:
-            trace(f"Message ID:{message_id:.1f} (NAT_MESSAGESTRING), Packet Size: {packet_size}")
             message, _, _ = bytes(bytestream[offset:]).partition(b'\0')
-            trace(f"\n\tReceived message from server: {message.decode('utf-8')}")
+            log.info("Received message from server: %s", message.decode('utf-8'))
             offset += len(message) + 1
 
         return offset
 
+    # Called (on the receiving thread) for each NAT_RESPONSE / NAT_UNRECOGNIZED_REQUEST; response is
+    # an int (4 byte responses), str, or None (unrecognized). Overrides must call super() to keep
+    # request_command() futures resolving
+    def on_command_response(self, message_id: int, response: Union[int, str, None]) -> None:
+        self.commands.resolve(message_id, response)
+
     # Create a command socket to attach to the NatNet stream
     def __create_command_socket(self) -> Union[socket.socket, None]:
         try:
@@ -417,12 +442,11 @@ class NatNetClient:
             return result
 
         except socket.error as msg:
-            print(f"ERROR: command socket error occurred:\n{msg}")
-            print(f"Check Motive/Server mode requested mode agreement. You requested {'Multicast' if self.settings['use_multicast'] else 'Unicast'}")
+            log.error("Command socket error occurred: %s\nCheck Motive/Server mode requested mode agreement. You requested %s", msg, 'Multicast' if self.settings['use_multicast'] else 'Unicast')
         except (socket.herror, socket.gaierror):
-            print("ERROR: command socket herror or gaierror occurred")
+            log.error("Command socket herror or gaierror occurred")
         except socket.timeout:
-            print("ERROR: command socket timeout occurred. Server not responding")
+            log.error("Command socket timeout occurred. Server not responding")
 
         return None
 
@@ -445,12 +469,11 @@ class NatNetClient:
             return result
 
         except socket.error as msg:
-            print(f"ERROR: data socket error occurred:\n{msg}")
-            print(f"Check Motive/Server mode requested mode agreement. You requested {'Multicast' if self.settings['use_multicast'] else 'Unicast'}")
+            log.error("Data socket error occurred: %s\nCheck Motive/Server mode requested mode agreement. You requested %s", msg, 'Multicast' if self.settings['use_multicast'] else 'Unicast')
         except (socket.herror, socket.gaierror):
-            print("ERROR: data socket herror or gaierror occurred")
+            log.error("Data socket herror or gaierror occurred")
         except socket.timeout:
-            print("ERROR: data socket timeout occurred. Server not responding")
+            log.error("Data socket timeout occurred. Server not responding")
 
         return None
 
@@ -466,15 +489,21 @@ class NatNetClient:
         # NatNet Version info
         self.settings["nat_net_stream_version_server"] = struct.unpack('BBBB', bytestream[offset+260:offset+264])
 
+        # Server clock frequency, for converting suffix stamps to seconds
+        if len(bytestream) >= offset + 272:
+            self.settings["high_res_clock_frequency"] = struct.unpack('<Q', bytestream[offset+264:offset+272])[0]
+
         if self.settings["nat_net_requested_version"][:2] == [0, 0]:
-            print(f"Resetting requested version to {self.settings['nat_net_stream_version_server']} from {self.settings['nat_net_requested_version']}")
+            log.info("Resetting requested version to %s from %s", self.settings['nat_net_stream_version_server'], self.settings['nat_net_requested_version'])
             self.settings["nat_net_requested_version"] = self.settings["nat_net_stream_version_server"]
             # Determine if the bitstream version can be changed
             self.settings["can_change_bitstream_version"] = self.settings["nat_net_stream_version_server"][0] >= 4 and not self.settings["use_multicast"]
 
-        trace_mf(f"Sending Application Name: {self.settings['application_name']}")
-        trace_mf(f"NatNetVersion: {self.settings['nat_net_stream_version_server']}")
-        trace_mf(f"ServerVersion: {self.settings['server_version']}")
+        log_data(log, INFO, "Connected", application=self.settings['application_name'],
+                 natnet_version=self.settings['nat_net_stream_version_server'], server_version=self.settings['server_version'])
+
+        self.build_parsers()
+        self.server_info_received.set()
         return offset + 264
 
     # For local use; updates server bitstream version
@@ -487,8 +516,7 @@ class NatNetClient:
                 nn_version=messageList[1].split('.')
         return nn_version
 
-    def __command_thread_function(self, in_socket: socket.socket, stop: Callable, gprint_level: int) -> int:
-        message_id_dict = {}
+    def __command_thread_function(self, in_socket: socket.socket, stop: Callable) -> int:
         if not self.settings["use_multicast"]:
             in_socket.settimeout(2.0)
 
@@ -500,21 +528,12 @@ class NatNetClient:
                 bytestream, addr = in_socket.recvfrom(recv_buffer_size)
             except (socket.error, socket.herror, socket.gaierror, socket.timeout) as e:
                 if stop() or isinstance(e, socket.timeout) and self.use_multicast:
-                    print(f"ERROR: command socket access error occurred:\n{e}")
+                    log.error("Command socket access error occurred: %s", e)
                 if isinstance(e, socket.error):
-                    print("shutting down")
+                    log.debug("Command thread shutting down")
                 return 1
 
             if bytestream:
-                # peek ahead at message_id
-                message_id = get_message_id(bytestream)
-                tmp_str = f"mi_{message_id:.1f}"
-                message_id_dict[tmp_str] = message_id_dict.get(tmp_str, 0) + 1
-
-                print_level = gprint_level()
-                if message_id == self.NAT_FRAMEOFDATA and print_level > 0:
-                    print_level = 1 if message_id_dict[tmp_str] % print_level == 0 else 0
-
                 message_id = self.__process_message(bytestream)
                 bytestream = bytearray()
 
@@ -523,8 +542,7 @@ class NatNetClient:
 
         return 0
 
-    def __data_thread_function(self, in_socket: socket.socket, stop: Callable, gprint_level: Callable) -> int:
-        message_id_dict = {}
+    def __data_thread_function(self, in_socket: socket.socket, stop: Callable) -> int:
         # 64k buffer size
         recv_buffer_size = 64 * 1024
 
@@ -532,50 +550,43 @@ class NatNetClient:
             # Block for input
             try:
                 bytestream, addr = in_socket.recvfrom(recv_buffer_size)
+                self.last_packet_received = time.perf_counter()
             except (socket.error, socket.herror, socket.gaierror, socket.timeout) as e:
                 if not stop() or isinstance(e, socket.timeout):
-                    print(f"ERROR: data socket access error occurred:\n{e}")
+                    log.error("Data socket access error occurred: %s", e)
                 return 1
 
             if bytestream:
-                # peek ahead at message_id
-                message_id = get_message_id(bytestream)
-                tmp_str = f"mi_{message_id:.1f}"
-                message_id_dict[tmp_str] = message_id_dict.get(tmp_str, 0) + 1
-
-                print_level = gprint_level()
-                if message_id == self.NAT_FRAMEOFDATA and print_level > 0:
-                    print_level = 1 if message_id_dict[tmp_str] % print_level == 0 else 0
-
                 message_id = self.__process_message(bytestream)
                 bytestream = bytearray()
 
         return 0
 
     def __process_message(self, bytestream: bytes) -> int:
+        if self.capture is not None:
+            self.capture.write(bytestream)
+
         message_id = get_message_id(bytestream)
         packet_size = int.from_bytes(bytestream[2:4], byteorder='little')
 
         # skip the 4 bytes for message ID and packet_size
         offset = 4
         if message_id == self.NAT_FRAMEOFDATA:
-            offset += self.__unpack_frame_data(bytestream[offset:], NatNetStreamVersion=None)
+            offset += self.__unpack_frame_data(bytestream[offset:], NatNetStreamVersion=self.settings["nat_net_stream_version_server"])
 
         elif message_id == self.NAT_MODELDEF:
-            offset += self.__unpack_descriptions(bytestream[offset:], NatNetStreamVersion=None)
+            offset += self.__unpack_descriptions(bytestream[offset:], NatNetStreamVersion=self.settings["nat_net_stream_version_server"])
 
         elif message_id == self.NAT_SERVERINFO:
-            trace(f"Message ID: {message_id:.1f} (NAT_SERVERINFO), packet size: {packet_size}")
+            trace("Message ID: %d (NAT_SERVERINFO), packet size: %d", message_id, packet_size)
             offset += self.__unpack_server_info(bytestream, offset)
 
         elif message_id in [self.NAT_RESPONSE, self.NAT_UNRECOGNIZED_REQUEST, self.NAT_MESSAGESTRING]:
             offset = self.__handle_response_message(bytestream, offset, packet_size, message_id)
         
         else:
-            trace(f"Message ID: {message_id:.1f} (UNKNOWN)")
-            trace(f"ERROR: Unrecognized packet type of size: {packet_size}")
+            log.warning("Unrecognized packet type (message ID %d) of size: %d", message_id, packet_size)
 
-        trace("End Packet\n-----------------")
         return message_id
 
 
@@ -583,6 +594,16 @@ class NatNetClient:
     # Public Utility Functions  #
     # # # # # # # # # # # # # # #
 
+    # Entry points for alternative transports (see AsyncNatNetClient.py)
+    def process_message(self, bytestream: bytes) -> int:
+        return self.__process_message(bytestream)
+
+    def create_command_socket(self) -> Union[socket.socket, None]:
+        return self.__create_command_socket()
+
+    def create_data_socket(self) -> Union[socket.socket, None]:
+        return self.__create_data_socket(self.settings["data_port"])
+
     def set_client_address(self, local_ip_address: str) -> None:
         if not self.settings["is_locked"]:
             self.settings["local_ip"] = local_ip_address
@@ -608,18 +629,18 @@ class NatNetClient:
         """checks to see if stream version can change, then changes it with position reset"""
         if self.settings["can_change_bitstream_version"] and (NatNetRequestedVersion[0:2] != self.settings["nat_net_requested_version"][0:2]):
             sz_command = f"Bitstream {NatNetRequestedVersion[0]}.{NatNetRequestedVersion[1]}"
-            if self.send_command(sz_command) >= 0:
-                self.settings["nat_net_requested_version"] = NatNetRequestedVersion
-                print("changing bitstream MAIN")
-
-                # force frame send and play reset
-                self.send_command("TimelinePlay")
-                time.sleep(0.1)
-                self.send_commands(["TimelinePlay", "TimelineStop","SetPlaybackCurrentFrame,0", "TimelineStop"], False)
-                time.sleep(2)
-                return 0
-            else:
-                print("Bitstream change request failed")
+            try:
+                self.request_command(sz_command).result()
+            except (TimeoutError, ValueError) as e:
+                log.error("Bitstream change request failed: %s", e)
+                return -1
+
+            self.settings["nat_net_requested_version"] = NatNetRequestedVersion
+            log.info("Changing bitstream version to %s", NatNetRequestedVersion)
+
+            # force frame send and play reset; each step waits only as long as the server takes to answer
+            self.send_commands(["TimelinePlay", "TimelinePlay", "TimelineStop", "SetPlaybackCurrentFrame,0", "TimelineStop"], False)
+            return 0
         return -1
 
     def get_application_name(self) -> str:
@@ -631,6 +652,10 @@ class NatNetClient:
     def get_nat_net_version_server(self) -> str:
         return self.settings["nat_net_stream_version_server"]
 
+    # Ticks per second of server clock; 0 if not (yet) known
+    def get_clock_frequency(self) -> int:
+        return self.settings["high_res_clock_frequency"]
+
     def get_server_version(self) -> str:
         return self.settings["server_version"]
 
@@ -660,7 +685,7 @@ class NatNetClient:
 
         if command == self.NAT_CONNECT:
             command_str = [80, 105, 110, 103] + [0]*260 + [4, 1, 0, 0]
-            print(f"NAT_CONNECT to Motive with {command_str[-4:]}\n")
+            log.info("NAT_CONNECT to Motive with %s", command_str[-4:])
             data += bytearray(command_str)
         else:
             data += command_str.encode('utf-8')
@@ -668,59 +693,107 @@ class NatNetClient:
         data += b'\0'
         return in_socket.sendto(data, address)
 
+    # Sends a command once, without waiting on (or tracking) its response; see request_command()
     def send_command( self, command_str: str) -> int:
-        #print("Send command %s"%command_str)
-        nTries = 3
-        ret_val = -1
-        for tries in range(nTries):
-            ret_val = self.send_request( self.command_socket, self.NAT_REQUEST, command_str,  (self.settings["server_ip"], self.settings["command_port"]) )
-            if (ret_val != -1):
-                break;
-        return ret_val
-
-        #return self.send_request(self.data_socket,    self.NAT_REQUEST, command_str,  (self.server_ip_address, self.command_port) )
-
-    def send_commands(self, tmpCommands: list[str], print_results: bool = True) -> None:
-        for sz_command in tmpCommands:
-            return_code = self.send_command(sz_command)
+        return self.send_request( self.command_socket, self.NAT_REQUEST, command_str,  (self.settings["server_ip"], self.settings["command_port"]) )
+
+    # Sends a command, returning a Future for the server's response (int or str); re-sent if
+    # unanswered after timeout, failing with TimeoutError once retries are exhausted, or
+    # ValueError if the server doesn't recognize it
+    def request_command(self, command_str: str, timeout: float = COMMAND_TIMEOUT, retries: int = COMMAND_RETRIES) -> Future:
+        return self.commands.request(command_str, lambda: self.send_command(command_str), timeout, retries)
+
+    # Sends commands in order, returning once all have been answered (or have failed)
+    def send_commands(self, tmpCommands: list[str], print_results: bool = True) -> List[Union[int, str, None]]:
+        futures = [self.request_command(sz_command) for sz_command in tmpCommands]
+        wait(futures)
+
+        results = []
+        for sz_command, future in zip(tmpCommands, futures):
+            error = future.exception()
+            results.append(None if error else future.result())
             if(print_results):
-                print("Command: %s - return_code: %d"% (sz_command, return_code) )
+                log.info("Command: %s - response: %s", sz_command, error if error else future.result())
+        return results
 
     def send_keep_alive(self,in_socket: socket.socket, server_ip_address: str, server_port: int):
         return self.send_request(in_socket, self.NAT_KEEPALIVE, "", (server_ip_address, server_port))
 
-    def refresh_configuration(self) -> None:
-        #query for application configuration
-        #print("Request current configuration")
-        sz_command = "Bitstream"
-        return_code = self.send_command(sz_command)
-        time.sleep(0.5)
+    # Answered by a MODELDEF packet rather than a command response, so retried here (as per commandTracker);
+    # once retries are exhausted the request is dropped, letting a later suffix flag request again
+    def request_model_definitions(self, retries: int = COMMAND_RETRIES) -> None:
+        self.modeldef_pending = True
+        if self.modeldef_timer is not None:
+            self.modeldef_timer.cancel()
+
+        self.modeldef_timer = Timer(COMMAND_TIMEOUT, self.__model_definitions_expired, (retries,))
+        self.modeldef_timer.daemon = True
+        self.modeldef_timer.start()
+
+        self.send_request(self.command_socket, self.NAT_REQUEST_MODELDEF, "",  (self.settings['server_ip'], self.settings['command_port']) )
+
+    def __model_definitions_expired(self, retries: int) -> None:
+        if not self.modeldef_pending or self.stop_threads:
+            return
+
+        if retries > 0:
+            log_data(log, WARNING, "Model definitions not received; re-requesting", timeout=COMMAND_TIMEOUT,
+                     retries_left=retries)
+            self.request_model_definitions(retries - 1)
+        else:
+            log_data(log, WARNING, "Model definitions not received; request abandoned", retries=COMMAND_RETRIES)
+            self.modeldef_pending = False
+
+    # Queries the server's bitstream version (stored on response); returns the response, or None
+    def refresh_configuration(self) -> Union[str, None]:
+        try:
+            return self.request_command("Bitstream").result()
+        except (TimeoutError, ValueError) as e:
+            log.error("Configuration request failed: %s", e)
+            return None
+
+    # Records every packet received (until stop_capture()) to path; see CaptureLog.py
+    def start_capture(self, path: str) -> captureWriter:
+        self.stop_capture()
+        self.capture = captureWriter(path)
+        log.info("Capturing packets to %s", path)
+        return self.capture
+
+    def stop_capture(self) -> None:
+        capture, self.capture = self.capture, None
+        if capture is not None:
+            capture.close()
+            log_data(log, INFO, "Captured %d packets", capture.packets, path=capture.path, packets=capture.packets)
 
 
     # Have You Tried Turning It Off And On Again? #
     # # # # # # # # # # # # # # # # # # # # # # # #
         
     def startup(self) -> bool:
+        self.server_info_received.clear()
+        if self.capture is not None:
+            self.capture.mark()
+
         # Create the data socket
         self.data_socket = self.__create_data_socket( self.settings["data_port"] )
         if self.data_socket is None :
-            print( "Could not open data channel" )
+            log.error("Could not open data channel")
             return False
 
         # Create the command socket
         self.command_socket = self.__create_command_socket()
         if self.command_socket is None :
-            print( "Could not open command channel" )
+            log.error("Could not open command channel")
             return False
         self.settings["is_locked"] = True
 
         self.stop_threads = False
         # Create a separate thread for receiving data packets
-        self.data_thread = Thread( target = self.__data_thread_function, args = (self.data_socket, lambda : self.stop_threads, lambda : self.print_level, ))
+        self.data_thread = Thread( target = self.__data_thread_function, args = (self.data_socket, lambda : self.stop_threads, ))
         self.data_thread.start()
 
         # Create a separate thread for receiving command packets
-        self.command_thread = Thread( target = self.__command_thread_function, args = (self.command_socket, lambda : self.stop_threads, lambda : self.print_level,))
+        self.command_thread = Thread( target = self.__command_thread_function, args = (self.command_socket, lambda : self.stop_threads, ))
         self.command_thread.start()
 
         # Required for setup
@@ -732,13 +805,25 @@ class NatNetClient:
         ##Example Commands
         ## Get NatNet and server versions
         self.send_request(self.command_socket, self.NAT_REQUEST_FRAMEOFDATA, "", (self.settings['server_ip'], self.settings['command_port']) )
-        ## Request the model definitions
-        self.send_request(self.command_socket, self.NAT_REQUEST_MODELDEF, "",  (self.settings['server_ip'], self.settings['command_port']) )
+
+        ## Model definitions: those already held (or, if trusted, last run's) are served straight away. Models may
+        ## have changed while the stream was down (e.g., between trials), unseen by any frame suffix, so they're
+        ## re-requested regardless; if unchanged, the reply is a cache hit & isn't re-parsed
+        if self.current_descriptions is None and self.settings["trust_cached_descriptions"]:
+            self.current_descriptions = self.description_cache.latest()
+
+        if self.current_descriptions is not None:
+            self.description_listener(self.current_descriptions)
+        self.request_model_definitions()
         return True
 
     def shutdown(self) -> None:
-        print("shutdown called")
+        log.debug("Shutdown called")
         self.stop_threads = True
+        self.commands.cancel_all()
+        self.modeldef_pending = False
+        if self.modeldef_timer is not None:
+            self.modeldef_timer.cancel()
         # closing sockets causes blocking recvfrom to throw
         # an exception and break the loop
         self.command_socket.close()
@@ -1,6 +1,9 @@
 import sys
 import os
+import time
+import threading
 import datatable as dt
+import numpy as np
 from typing import Tuple, Dict, List, Any, Union
 
 # Get script directory to allow for relative imports
@@ -8,8 +11,15 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(os.path.dirname(SCRIPT_DIR))
 
 
-# Import native API class
-from NatNetClient import NatNetClient
+# NatNetClient (& with it construct) is imported when the client is first spawned, see init_client()
+from Filters import butter_sos, biquadCascade
+from Transforms import tableCalibration
+from FrameLayout import frameLayout, wideFrameBuffer
+from FrameFields import FRAME_FIELDS, FRAME_NUMBER, ASSET_ID, POSITION, TRACKING_VALIDITY, STAMP_EXPOSURE, STAMP_TRANSMIT
+from FrameSnapshot import snapshotBuffer, rigidBodyState
+from ChannelSeries import channelSeries
+from RestDetector import restDetector
+from Prediction import kalmanPredictor
 
 # Constants denoting asset types
 PREFIX = "Prefix"
@@ -25,15 +35,102 @@ DEVICE = "Device"
 CAMERA = "Camera"
 SUFFIX = "Suffix"
 
+# Per-trial buffers, by asset type
+DATAFRAME_ASSETS = (
+    'Prefix', 'MarkerSets', 'LabeledMarkerSet', 'LegacyMarkerSet', 'RigidBodies',
+    'Skeletons', 'AssetRigidBodies', 'AssetMarkers', 'Suffix'
+)
+# Analog assets, stored as per-channel series (see ChannelSeries.py); exported alongside the above when received
+CHANNEL_ASSETS = ('ForcePlates', 'Devices')
+DESCFRAME_ASSETS = ('MarkerSets', 'RigidBodies')
+
+# Streaming smoothing defaults (Motive default frame rate; 10Hz Butterworth low-pass)
+FRAME_RATE = 120
+SMOOTHING_CUTOFF = 10
+SMOOTHING_ORDER = 2
+
+# Weight of newest sample in (exponentially) smoothed stage latencies
+STAGE_LATENCY_SMOOTHING = 0.05
+
+# Longest prewarm() waits on each of: server info, model definitions, first frame (s)
+PREWARM_TIMEOUT = 5.0
+
+# Stages timed by prewarm(), in order; those not reached (e.g., timed out) are absent from startup_timing
+PREWARM_STAGES = ("client_init", "server_info", "descriptions", "first_frame", "prewarm")
+
 
 # Wrapper for NatNetClient API class
 class OptiTracker:
-    def __init__(self) -> None:
-        # NatNetClient instance
-        self.client = self.init_client()
+    def __init__(self, frame_rate: float = FRAME_RATE, smoothing_cutoff: float = SMOOTHING_CUTOFF,
+                 long_format: bool = True, async_client: bool = False, client: object = None,
+                 capture_path: str = None) -> None:
+        # NatNetClient instance, spawned on first use; asyncio transport (see AsyncNatNetClient.py) if async_client
+        #   Any other source of frames (e.g., synthetic, see Benchmark.py) may be supplied as client
+        self.async_client = async_client
+        self._client = self.attach_client(client) if client is not None else None
+        self._client_lock = threading.Lock()
+
+        # Raw packets are recorded to capture_path (see CaptureLog.py) by the spawned client, if given
+        self.capture_path = capture_path
+
+        # Background connection made ahead of the first trial, and where its time went (s); see prewarm()
+        self._prewarm = None
+        self.startup_timing = {}
         self.dataframe_num = 0
         self.descframe_num = 0
 
+        # Causal low-pass applied per frame to rigid body positions; state preallocated per asset_ID
+        self.frame_rate = frame_rate
+        self.smoothing_sos = butter_sos(SMOOTHING_ORDER, smoothing_cutoff, frame_rate)
+        self.smoothers = {}
+        self.smoothed = {}
+
+        # World -> table transform, see Transforms.py
+        self.calibration = None
+
+        # Latest smoothed pose & velocity per rigid body, readable from the experiment thread
+        self.snapshot = snapshotBuffer(frame_rate)
+
+        # Stream health: frames missing from the frame number sequence, and per-stage latency (s, smoothed)
+        #   server: exposure -> transmit (suffix stamps); decode: packet read -> listener; store: listener duration
+        self.frames_dropped = 0
+        self.last_frame_number = None
+        self.stage_latency = {"server": 0.0, "decode": 0.0, "store": 0.0}
+
+        # Shared-memory bus, for consumers in other processes (monitors, loggers); see FrameBus.py
+        self.frame_bus = None
+
+        # Per rigid body pose predictors, and latest estimate of exposure -> receipt latency (s)
+        self.predictors = {}
+        self.latency = 0.0
+
+        # Server clock ticks per second (suffix stamps); read from the client once server info has arrived
+        self.clock_frequency = 0
+
+        # Hand-at-rest detection, updated every frame once a rigid body is being watched
+        self.rest_detector = None
+        self.rest_asset_ID = None
+
+        # Wide (one row per frame) storage; layout built once model descriptions arrive
+        self.layout = None
+        self.wideframe = None
+        self._spare_wideframe = None
+
+        # Active per-trial buffers are swapped for spares on export, see dataexport()
+        #   _storing_* counters are odd while the receiving thread is mid-way through storing
+        self.dataframes = self._new_dataframes()
+        self.descframes = self._new_descframes()
+        self._spare_dataframes = self._new_dataframes()
+        self._spare_descframes = self._new_descframes()
+        self._storing_data = 0
+        self._storing_desc = 0
+
+        # Force plate & device samples, contiguous per channel; swapped out along with the above
+        self.channel_series = channelSeries()
+
+        # Long (one row per asset per frame) storage, as consumed by trial_clean_up
+        self.long_format = long_format
+
         # self.frame_listeners = {
         #     PREFIX: True, MARKER_SET: True, LABELED_MARKER: True,
         #     LEGACY_MARKER_SET: True, RIGID_BODY: True, SKELETON: True,
@@ -51,73 +148,418 @@ class OptiTracker:
         #     asset_type: dt.Frame() for asset_type, store_value in self.description_listeners.items() if store_value
         # }
 
+    # NatNetClient instance, spawned (and its modules imported) on first access
+    @property
+    def client(self) -> object:
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self.init_client()
+        return self._client
+
     # Create NatNetClient instance
     def init_client(self) -> object:
         
         # Spawn client instance
-        client = NatNetClient()
+        if self.async_client:
+            from AsyncNatNetClient import AsyncNatNetClient as clientClass
+        else:
+            from NatNetClient import NatNetClient as clientClass
+        client = clientClass()
+
+        if self.capture_path is not None:
+            client.start_capture(self.capture_path)
 
-        # Set frame listener
+        return self.attach_client(client)
+
+    # Set frame listeners; client need only deliver frames & descriptions as NatNetClient does
+    def attach_client(self, client: object) -> object:
         client.frame_data_listener = self.recieve_dataframe
         client.description_listener = self.recieve_descframe
 
         return client
     
+    # Connects once in the background (importing & compiling parsers, fetching model definitions),
+    # so the first trial's start() doesn't pay for it
+    def prewarm(self, timeout: float = PREWARM_TIMEOUT) -> None:
+        if self._prewarm is None:
+            self._prewarm = threading.Thread(target=self._prewarm_client, args=(timeout,), name="optiPrewarm", daemon=True)
+            self._prewarm.start()
+
+    def _prewarm_client(self, timeout: float) -> None:
+        timing = self.startup_timing
+        began = time.perf_counter()
+
+        client = self.client
+        timing["client_init"] = time.perf_counter() - began
+
+        # frames aren't stored, just awaited
+        first_frame = threading.Event()
+        client.frame_data_listener = lambda frame_data: first_frame.set()
+
+        try:
+            connecting = time.perf_counter()
+            if not client.startup():
+                return
+
+            if client.server_info_received.wait(timeout):
+                timing["server_info"] = time.perf_counter() - connecting
+
+            waited = time.perf_counter()
+            while client.current_descriptions is None and time.perf_counter() - waited < timeout:
+                time.sleep(0.001)
+            if client.current_descriptions is not None:
+                timing["descriptions"] = time.perf_counter() - connecting
+
+            if first_frame.wait(timeout):
+                timing["first_frame"] = time.perf_counter() - connecting
+
+            client.shutdown()
+        finally:
+            client.frame_data_listener = self.recieve_dataframe
+            timing["prewarm"] = time.perf_counter() - began
+
+    # Blocks until prewarm() (if started) has finished; returns False if still running after timeout
+    def await_prewarm(self, timeout: float = None) -> bool:
+        if self._prewarm is not None:
+            self._prewarm.join(timeout)
+            return not self._prewarm.is_alive()
+        return True
+
     # Start NatNetClient, returns True if successful, False otherwise
     def start(self) -> bool:
+        self.await_prewarm()
+        self.reset()
+        self.clock_frequency = 0
+
+        return self.client.startup()
+
+    # Clears per-trial buffers & state (filters, rest detection, predictors) ahead of a trial
+    def reset(self) -> None:
         self.init_dataframe()
         self.init_descframe()
+        self.reset_smoothing()
 
-        return self.client.startup()
+        if self.rest_detector is not None:
+            self.rest_detector.reset()
+
+        self.last_frame_number = None
+
+        for predictor in self.predictors.values():
+            predictor.reset()
 
     # Stop NatNetClient
     def stop(self) -> None:
         self.client.shutdown()
 
+    # Closes the capture file, if recording; call once done with the client
+    def stop_capture(self) -> None:
+        if self._client is not None and getattr(self._client, 'capture', None) is not None:
+            self._client.stop_capture()
+
+    # Publishes every (wide) frame to a shared-memory ring, readable by FrameBus.frameBusSubscriber
+    def start_frame_bus(self, name: str = None) -> "frameBusPublisher":
+        if self.frame_bus is None:
+            from FrameBus import frameBusPublisher, DEFAULT_NAME
+            self.frame_bus = frameBusPublisher(name or DEFAULT_NAME)
+            if self.layout is not None:
+                self.frame_bus.set_layout(self.layout.columns)
+
+        return self.frame_bus
+
+    def stop_frame_bus(self) -> None:
+        if self.frame_bus is not None:
+            self.frame_bus.close()
+            self.frame_bus = None
+
     def init_dataframe(self) -> Dict[str, dt.Frame]:
-        self.dataframes = {
-            'Prefix':dt.Frame(), 
-            'MarkerSets':dt.Frame(), 
-            'LabeledMarkerSet':dt.Frame(),
-            'LegacyMarkerSet':dt.Frame(),
-            'RigidBodies':dt.Frame(), 
-            'Skeletons':dt.Frame(),
-            'AssetRigidBodies':dt.Frame(),
-            'AssetMarkers':dt.Frame(),
-            #'ForcePlates':dt.Frame(), 
-            #'Devices':dt.Frame(), 
-            #'Suffix': dt.Frame()
-        }
+        self.dataframes = self._new_dataframes()
+        self.channel_series = channelSeries()
+
+        if self.wideframe is not None:
+            self.wideframe.clear()
+
+        return self.dataframes
 
     def init_descframe(self) -> Dict[str, dt.Frame]:
-        self.descframes = {
-            'MarkerSets':dt.Frame(), 
-            'RigidBodies':dt.Frame()
-        }
+        self.descframes = self._new_descframes()
+        return self.descframes
+
+    @staticmethod
+    def _new_dataframes() -> Dict[str, dt.Frame]:
+        return {asset: dt.Frame() for asset in DATAFRAME_ASSETS}
+
+    @staticmethod
+    def _new_descframes() -> Dict[str, dt.Frame]:
+        return {asset: dt.Frame() for asset in DESCFRAME_ASSETS}
 
     # Get new frame data
-    def recieve_dataframe(self, frame_data: Dict[str, List[Dict]]) -> None:
+    #       NOTE: frame_data holds, per section, lists of row tuples (see FrameFields.py)
+    def recieve_dataframe(self, frame_data: Dict[str, List[List[Tuple]]]) -> None:
+        received = time.perf_counter()
+
         self.dataframe_num += 1
+        self.smooth_rigid_bodies(frame_data.get('RigidBodies', []))
+        self.publish_snapshot(frame_data, received)
+        self.update_rest_detector(frame_data)
+        self.update_predictors(frame_data, received)
+
+        self._storing_data += 1
+        try:
+            self.store_dataframe(frame_data)
+        finally:
+            self._storing_data += 1
+
+        self.update_stream_health(frame_data, received)
+
+    # Tallies dropped frames & updates per-stage latency estimates
+    def update_stream_health(self, frame_data: Dict[str, List[List[Tuple]]], received: float) -> None:
+        prefix = frame_data.get('Prefix')
+        if prefix and prefix[0]:
+            frame_number = prefix[0][0][FRAME_NUMBER]
+            if self.last_frame_number is not None and frame_number > self.last_frame_number + 1:
+                self.frames_dropped += frame_number - self.last_frame_number - 1
+            self.last_frame_number = frame_number
+
+        stages = {"server": self.latency, "store": time.perf_counter() - received}
+        if self.client.last_packet_received:
+            stages["decode"] = received - self.client.last_packet_received
+
+        for stage, value in stages.items():
+            self.stage_latency[stage] += STAGE_LATENCY_SMOOTHING * (value - self.stage_latency[stage])
+
+    # Appends frame to the active buffers; references are taken once, so an export mid-frame can't split it
+    def store_dataframe(self, frame_data: Dict[str, List[List[Tuple]]]) -> None:
+        dataframes = self.dataframes
+        channel_series = self.channel_series
+        wideframe = self.wideframe
+
+        if wideframe is not None:
+            wideframe.write(frame_data)
+
+            if self.frame_bus is not None:
+                self.frame_bus.publish(wideframe.last_row(), wideframe.last_frame_number())
+
+        # Mocap frame number, tagged onto every row so occluded (dropped) rows can be realigned
+        frame_number = frame_data['Prefix'][0][0][FRAME_NUMBER] if frame_data.get('Prefix') else -1
+
+        # Analog samples are copied per channel, never expanded into rows
+        for asset in CHANNEL_ASSETS:
+            for channels in frame_data.get(asset, ()):
+                channel_series.append(asset, frame_number, channels)
+
+        if not self.long_format:
+            return
+
         # Store frame data
         for asset in frame_data.keys():
+            if asset in CHANNEL_ASSETS:
+                continue
+
+            names = list(FRAME_FIELDS[asset])
             for frame in frame_data[asset]:
-                # print("----------------------------------\n\n")
-                # print(f"OptiTracker, recieving F{self.dataframe_num} data:\n", frame)
-                self.dataframes[asset].rbind(dt.Frame(frame))
-                # print("----------------------------------\n\n")
+                if not frame:
+                    continue
+
+                rows = dt.Frame(frame, names=names)
+                if asset != 'Prefix':
+                    rows[:, dt.update(frame_number=frame_number)]
+
+                dataframes[asset].rbind(rows)
+
+    # Update smoothed position of each rigid body tracked in frame; untracked positions never enter the filter
+    def smooth_rigid_bodies(self, rigid_bodies: List[List[Tuple]]) -> None:
+        for bundle in rigid_bodies:
+            for rigid_body in bundle:
+                if not rigid_body[TRACKING_VALIDITY] & 0x01:
+                    continue
+
+                asset_ID = rigid_body[ASSET_ID]
+
+                if asset_ID not in self.smoothers:
+                    self.smoothers[asset_ID] = biquadCascade(self.smoothing_sos, n_channels=3)
+
+                self.smoothed[asset_ID] = self.smoothers[asset_ID].step(rigid_body[POSITION])
+
+    # Clear filter state, e.g. between trials, so smoothing restarts from the next sample
+    def reset_smoothing(self) -> None:
+        for smoother in self.smoothers.values():
+            smoother.reset()
+        self.smoothed = {}
+        self.snapshot.reset()
+
+    # Publishes smoothed positions (table coordinates, when calibrated) of this frame's tracked rigid bodies;
+    # the last known state of those untracked is carried over
+    def publish_snapshot(self, frame_data: Dict[str, List[List[Tuple]]], received: float = None) -> None:
+        prefix = frame_data.get('Prefix')
+        if not prefix or not prefix[0]:
+            return
+
+        frame_number = prefix[0][0][FRAME_NUMBER]
+        self.snapshot.publish(frame_number, {
+            rigid_body[ASSET_ID]: self.table_position(rigid_body[ASSET_ID])
+            for bundle in frame_data.get('RigidBodies', [])
+            for rigid_body in bundle
+            if rigid_body[TRACKING_VALIDITY] & 0x01
+        }, received)
+
+    # Most recent state of a rigid body; safe to call from any thread, never blocks the data thread
+    def rigid_body_state(self, asset_ID: int) -> Union[rigidBodyState, None]:
+        return self.snapshot.read(asset_ID)
+
+    # Server-side latency of frame (exposure -> transmit, s), from suffix stamps; None if clock frequency unknown
+    #       NOTE: frequency is fixed per connection, so only looked up until known
+    def frame_latency(self, frame_data: Dict[str, List[List[Tuple]]]) -> Union[float, None]:
+        if not self.clock_frequency:
+            self.clock_frequency = self.client.get_clock_frequency()
+
+        suffix = frame_data.get('Suffix')
+        if not self.clock_frequency or not suffix or not suffix[0]:
+            return None
+
+        stamps = suffix[0][0]
+        return (stamps[STAMP_TRANSMIT] - stamps[STAMP_EXPOSURE]) / self.clock_frequency
+
+    # Feeds raw (unsmoothed) positions of tracked rigid bodies to their predictors, timed at exposure
+    def update_predictors(self, frame_data: Dict[str, List[List[Tuple]]], received: float) -> None:
+        prefix = frame_data.get('Prefix')
+        if not prefix or not prefix[0]:
+            return
+
+        latency = self.frame_latency(frame_data)
+        if latency is not None:
+            self.latency = latency
+
+        frame_number = prefix[0][0][FRAME_NUMBER]
+        exposure = received - self.latency
+
+        for bundle in frame_data.get('RigidBodies', []):
+            for rigid_body in bundle:
+                if not rigid_body[TRACKING_VALIDITY] & 0x01:
+                    continue
+
+                asset_ID = rigid_body[ASSET_ID]
+                if asset_ID not in self.predictors:
+                    self.predictors[asset_ID] = kalmanPredictor(self.frame_rate)
+
+                pos = rigid_body[POSITION]
+                if self.calibration is not None:
+                    pos = self.calibration.frame_to_table(pos)
+
+                self.predictors[asset_ID].update(frame_number, exposure, pos, self.latency)
+
+    # Predicted state of a rigid body at host time (time.perf_counter(); default: now)
+    #       NOTE: not used by the experiment's reveal & onset triggers; at rest, predicted speed (~0.05-0.25 m/s at
+    #       default noise settings) sits above MOVE_SPEED, so those run on smoothed speed, via restDetector
+    def predict(self, asset_ID: int, host_time: float = None) -> Union[rigidBodyState, None]:
+        predictor = self.predictors.get(asset_ID)
+        if predictor is None:
+            return None
+
+        if host_time is None:
+            host_time = time.perf_counter()
+
+        predicted = predictor.predict(host_time)
+        if predicted is None:
+            return None
+
+        pos, vel = predicted
+        return rigidBodyState(predictor.frame_number, host_time, tuple(map(float, pos)), tuple(map(float, vel)),
+                              float(np.linalg.norm(vel)))
+
+    # Per rigid body summaries of prediction error since start(), for logging per trial
+    def prediction_errors(self) -> Dict[int, Dict[str, float]]:
+        return {asset_ID: predictor.error_summary() for asset_ID, predictor in self.predictors.items()}
+
+    # Starts at-rest detection on a rigid body (e.g., the hand); detector settings default to those in RestDetector.py
+    def watch_rest(self, asset_ID: int, detector: restDetector = None) -> restDetector:
+        self.rest_detector = detector if detector is not None else restDetector()
+        self.rest_asset_ID = asset_ID
+        return self.rest_detector
+
+    # Feeds the watched rigid body's state to the detector, on frames in which it was tracked
+    #   Frames in which it wasn't are skipped, so the detector goes stale (see restDetector.receiving())
+    #   rather than acting on a lost position
+    def update_rest_detector(self, frame_data: Dict[str, List[List[Tuple]]]) -> None:
+        if self.rest_detector is None:
+            return
+
+        tracked = any(rigid_body[ASSET_ID] == self.rest_asset_ID and rigid_body[TRACKING_VALIDITY] & 0x01
+                      for bundle in frame_data.get('RigidBodies', []) for rigid_body in bundle)
+        if not tracked:
+            return
+
+        state = self.snapshot.read(self.rest_asset_ID)
+        if state is not None:
+            self.rest_detector.update(state.frame_number, state.timestamp, state.pos, state.speed)
+
+    # Computes (or loads cached) table calibration from the rigid body rows recorded since start()
+    def calibrate(self, asset_ID: int, cache_path: str = None) -> tableCalibration:
+        rigid_bodies = self.dataframes['RigidBodies']
+        pos = rot = None
+
+        if self.wideframe is not None and asset_ID in self.layout.rigid_body_slots:
+            pose = self.wideframe.rigid_body(asset_ID)
+            pos, rot = pose[:, 0:3].astype(np.float64), pose[:, 3:7].astype(np.float64)
+
+        elif rigid_bodies.nrows:
+            rows = rigid_bodies[dt.f.asset_ID == asset_ID, :]
+            pos = rows[:, ['pos_x', 'pos_y', 'pos_z']].to_numpy()
+            rot = rows[:, ['rot_w', 'rot_x', 'rot_y', 'rot_z']].to_numpy()
+
+        if cache_path is not None:
+            self.calibration = tableCalibration.cached(cache_path, pos, rot)
+        else:
+            self.calibration = tableCalibration.from_samples(pos if pos is not None else [], rot)
+
+        return self.calibration
+
+    def load_calibration(self, path: str) -> tableCalibration:
+        self.calibration = tableCalibration.load(path)
+        return self.calibration
+
+    # Latest smoothed position of a rigid body, in table coordinates when calibrated
+    def table_position(self, asset_ID: int) -> Union[np.ndarray, None]:
+        if asset_ID not in self.smoothed:
+            return None
+
+        if self.calibration is None:
+            return self.smoothed[asset_ID]
+
+        return self.calibration.frame_to_table(self.smoothed[asset_ID])
 
     # Get new frame data
     def recieve_descframe(self, frame_desc: Dict[str, List[Dict]]) -> None:
         self.descframe_num += 1
-        # Store frame data
-        for asset in frame_desc.keys():
-            for frame in frame_desc[asset]:
-                print("----------------------------------\n\n")
-                print(f"OptiTracker, recieving F{self.descframe_num} desc:\n", frame)
-                self.descframes[asset].rbind(dt.Frame(frame))
-                print("----------------------------------\n\n")
+        self.update_layout(frame_desc)
+
+        self._storing_desc += 1
+        try:
+            descframes = self.descframes
+
+            # Store frame data
+            for asset in frame_desc.keys():
+                if asset not in descframes:
+                    continue
+
+                for frame in frame_desc[asset]:
+                    descframes[asset].rbind(dt.Frame(frame))
+        finally:
+            self._storing_desc += 1
 
 
+    # (Re)builds wide layout when model definitions change; frames stored under the old layout are dropped
+    def update_layout(self, frame_desc: Dict[str, List[Dict]]) -> None:
+        layout = frameLayout.from_descriptions(frame_desc)
+
+        if layout != self.layout:
+            self.layout = layout
+            self.wideframe = wideFrameBuffer(layout)
+            self._spare_wideframe = wideFrameBuffer(layout)
+
+            if self.frame_bus is not None:
+                self.frame_bus.set_layout(layout.columns)
+
     def update_frame(self, insert: Dict[Any, Any], into: Union[str, List[str]] = None) -> None:
         if into is not None:
             assets_to_update = [into] if isinstance(into, str) else into
@@ -137,14 +579,62 @@ class OptiTracker:
         for asset, frame in self.dataframes.items():
             frame.to_csv(f"{path}/{asset}.csv")
     
-    # Return frame and reset to None
+    # # # #
+    # Double-buffered export
+    #   The active buffers are swapped for preallocated spares in a single assignment; the caller
+    #   then owns what was exported, while subsequent frames land in the fresh buffers. The
+    #   receiving thread never waits: at most, export waits out a frame already being stored.
+    # # # #
+
+    # Waits until a store in progress (counter odd) at the time of swapping has completed
+    def _await_store(self, counter: str) -> None:
+        storing = getattr(self, counter)
+        while storing & 1 and getattr(self, counter) == storing:
+            time.sleep(0)
+
+    # Returns this trial's frame data, swapping in empty buffers for subsequent frames
+    #       analog channels, if any were received, are included as CHANNEL_COLS frames (see channelSeries.to_frames())
     def dataexport(self) -> Dict[str, dt.Frame]:
-        return self.dataframes
-    
+        exported, self.dataframes = self.dataframes, self._spare_dataframes
+        channels, self.channel_series = self.channel_series, channelSeries()
+        self._await_store('_storing_data')
+
+        self._spare_dataframes = self._new_dataframes()
+        exported.update(channels.to_frames())
+        return exported
+
+    # As dataexport(), for analog channels only, kept as contiguous per-channel series
+    def channelexport(self) -> channelSeries:
+        exported, self.channel_series = self.channel_series, channelSeries()
+        self._await_store('_storing_data')
+
+        return exported
+
+    # Wide frame data (one row per frame), swapped out as with dataexport(); None until descriptions have been received
+    def wideexport(self) -> Union[dt.Frame, None]:
+        exported = self.wideframe
+        if exported is None:
+            return None
+
+        self.wideframe = self._spare_wideframe
+        self._await_store('_storing_data')
+
+        frame = exported.to_frame()
+        if exported.layout == self.layout:
+            exported.clear()
+            self._spare_wideframe = exported
+        else:
+            self._spare_wideframe = wideFrameBuffer(self.layout)
+
+        return frame
 
-    # Return frame and reset to None
+    # Returns received descriptions, swapping in empty buffers for subsequent ones
     def descexport(self) -> Dict[str, dt.Frame]:
-        return self.descframes
+        exported, self.descframes = self.descframes, self._spare_descframes
+        self._await_store('_storing_desc')
+
+        self._spare_descframes = self._new_descframes()
+        return exported
     
 
         
@@ -0,0 +1,133 @@
+# Latency-compensating pose prediction
+#
+#   Each rigid body's position is tracked by a constant-acceleration Kalman filter (state:
+#   position, velocity & acceleration per axis, driven by white-noise jerk). Axes share
+#   identical dynamics & noise, so a single 3x3 covariance serves all three; the state is
+#   held as a 3x3 matrix of (pos, vel, acc) rows by (x, y, z) columns.
+#
+#   Measurements are timestamped on the host clock at their estimated exposure time
+#   (receipt time less reported system latency), so predict() can extrapolate to any host
+#   time, e.g. the expected time of the next display flip.
+#
+#   Prediction error is measured online: after each update, the position `latency` ahead
+#   is predicted & held until the corresponding frame arrives, then compared against it.
+
+import numpy as np
+from typing import Dict, Tuple, Union
+
+# White-noise jerk intensity (m^2/s^5); higher values track abrupt changes faster, but noisier
+PROCESS_NOISE = 500.0
+
+# Measurement noise (m, s.d.); sub-millimetre for a well-calibrated rigid body
+MEASUREMENT_NOISE = 0.0005
+
+# Initial uncertainty (s.d.) of velocity (m/s) & acceleration (m/s^2), prior to any dynamics
+INITIAL_VELOCITY_SD = 1.0
+INITIAL_ACCELERATION_SD = 10.0
+
+
+def transition(dt: float) -> np.ndarray:
+    return np.array([
+        [1.0, dt, 0.5 * dt * dt],
+        [0.0, 1.0, dt],
+        [0.0, 0.0, 1.0],
+    ])
+
+
+def process_covariance(dt: float, q: float) -> np.ndarray:
+    dt2, dt3, dt4, dt5 = dt ** 2, dt ** 3, dt ** 4, dt ** 5
+    return q * np.array([
+        [dt5 / 20, dt4 / 8, dt3 / 6],
+        [dt4 / 8, dt3 / 3, dt2 / 2],
+        [dt3 / 6, dt2 / 2, dt],
+    ])
+
+
+class kalmanPredictor:
+    def __init__(self, frame_rate: float, process_noise: float = PROCESS_NOISE,
+                 measurement_noise: float = MEASUREMENT_NOISE) -> None:
+        self.frame_rate = frame_rate
+        self.q = process_noise
+        self.r = measurement_noise ** 2
+
+        self.x = np.zeros((3, 3))
+        self.P = np.zeros((3, 3))
+        self.t = None               # exposure time (host clock) of latest measurement
+        self.frame_number = None
+
+        # (frame_number, t, state) of latest update, swapped in whole for readers on other threads
+        self._published = None
+
+        # predictions awaiting their frame: target frame_number -> predicted position
+        self._pending = {}
+        self.errors = []
+
+    # Forgets state & error history (e.g., between trials)
+    def reset(self) -> None:
+        self.t = None
+        self.frame_number = None
+        self._published = None
+        self._pending = {}
+        self.errors = []
+
+    # Incorporates one measured position, taken at host time t; latency sets the error-measurement horizon
+    def update(self, frame_number: int, t: float, pos: Tuple[float, float, float], latency: float = 0.0) -> None:
+        z = np.asarray(pos, dtype=np.float64)
+
+        predicted = self._pending.pop(frame_number, None)
+        if predicted is not None:
+            self.errors.append(float(np.linalg.norm(z - predicted)))
+        # predictions for frames that never arrived (dropped) are discarded
+        self._pending = {k: v for k, v in self._pending.items() if k > frame_number}
+
+        if self.t is None:
+            self.x[:] = 0.0
+            self.x[0] = z
+            self.P = np.diag([self.r, INITIAL_VELOCITY_SD ** 2, INITIAL_ACCELERATION_SD ** 2])
+        else:
+            # frame counts, not host timestamps, give the true sampling interval
+            dt = (frame_number - self.frame_number) / self.frame_rate
+            if dt <= 0:
+                return
+
+            F = transition(dt)
+            self.x = F @ self.x
+            self.P = F @ self.P @ F.T + process_covariance(dt, self.q)
+
+            innovation = z - self.x[0]
+            gain = self.P[:, 0] / (self.P[0, 0] + self.r)
+            self.x += np.outer(gain, innovation)
+            self.P -= np.outer(gain, self.P[0, :])
+
+        self.t = t
+        self.frame_number = frame_number
+        self._published = (frame_number, t, self.x.copy())
+
+        # hold prediction `latency` ahead (at least one frame), to be scored when that frame arrives
+        horizon = max(1, int(round(latency * self.frame_rate)))
+        self._pending[frame_number + horizon] = (transition(horizon / self.frame_rate) @ self.x)[0]
+
+    # Predicted (position, velocity) at host time t; None prior to the first measurement
+    def predict(self, t: float) -> Union[Tuple[np.ndarray, np.ndarray], None]:
+        published = self._published
+        if published is None:
+            return None
+
+        _, t_measured, x = published
+        predicted = transition(t - t_measured) @ x
+        return predicted[0], predicted[1]
+
+    # Summary of prediction errors (m) since last reset
+    def error_summary(self) -> Dict[str, float]:
+        errors = np.asarray(self.errors)
+        if not len(errors):
+            return {"n_predictions": 0, "mean_error": np.nan, "rms_error": np.nan,
+                    "p95_error": np.nan, "max_error": np.nan}
+
+        return {
+            "n_predictions": len(errors),
+            "mean_error": float(errors.mean()),
+            "rms_error": float(np.sqrt((errors ** 2).mean())),
+            "p95_error": float(np.percentile(errors, 95)),
+            "max_error": float(errors.max()),
+        }
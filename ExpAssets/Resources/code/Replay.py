@@ -0,0 +1,420 @@
+# Headless, deterministic replay of a whole session: no display, keyboard or Motive required
+#
+#   Usage: python Replay.py <capture> [--script PATH] [--speed X] [--blocks N] [--trials N]
+#                           [--seed N] [--out DIR] [--json PATH] [--expect-digest HEX]
+#
+#   GBYK_GripAperture's own setup(), block(), trial_prep(), trial(), trial_clean_up() and
+#   clean_up() are run, in the order klibs would run them, with:
+#       display & audio     klibs drawing, messaging & tones (as imported by experiment.py)
+#                           swapped for headless stand-ins; no window is opened
+#       input               key events played from a script, on the trial clock
+#       timing              event manager & countdowns on a clock running `speed` times real time
+#       tracking            a ReplayNatNetClient playing the capture (one recorded connection per
+#                           start()), paced at the same speed
+#
+#   The capture is one recorded by the experiment (natnet_capture), under the same prewarm
+#   setting. Each replayed trial receives exactly the frames its recorded counterpart did, so
+#   frame data written is identical run to run; its digest is reported (and, if expected,
+#   checked), so the session's data path can be regression-tested as well as timed.
+#
+#   Key script (JSON): {"trials": [[[t_ms, key, pressed], ...], ...]} with one event list per
+#   trial (cycled), times relative to trial start; optionally, "factors": [{...}, ...] giving
+#   each trial's target/distractor sizes & locations (cycled), instead of a seeded shuffle.
+#       NOTE: klibs must be installed (experiment.py subclasses klibs.Experiment).
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import itertools
+import tempfile
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+from ReplayNatNetClient import REPLAY_SPEED
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(SCRIPT_DIR)))
+PARAMS_FILE = os.path.join(PROJECT_DIR, "ExpAssets", "Config", "GBYK_GripAperture_params.py")
+
+# Display assumed by setup() when sizing stimuli
+PPI = 96
+SCREEN_SIZE = (1920, 1080)
+
+# Trial factors, as in GBYK_GripAperture_independent_variables.py
+FACTORS = {
+    "distractor_size": ["small", "large"],
+    "target_size": ["small", "large"],
+    "target_loc": ["left", "right"],
+}
+
+# Hand on the spacebar from the outset; lifted (movement onset) after the latest possible
+# go signal (see GO_SIGNAL_ONSET), then pressed again to mark the reach complete
+DEFAULT_KEY_SCRIPT = [[[0, "space", True], [2300, "space", False], [3200, "space", True]]]
+
+# Session files whose contents are digested
+DIGESTED = ("framedata", "framedesc")
+
+
+# # # # # # # # # # # # # #
+# Headless stand-ins      #
+# # # # # # # # # # # # # #
+
+class replayEvents:
+    # Trial clock & events, as klibs' EventManager is used by experiment.py; runs `speed` times real time
+    def __init__(self, speed: float = REPLAY_SPEED) -> None:
+        self.speed = speed
+        self.events = {}
+        self._started = time.perf_counter()
+
+    def start_clock(self) -> None:
+        self._started = time.perf_counter()
+
+    @property
+    def time_elapsed(self) -> float:
+        return (time.perf_counter() - self._started) * 1000 * self.speed
+
+    def add_event(self, label: str, onset: float, after: str = None) -> None:
+        self.events[label] = onset + (self.events[after] if after is not None else 0)
+
+    def before(self, label: str) -> bool:
+        return self.time_elapsed < self.events[label]
+
+    def after(self, label: str) -> bool:
+        return not self.before(label)
+
+    # Restarts the trial clock, keeping events
+    def reset(self) -> None:
+        self.start_clock()
+
+    def clear(self) -> None:
+        self.events = {}
+
+
+class scaledCountDown:
+    # As klibs.KLTime.CountDown (duration in s), on the replay clock
+    def __init__(self, duration: float, speed: float = REPLAY_SPEED) -> None:
+        self.duration = duration
+        self.speed = speed
+        self._started = time.perf_counter()
+
+    def counting(self) -> bool:
+        return (time.perf_counter() - self._started) * self.speed < self.duration
+
+
+class scriptedKeyboard:
+    def __init__(self, clock: replayEvents) -> None:
+        self.clock = clock
+        self.pending = []
+        self.state = {}
+        self.in_trial = False
+
+    # Queues a trial's key events ([t_ms, key, pressed], by trial clock)
+    def begin_trial(self, events: List[List[Any]]) -> None:
+        self.pending = sorted((float(t), key, bool(pressed)) for t, key, pressed in events)
+        self.state = {}
+        self.in_trial = True
+
+    def end_trial(self) -> None:
+        self.pending = []
+        self.in_trial = False
+
+    # Events due since last pumped, as (key, pressed); between trials, a single space press (starting the trial)
+    def pump(self, return_events: bool = False) -> List[Tuple[str, bool]]:
+        if not self.in_trial:
+            return [("space", True)]
+
+        now = self.clock.time_elapsed
+        due = []
+        while self.pending and self.pending[0][0] <= now:
+            _, key, pressed = self.pending.pop(0)
+            self.state[key] = pressed
+            due.append((key, pressed))
+
+        time.sleep(0)
+        return due
+
+    def key_pressed(self, key: str = None, queue: List[Tuple[str, bool]] = None) -> bool:
+        if queue is None:
+            queue = self.pump(True)
+        return any(pressed and (key is None or k == key) for k, pressed in queue)
+
+    def get_key_state(self, key: str) -> int:
+        self.pump()
+        return int(self.state.get(key, False))
+
+    def any_key(self, *args: Any, **kwargs: Any) -> bool:
+        return True
+
+    def ui_request(self, *args: Any, **kwargs: Any) -> None:
+        self.pump()
+
+
+class headlessDisplay:
+    def __init__(self) -> None:
+        self.flips = 0
+        self.messages = []
+
+    def fill(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def blit(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def clear(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def flip(self, *args: Any, **kwargs: Any) -> None:
+        self.flips += 1
+
+    def message(self, text: str, *args: Any, **kwargs: Any) -> None:
+        self.messages.append(text)
+
+    def hide_mouse_cursor(self) -> None:
+        pass
+
+
+class headlessShape:
+    # As kld shapes are used by experiment.py: constructed once, fill set before blitting
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self.args = args
+        self.fill = kwargs.get("fill")
+
+
+class silentTone:
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+    def play(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+# # # # # # # # # # # # # #
+# Session driver          #
+# # # # # # # # # # # # # #
+
+def load_script(path: Optional[str]) -> Dict[str, Any]:
+    if path is None:
+        return {"trials": DEFAULT_KEY_SCRIPT}
+
+    with open(path) as f:
+        script = json.load(f)
+
+    if not script.get("trials"):
+        raise ValueError(f"Replay.load_script() | {path}: expected a non-empty 'trials' list")
+    return script
+
+
+def trial_factors(script: Dict[str, Any], n_trials: int, rng: random.Random) -> List[Dict[str, str]]:
+    if script.get("factors"):
+        return [dict(f) for f, _ in zip(itertools.cycle(script["factors"]), range(n_trials))]
+
+    crossed = [dict(zip(FACTORS, levels)) for levels in itertools.product(*FACTORS.values())]
+    factors = []
+    while len(factors) < n_trials:
+        rng.shuffle(crossed)
+        factors += [dict(f) for f in crossed]
+    return factors[:n_trials]
+
+
+# Digest of the session's frame data files, for comparison across replays
+def data_digest(directory: str) -> str:
+    digest = hashlib.sha256()
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.endswith(".csv") and "-T" not in name and any(f"_{kind}." in name for kind in DIGESTED)
+    )
+
+    for name in names:
+        digest.update(name.encode("utf-8"))
+        with open(os.path.join(directory, name), "rb") as f:
+            digest.update(f.read())
+
+    return digest.hexdigest()
+
+
+def _load_params(P: Any, overrides: Dict[str, Any]) -> None:
+    import runpy
+
+    for name, value in runpy.run_path(PARAMS_FILE).items():
+        if not name.startswith("_"):
+            setattr(P, name, value)
+
+    for name, value in overrides.items():
+        setattr(P, name, value)
+
+
+# Swaps the display, input, audio & timing names experiment.py imported from klibs for headless ones
+def _install_stand_ins(experiment: Any, display: headlessDisplay, keyboard: scriptedKeyboard, speed: float) -> None:
+    for name in ("fill", "blit", "flip", "clear", "message", "hide_mouse_cursor"):
+        setattr(experiment, name, getattr(display, name))
+
+    for name in ("any_key", "ui_request", "key_pressed", "pump", "get_key_state"):
+        setattr(experiment, name, getattr(keyboard, name))
+
+    experiment.kld = SimpleNamespace(Annulus=headlessShape)
+    experiment.Tone = silentTone
+    experiment.CountDown = lambda duration: scaledCountDown(duration, speed)
+
+
+def run_session(capture: str, directory: str, script: Dict[str, Any], speed: float = REPLAY_SPEED,
+                blocks: int = None, trials: int = None, seed: int = 0) -> Dict[str, Any]:
+    # SDL (imported by klibs) must never look for a display or audio device
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+
+    import experiment
+    from klibs import P
+
+    capture = os.path.abspath(capture)
+    os.makedirs(directory, exist_ok=True)
+    os.chdir(directory)
+
+    random.seed(seed)
+    rng = random.Random(seed)
+
+    _load_params(P, {})
+    blocks = blocks or P.blocks_per_experiment
+    trials = trials or P.trials_per_block
+    _load_params(P, {
+        "ppi": PPI, "screen_x_y": SCREEN_SIZE, "screen_c": (SCREEN_SIZE[0] // 2, SCREEN_SIZE[1] // 2),
+        "participant_id": f"replay-{seed}", "practicing": False, "run_practice_blocks": False,
+        "blocks_per_experiment": blocks, "trials_per_block": trials,
+        "natnet_replay": capture, "natnet_replay_speed": speed, "natnet_capture": False,
+        "live_monitor": False,
+    })
+
+    display = headlessDisplay()
+    events = replayEvents(speed)
+    keyboard = scriptedKeyboard(events)
+    _install_stand_ins(experiment, display, keyboard, speed)
+
+    # klibs' constructor (window, database) is bypassed; only what the experiment uses is supplied
+    exp = experiment.GBYK_GripAperture.__new__(experiment.GBYK_GripAperture)
+    exp.evm = events
+
+    session_started = time.perf_counter()
+    exp.setup()
+
+    trial_times, cleanup_times, recycled = [], [], 0
+    key_scripts = itertools.cycle(script["trials"])
+    exhausted = False
+
+    for block_num in range(1, blocks + 1):
+        if exhausted:
+            break
+
+        P.block_number = block_num
+        exp.block()
+
+        queue = trial_factors(script, trials, rng)
+        trial_num = 1
+        while queue and not exhausted:
+            P.trial_number = trial_num
+            for name, level in queue.pop(0).items():
+                setattr(exp, name, level)
+
+            events.clear()
+            keyboard.end_trial()
+            exp.trial_prep()
+
+            keyboard.begin_trial(next(key_scripts))
+            events.start_clock()
+            t0 = time.perf_counter()
+            try:
+                exp.trial()
+                failed = False
+            except experiment.TrialException:
+                failed = True
+            trial_times.append(time.perf_counter() - t0)
+            keyboard.end_trial()
+
+            # trials beyond those recorded have no frames; the session ends there
+            exhausted = exp.opti.client.exhausted
+
+            # as klibs does, trial_clean_up() runs whether or not trial() raised
+            t0 = time.perf_counter()
+            exp.trial_clean_up()
+            cleanup_times.append(time.perf_counter() - t0)
+
+            if failed:
+                # recycled, as klibs would, to the end of the block; the trial number is re-used
+                recycled += 1
+                queue.append({name: getattr(exp, name) for name in FACTORS})
+            else:
+                trial_num += 1
+
+    t0 = time.perf_counter()
+    exp.clean_up()
+    final_write = time.perf_counter() - t0
+
+    client = exp.opti.client
+    return {
+        "trials": len(trial_times),
+        "capture_exhausted": exhausted,
+        "recycled": recycled,
+        "connections": client.connections,
+        "packets": client.packets,
+        "frames_dropped": exp.opti.frames_dropped,
+        "flips": display.flips,
+        "trial_mean_s": sum(trial_times) / max(len(trial_times), 1),
+        "cleanup_mean_ms": sum(cleanup_times) / max(len(cleanup_times), 1) * 1000,
+        "cleanup_max_ms": max(cleanup_times, default=0) * 1000,
+        "final_write_s": final_write,
+        "session_s": time.perf_counter() - session_started,
+        "digest": data_digest(directory),
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Headless replay of a recorded session, through the experiment")
+    parser.add_argument("capture", help="session capture, as recorded with natnet_capture")
+    parser.add_argument("--script", default=None, help="key event script (JSON); default: hold, lift & press space")
+    parser.add_argument("--speed", type=float, default=REPLAY_SPEED, help="multiple of real time (e.g. 4 for 4x)")
+    parser.add_argument("--blocks", type=int, default=None, help="default: blocks_per_experiment")
+    parser.add_argument("--trials", type=int, default=None, help="trials per block; default: trials_per_block")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="directory written to (default: temporary)")
+    parser.add_argument("--json", default=None, help="write results to this path")
+    parser.add_argument("--expect-digest", default=None, help="fail unless frame data digests to this")
+    args = parser.parse_args(argv)
+
+    if args.speed <= 0:
+        parser.error("--speed must be positive; the trial clock is paced")
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    directory = os.path.abspath(args.out or tempfile.mkdtemp(prefix="gbyk_replay_"))
+
+    results = run_session(args.capture, directory, load_script(args.script), args.speed,
+                          args.blocks, args.trials, args.seed)
+
+    print(f"Replay | {results['trials']} trials ({results['recycled']} recycled) from {results['connections']} "
+          f"connections, {results['packets']} packets, in {results['session_s']:.1f}s @ {args.speed}x")
+    print(f"Replay | clean-up: mean {results['cleanup_mean_ms']:.1f}ms, max {results['cleanup_max_ms']:.1f}ms; "
+          f"final write: {results['final_write_s']:.2f}s")
+    if results["capture_exhausted"]:
+        print("Replay | capture ran out before the session did; later trials were not run")
+    print(f"Replay | output: {directory}; frame data digest: {results['digest']}")
+
+    if json_path is not None:
+        with open(json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.expect_digest is not None and args.expect_digest != results["digest"]:
+        print(f"Replay | FAIL: digest differs from expected {args.expect_digest}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
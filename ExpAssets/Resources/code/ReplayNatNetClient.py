@@ -0,0 +1,99 @@
+# Replays a session capture (see CaptureLog.py) in place of a live NatNet connection
+#
+#   Same listeners & unpacking as NatNetClient, but packets are read from a capture rather
+#   than sockets: each startup() plays the next recorded connection (the packets between one
+#   recorded startup & the next) on a playback thread, with the original inter-packet timing
+#   scaled by 1/speed (speed 0: as fast as possible). Nothing is sent; responses to requests
+#   (e.g. model definitions) are those in the capture.
+#
+#   When draining (the default), shutdown() first delivers whatever remains of the connection
+#   being played, undelayed, so each replayed connection yields exactly the frames recorded,
+#   however long the caller keeps it open; the data replayed is then independent of timing.
+
+import time
+from threading import Thread, Event
+from typing import Any, List, Tuple
+
+from NatNetClient import NatNetClient, log
+from CaptureLog import captureReader, capturedPacket
+
+# Playback speed, as a multiple of real time (0: unpaced)
+REPLAY_SPEED = 1.0
+
+
+class ReplayNatNetClient(NatNetClient):
+    def __init__(self, capture_path: str, speed: float = REPLAY_SPEED, drain: bool = True) -> None:
+        super().__init__()
+
+        # Descriptions come from the capture, never from a previous run's cache
+        self.settings["trust_cached_descriptions"] = False
+
+        self.capture_path = capture_path
+        self.speed = speed
+        self.drain = drain
+
+        self._segments = captureReader(capture_path).segments()
+        self._playback = None
+        self._stop = Event()
+
+        # Recorded connections replayed so far, packets delivered, and whether the capture has run out
+        self.connections = 0
+        self.packets = 0
+        self.exhausted = False
+
+    def startup(self) -> bool:
+        self.server_info_received.clear()
+        self.settings["is_locked"] = True
+
+        segment = next(self._segments, None)
+        if segment is None:
+            self.exhausted = True
+            log.warning("Capture %s exhausted after %d connections", self.capture_path, self.connections)
+            return False
+        self.connections += 1
+
+        # Model definitions held are re-delivered, as by NatNetClient.startup(); otherwise they're in the capture
+        if self.current_descriptions is not None:
+            self.description_listener(self.current_descriptions)
+
+        self._stop.clear()
+        self._playback = Thread(target=self._play, args=(segment,), name="natNetReplay", daemon=True)
+        self._playback.start()
+        return True
+
+    def _play(self, segment: List[capturedPacket]) -> None:
+        if not segment:
+            return
+
+        began = time.perf_counter()
+        first = segment[0].time
+
+        for received, packet in segment:
+            if self._stop.is_set():
+                if not self.drain:
+                    return
+            elif self.speed > 0:
+                delay = (received - first) / self.speed - (time.perf_counter() - began)
+                if delay > 0:
+                    self._stop.wait(delay)
+
+            self.last_packet_received = time.perf_counter()
+            self.process_message(packet)
+            self.packets += 1
+
+    def shutdown(self) -> None:
+        log.debug("Shutdown called")
+        self._stop.set()
+        self.commands.cancel_all()
+
+        if self._playback is not None:
+            self._playback.join()
+            self._playback = None
+
+    # Whether the connection being replayed has been played out
+    def finished(self) -> bool:
+        return self._playback is None or not self._playback.is_alive()
+
+    # Nothing is sent; whatever the server said in reply is already in the capture
+    def send_request(self, in_socket: Any, command: int, command_str: str, address: Tuple[Any, ...]) -> int:
+        return 0
@@ -0,0 +1,143 @@
+# Hand-at-rest detection from live rigid body state
+#
+#   The hand is considered at rest while it is (a) within the start zone and (b) all but
+#   stationary. Separate enter/exit thresholds provide hysteresis, so jitter about a single
+#   threshold doesn't toggle state:
+#       enter rest: speed < rest_speed, within zone_radius, for rest_frames consecutive frames
+#       leave rest: speed > move_speed, or further than zone_radius + zone_margin from zone centre
+#
+#   Without an explicit start zone (see set_zone()), the position at which the hand first
+#   comes to rest in a trial is adopted as the zone for the remainder of that trial. The
+#   experiment relies on this: trials are triggered from the spacebar, the start position,
+#   so the hand first settles there. A hand still moving never settles, so can't set the zone.
+#
+#   Until the hand has first come to rest in a trial (settled), it has not *left* rest: the
+#   first frames after reset() (speed unknown, then fewer than rest_frames still frames)
+#   are neither at rest nor a departure, and emit nothing.
+#
+#   Leaving rest emits an event, stamped with the mocap frame at which it occurred:
+#       premature:  left rest before arm() was called (i.e., before the go signal)
+#       onset:      first departure from rest after arm()
+#
+#   update() runs on the data thread, once per frame; events & state are published by
+#   single assignment, so may be polled from the experiment thread without locking.
+
+import time
+import numpy as np
+from typing import NamedTuple, Tuple, Union
+
+# Speed (m/s) below which the hand may be considered at rest, and above which it is moving
+REST_SPEED = 0.02
+MOVE_SPEED = 0.05
+
+# Start zone radius (m), and tolerance beyond it before the hand is considered to have left
+ZONE_RADIUS = 0.05
+ZONE_MARGIN = 0.02
+
+# Consecutive still frames required to (re)enter rest; 12 frames = 100ms @ 120Hz
+REST_FRAMES = 12
+
+# Detector is considered stale (e.g., hand untracked) when no sample has arrived for this long (s)
+STALE_AFTER = 0.1
+
+PREMATURE = "premature"
+ONSET = "onset"
+
+
+class restEvent(NamedTuple):
+    kind: str
+    frame_number: int
+    timestamp: float        # host time (time.perf_counter) at which the frame was received
+
+
+class restDetector:
+    def __init__(self, rest_speed: float = REST_SPEED, move_speed: float = MOVE_SPEED,
+                 zone_radius: float = ZONE_RADIUS, zone_margin: float = ZONE_MARGIN,
+                 rest_frames: int = REST_FRAMES) -> None:
+        if move_speed < rest_speed:
+            raise ValueError(f"restDetector.__init__() | move_speed ({move_speed}) must be >= rest_speed ({rest_speed})")
+
+        self.rest_speed = rest_speed
+        self.move_speed = move_speed
+        self.zone_radius = zone_radius
+        self.zone_margin = zone_margin
+        self.rest_frames = rest_frames
+
+        self.zone_center = None     # explicit start zone, see set_zone()
+        self._zone = None           # zone in effect; explicit, or captured upon first coming to rest
+
+        self.at_rest = False
+        self.settled = False        # whether at rest at any point since reset()
+        self.armed = False
+        self.premature = None       # latest premature restEvent, if any
+        self.onset = None           # onset restEvent, once movement begins after arm()
+        self.last_update = None     # host time of latest sample since reset()
+
+        self._still_frames = 0
+
+    # Sets start zone centre (same coordinates as positions supplied to update())
+    def set_zone(self, center: Union[Tuple[float, float, float], np.ndarray, None]) -> None:
+        self.zone_center = None if center is None else np.asarray(center, dtype=np.float64)
+        self._zone = self.zone_center
+
+    # Clears state & events for a new trial; an explicit zone is retained
+    def reset(self) -> None:
+        self.armed = False
+        self.premature = None
+        self.onset = None
+        self.at_rest = False
+        self.settled = False
+        self.last_update = None
+        self._still_frames = 0
+        self._zone = self.zone_center
+
+    # Departures from rest are onsets from here on (call at the go signal)
+    def arm(self) -> None:
+        self.armed = True
+
+    # True while samples are arriving; when False, callers should fall back on other input
+    def receiving(self) -> bool:
+        return self.last_update is not None and time.perf_counter() - self.last_update < STALE_AFTER
+
+    # Seconds elapsed since event
+    @staticmethod
+    def since(event: restEvent) -> float:
+        return time.perf_counter() - event.timestamp
+
+    def _distance(self, pos: Tuple[float, float, float]) -> float:
+        if self._zone is None:
+            return 0.0
+        return float(np.linalg.norm(np.subtract(pos, self._zone)))
+
+    # Updates state from one frame of a rigid body's state (see FrameSnapshot.rigidBodyState)
+    def update(self, frame_number: int, timestamp: float, pos: Tuple[float, float, float], speed: float) -> None:
+        self.last_update = timestamp
+
+        # speed is NaN on the first frame (or after a reset); can't yet judge
+        if np.isnan(speed):
+            return
+
+        distance = self._distance(pos)
+
+        if self.at_rest:
+            if speed > self.move_speed or distance > self.zone_radius + self.zone_margin:
+                self.at_rest = False
+                self._still_frames = 0
+                self._left_rest(frame_number, timestamp)
+            return
+
+        if speed < self.rest_speed and distance <= self.zone_radius:
+            self._still_frames += 1
+            if self._still_frames >= self.rest_frames:
+                self.at_rest = True
+                self.settled = True
+                if self._zone is None:
+                    self._zone = np.asarray(pos, dtype=np.float64)
+        else:
+            self._still_frames = 0
+
+    def _left_rest(self, frame_number: int, timestamp: float) -> None:
+        if not self.armed:
+            self.premature = restEvent(PREMATURE, frame_number, timestamp)
+        elif self.onset is None:
+            self.onset = restEvent(ONSET, frame_number, timestamp)
@@ -0,0 +1,186 @@
+# Registry of parsing structures, keyed by unpacker (asset type) & NatNet stream version
+#
+#   Each unpacker may register several Structs, each applying from a given NatNet
+#   (major, minor) version onwards; the newest applicable one is selected. Structs are
+#   compiled (construct's .compile()) once per (unpacker, version) and cached, so
+#   packets are parsed by generated code rather than by interpreting the Struct tree.
+#   build() does this for every unpacker up front, and is called once the server's
+#   stream version is known (i.e., at connect time).
+#
+#   Structs that cannot be compiled fall back to their interpreted form.
+#
+#   Most of the cost of compiling is Python's compiler, not construct's code generation, so
+#   the bytecode generated for each Struct is cached on disk (keyed by a hash of its source),
+#   and later runs skip straight to executing it. Code generation itself still runs, as it
+#   links in objects (e.g. Computed functions) that can't be persisted. Construct refers to
+#   these by id(), which differs every run, so they are renumbered by order of appearance
+#   (see _renumber_linked()) before the source is hashed & compiled.
+
+import os
+import sys
+import types
+import marshal
+import re
+import hashlib
+import construct
+from construct import Struct
+from construct.core import CodeGen, Compiled
+from typing import Dict, List, Tuple, Union, Any
+
+# Stand-in for an unknown (not yet negotiated) stream version; selects newest structures
+UNKNOWN_VERSION = None
+
+# Where compiled parser bytecode is persisted between runs
+STRUCT_CACHE_DIR = os.path.join(".natnet_cache", "structs")
+
+# As emitted by construct's Construct.compile()
+_PREAMBLE = """
+    # generated by Construct, this source is for inspection only! do not import!
+
+    from construct import *
+    from construct.lib import *
+    from io import BytesIO
+    import struct
+    import collections
+    import itertools
+
+    def restream(data, func):
+        return func(BytesIO(data))
+    def reuse(obj, func):
+        return func(obj)
+
+    linkedinstances = {}
+    linkedparsers = {}
+    linkedbuilders = {}
+
+    len_ = len
+    sum_ = sum
+    min_ = min
+    max_ = max
+    abs_ = abs
+"""
+
+# References to linked objects in generated source, e.g. linkedparsers[140580537092368]
+_LINKED_REF = re.compile(r"\b(linkedinstances|linkedparsers|linkedbuilders)\[(\d+)\]")
+
+
+# Replaces the id()s construct keys linked objects by with their order of first appearance in source,
+# re-keying code's linked dicts to match; source (& so its hash & bytecode) is then the same every run
+def _renumber_linked(source: str, code: CodeGen) -> str:
+    numbers = {}
+    for match in _LINKED_REF.finditer(source):
+        numbers.setdefault(int(match.group(2)), len(numbers))
+
+    for name in ("linkedinstances", "linkedparsers", "linkedbuilders"):
+        linked = getattr(code, name)
+        setattr(code, name, {numbers[key]: obj for key, obj in linked.items() if key in numbers})
+
+    return _LINKED_REF.sub(lambda match: f"{match.group(1)}[{numbers[int(match.group(2))]}]", source)
+
+
+# Equivalent to structure.compile(), but re-uses bytecode cached in cache_dir (if given) by an earlier run
+def compile_cached(structure: Struct, cache_dir: Union[str, None] = STRUCT_CACHE_DIR) -> Compiled:
+    code = CodeGen()
+    code.append(_PREAMBLE)
+    code.append(f"""
+        def parseall(io, this):
+            return {structure._compileparse(code)}
+        def buildall(obj, io, this):
+            return {structure._compilebuild(code)}
+        compiled = Compiled(parseall, buildall)
+    """)
+    source = _renumber_linked(code.toString(), code)
+    modulename = hashlib.sha1(f"{construct.version}\n{source}".encode()).hexdigest()
+
+    bytecode = None
+    path = None
+    if cache_dir is not None:
+        path = os.path.join(cache_dir, f"{modulename}.{sys.implementation.cache_tag}.bin")
+        try:
+            with open(path, "rb") as f:
+                bytecode = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            bytecode = None
+
+    if bytecode is None:
+        bytecode = compile(source, "", "exec")
+        if path is not None:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                with open(path + ".tmp", "wb") as f:
+                    marshal.dump(bytecode, f)
+                os.replace(path + ".tmp", path)
+            except OSError:
+                pass
+
+    module = types.ModuleType(modulename)
+    exec(bytecode, module.__dict__)
+
+    module.linkedinstances = code.linkedinstances
+    module.linkedparsers = code.linkedparsers
+    module.linkedbuilders = code.linkedbuilders
+    compiled = module.compiled
+    compiled.source = source
+    compiled.module = module
+    compiled.modulename = modulename
+    compiled.defersubcon = structure
+    return compiled
+
+
+# Reduces a NatNet version ([major, minor, build, revision]) to a registry key
+def version_key(version: Union[List[int], Tuple[int, ...], None]) -> Union[Tuple[int, int], None]:
+    if version is None or len(version) < 2 or tuple(version[:2]) == (0, 0):
+        return UNKNOWN_VERSION
+    return (int(version[0]), int(version[1]))
+
+
+class structRegistry:
+    def __init__(self, defaults: Dict[type, Struct] = None, cache_dir: Union[str, None] = STRUCT_CACHE_DIR) -> None:
+        self._versions = {}     # unpacker -> [(since, Struct), ...], ascending
+        self._built = {}        # (unpacker, version key) -> compiled parser
+        self.cache_dir = cache_dir
+
+        for unpacker, structure in (defaults or {}).items():
+            self.register(unpacker, structure)
+
+    # Registers structure for use with unpacker from NatNet version `since` onwards
+    def register(self, unpacker: type, structure: Struct, since: Tuple[int, int] = (0, 0)) -> None:
+        entries = [entry for entry in self._versions.get(unpacker, []) if entry[0] != tuple(since)]
+        entries.append((tuple(since), structure))
+        self._versions[unpacker] = sorted(entries, key=lambda entry: entry[0])
+
+        # invalidate anything built for this unpacker
+        self._built = {key: parser for key, parser in self._built.items() if key[0] is not unpacker}
+
+    def unpackers(self) -> List[type]:
+        return list(self._versions.keys())
+
+    # Newest structure applicable to version
+    def select(self, unpacker: type, version: Any = None) -> Struct:
+        entries = self._versions[unpacker]
+        key = version_key(version)
+        if key is UNKNOWN_VERSION:
+            return entries[-1][1]
+
+        applicable = [structure for since, structure in entries if since <= key]
+        return applicable[-1] if applicable else entries[0][1]
+
+    def _compile(self, structure: Struct) -> Struct:
+        try:
+            return compile_cached(structure, self.cache_dir)
+        except Exception:
+            return structure
+
+    # Compiled parser for unpacker at version; compiled on first request if not already built
+    def get(self, unpacker: type, version: Any = None) -> Struct:
+        key = (unpacker, version_key(version))
+        try:
+            return self._built[key]
+        except KeyError:
+            self._built[key] = self._compile(self.select(unpacker, version))
+            return self._built[key]
+
+    # Compiles parsers for every registered unpacker at version
+    def build(self, version: Any = None) -> None:
+        for unpacker in self._versions:
+            self.get(unpacker, version)
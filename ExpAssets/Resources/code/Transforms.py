@@ -0,0 +1,148 @@
+# Rigid body pose transforms: quaternion conversions & world -> table coordinates
+#
+#   Quaternions are (w, x, y, z), matching rot_w/x/y/z in dataStruct_RigidBody.
+#   All conversions operate on whole columns (N frames) at once.
+#
+#   The table frame is defined by a calibration rigid body resting on the display
+#   (which doubles as the tabletop): its mean pose over a calibration window becomes
+#   the table origin & axes. A calibration is computed once per session, cached to
+#   disk, and re-used; tableCalibration.frame_to_table() is the allocation-free
+#   per-frame variant for live use.
+
+import os
+import json
+import numpy as np
+from typing import Tuple, Dict, Any
+
+# Axes of the table frame spanning the display surface (x: rightwards, z: towards participant)
+SCREEN_AXES = (0, 2)
+
+
+# # # # # # # # # # # # # #
+# Quaternion helpers      #
+# # # # # # # # # # # # # #
+
+def quat_normalize(q: np.ndarray) -> np.ndarray:
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+
+def quat_conjugate(q: np.ndarray) -> np.ndarray:
+    return q * np.array([1.0, -1.0, -1.0, -1.0])
+
+
+# Hamilton product, a * b
+def quat_multiply(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    aw, ax, ay, az = np.moveaxis(a, -1, 0)
+    bw, bx, by, bz = np.moveaxis(b, -1, 0)
+    return np.stack((
+        aw * bw - ax * bx - ay * by - az * bz,
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+    ), axis=-1)
+
+
+# Rotates vectors by unit quaternions; (N, 4) x (N, 3), or broadcastable
+def quat_rotate(q: np.ndarray, v: np.ndarray, inverse: bool = False) -> np.ndarray:
+    w = q[..., :1]
+    u = -q[..., 1:] if inverse else q[..., 1:]
+    t = 2.0 * np.cross(u, v)
+    return v + w * t + np.cross(u, t)
+
+
+# (N, 4) quaternions -> (N, 3, 3) rotation matrices
+def quat_to_matrix(q: np.ndarray) -> np.ndarray:
+    w, x, y, z = np.moveaxis(quat_normalize(np.asarray(q, dtype=np.float64)), -1, 0)
+    return np.stack((
+        np.stack((1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)), axis=-1),
+        np.stack((2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)), axis=-1),
+        np.stack((2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)), axis=-1),
+    ), axis=-2)
+
+
+# (N, 4) quaternions -> (N, 3) Euler angles (roll, pitch, yaw) in radians, such that R = Rz(yaw) Ry(pitch) Rx(roll)
+def quat_to_euler(q: np.ndarray) -> np.ndarray:
+    w, x, y, z = np.moveaxis(quat_normalize(np.asarray(q, dtype=np.float64)), -1, 0)
+
+    roll = np.arctan2(2 * (w * x + y * z), 1 - 2 * (x * x + y * y))
+    pitch = np.arcsin(np.clip(2 * (w * y - z * x), -1.0, 1.0))
+    yaw = np.arctan2(2 * (w * z + x * y), 1 - 2 * (y * y + z * z))
+
+    return np.stack((roll, pitch, yaw), axis=-1)
+
+
+# Mean orientation of a set of quaternions (sign-aligned, renormalized); fine for tightly clustered samples
+def quat_mean(q: np.ndarray) -> np.ndarray:
+    q = np.asarray(q, dtype=np.float64)
+    aligned = np.where((q @ q[0] < 0)[:, None], -q, q)
+    return quat_normalize(aligned.mean(axis=0))
+
+
+# # # # # # # # # # # # # #
+# Table calibration       #
+# # # # # # # # # # # # # #
+
+class tableCalibration:
+    def __init__(self, origin: np.ndarray, orientation: np.ndarray) -> None:
+        self.origin = np.asarray(origin, dtype=np.float64)
+        self.orientation = quat_normalize(np.asarray(orientation, dtype=np.float64))
+
+        # world -> table: p_table = R^T (p_world - origin); R^T cached for per-frame use
+        self._world_to_table = quat_to_matrix(self.orientation).T.copy()
+        self._inverse = quat_conjugate(self.orientation)
+
+    # Calibration from samples of a stationary calibration rigid body
+    @classmethod
+    def from_samples(cls, pos: np.ndarray, rot: np.ndarray) -> "tableCalibration":
+        if not len(pos):
+            raise ValueError("tableCalibration.from_samples() | No calibration samples supplied")
+
+        return cls(np.nanmean(pos, axis=0), quat_mean(rot))
+
+    # Loads calibration from cache_path if present; otherwise computes it from samples & caches it
+    @classmethod
+    def cached(cls, cache_path: str, pos: np.ndarray = None, rot: np.ndarray = None) -> "tableCalibration":
+        if os.path.exists(cache_path):
+            return cls.load(cache_path)
+
+        if pos is None or rot is None:
+            raise ValueError(f"tableCalibration.cached() | No cached calibration at {cache_path}, and no samples supplied")
+
+        calibration = cls.from_samples(pos, rot)
+        calibration.save(cache_path)
+        return calibration
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"origin": self.origin.tolist(), "orientation": self.orientation.tolist()}
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "tableCalibration":
+        with open(path, "r") as f:
+            return cls(**json.load(f))
+
+    # Vectorized transforms over N frames
+    def positions_to_table(self, pos: np.ndarray) -> np.ndarray:
+        return (np.asarray(pos, dtype=np.float64) - self.origin) @ self._world_to_table.T
+
+    def rotations_to_table(self, rot: np.ndarray) -> np.ndarray:
+        return quat_multiply(self._inverse, np.asarray(rot, dtype=np.float64))
+
+    def poses_to_table(self, pos: np.ndarray, rot: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return self.positions_to_table(pos), self.rotations_to_table(rot)
+
+    # Per-frame variant; writes into out when supplied
+    def frame_to_table(self, pos: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        if out is None:
+            out = np.empty(3)
+        np.dot(self._world_to_table, np.subtract(pos, self.origin), out=out)
+        return out
+
+
+# Table-frame positions (m) -> screen pixel coordinates, for comparison against placeholder locs
+def table_to_screen(pos: np.ndarray, px_per_cm: float, screen_c: Tuple[int, int]) -> np.ndarray:
+    pos = np.asarray(pos, dtype=np.float64)
+    return np.asarray(screen_c, dtype=np.float64) + pos[..., list(SCREEN_AXES)] * 100.0 * px_per_cm
@@ -0,0 +1,130 @@
+# Post-trial validity screening, run on a trial's in-memory buffers during the inter-trial interval
+#
+#   Data quality:
+#       lost frames:    mocap frames missing from the trial's frame number range (dropped packets)
+#       occlusion:      proportion of hand samples invalid (untracked, or with a mean marker error
+#                       above GapFilling.MAX_RESIDUAL), and longest run thereof
+#   Behaviour:
+#       no movement:    hand path length / peak velocity below movement thresholds
+#       anticipation:   response time (ms from go signal onset) shorter than plausible for a reaction to it
+#       no response:    response time not recorded (i.e., timed out)
+#
+#   Everything is vectorized over the trial's samples; a typical trial (~5s @ 120Hz)
+#   screens in well under a few milliseconds.
+
+import numpy as np
+import datatable as dt
+from typing import Dict, Tuple, Any
+
+from GapFilling import invalid_samples, find_gaps
+from Kinematics import FRAME_RATE, ONSET_VELOCITY, trajectory_kinematics
+
+# Proportion of mocap frames that may be lost (not received) within a trial
+MAX_LOST_FRAMES = 0.05
+
+# Proportion of hand samples that must be valid, and longest tolerable occlusion (frames; 250ms @ 120Hz)
+MIN_VALID_SAMPLES = 0.8
+MAX_OCCLUSION = 30
+
+# Hand must travel at least this far (m) for a movement to count as made
+MIN_PATH_LENGTH = 0.05
+
+# Response times (ms) shorter than this are anticipations
+MIN_RT = 100
+
+# Failure reasons
+LOST_FRAMES = "lost_frames"
+OCCLUDED = "occluded"
+NO_MOVEMENT = "no_movement"
+ANTICIPATION = "anticipation"
+NO_RESPONSE = "no_response"
+NO_DATA = "no_data"
+
+
+# Frame numbers received, and the hand's (frame_numbers, pos, tracking_validity, error), from OptiTracker.dataexport()
+def trial_arrays(dataframes: Dict[str, dt.Frame],
+                 asset_ID: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    prefix = dataframes.get('Prefix')
+    received = prefix['frame_number'].to_numpy().ravel() if prefix is not None and prefix.nrows else np.empty(0)
+
+    rigid_bodies = dataframes.get('RigidBodies')
+    if rigid_bodies is None or not rigid_bodies.nrows:
+        return received, np.empty(0), np.empty((0, 3)), np.empty(0), np.empty(0)
+
+    columns = ['frame_number', 'pos_x', 'pos_y', 'pos_z', 'tracking_validity']
+    rows = rigid_bodies[dt.f.asset_ID == asset_ID, columns + (['error'] if 'error' in rigid_bodies.names else [])]
+    rows = rows.to_numpy().astype(np.float64)
+    error = rows[:, 5] if rows.shape[1] > 5 else np.zeros(len(rows))
+
+    return received, rows[:, 0], rows[:, 1:4], rows[:, 4], error
+
+
+# error: the rigid body's mean marker error (m), screened as a residual
+def screen_trial(received: np.ndarray, frame_numbers: np.ndarray, pos: np.ndarray,
+                 tracking_validity: np.ndarray, error: np.ndarray, rt: float, frame_rate: float = FRAME_RATE,
+                 check_movement: bool = True) -> Dict[str, Any]:
+    metrics = {
+        "n_frames": 0, "prop_lost": np.nan, "prop_valid": np.nan, "longest_occlusion": 0,
+        "path_length": np.nan, "peak_velocity": np.nan, "rt": rt,
+    }
+    failures = []
+
+    if not len(received) or not len(frame_numbers):
+        metrics["failures"] = [NO_DATA]
+        return metrics
+
+    # Data quality
+    first, last = int(received.min()), int(received.max())
+    expected = last - first + 1
+    metrics["n_frames"] = expected
+    metrics["prop_lost"] = 1 - len(np.unique(received)) / expected
+
+    # hand samples on a contiguous frame grid; frames lacking a sample count as invalid
+    order = np.argsort(frame_numbers)
+    frame_numbers, pos = frame_numbers[order], pos[order]
+    tracking_validity, error = tracking_validity[order], error[order]
+    keep = (frame_numbers >= first) & (frame_numbers <= last)
+    index = frame_numbers[keep].astype(np.int64) - first
+
+    grid = np.full((expected, 3), np.nan)
+    grid[index] = pos[keep]
+    validity = np.zeros(expected)
+    validity[index] = tracking_validity[keep]
+    residual = np.zeros(expected)
+    residual[index] = error[keep]
+
+    invalid = invalid_samples(grid, validity, residual)
+    _, lengths = find_gaps(invalid)
+    metrics["prop_valid"] = float(1 - invalid.mean())
+    metrics["longest_occlusion"] = int(lengths.max()) if len(lengths) else 0
+
+    if metrics["prop_lost"] > MAX_LOST_FRAMES:
+        failures.append(LOST_FRAMES)
+    if metrics["prop_valid"] < MIN_VALID_SAMPLES or metrics["longest_occlusion"] > MAX_OCCLUSION:
+        failures.append(OCCLUDED)
+
+    # Behaviour
+    if check_movement:
+        # steps spanning invalid samples are ignored, rather than bridged
+        tracked = np.where(invalid[:, None], np.nan, grid)
+        if (~invalid).sum() > 1:
+            kinematics = trajectory_kinematics(tracked, frame_rate)
+            metrics["path_length"] = kinematics["path_length"]
+            metrics["peak_velocity"] = kinematics["peak_velocity"]
+
+        if not (metrics["path_length"] >= MIN_PATH_LENGTH and metrics["peak_velocity"] >= ONSET_VELOCITY):
+            failures.append(NO_MOVEMENT)
+
+    if rt is None or rt < 0:
+        failures.append(NO_RESPONSE)
+    elif rt < MIN_RT:
+        failures.append(ANTICIPATION)
+
+    metrics["failures"] = failures
+    return metrics
+
+
+# Screens a trial straight from OptiTracker.dataexport() buffers
+def screen_dataframes(dataframes: Dict[str, dt.Frame], asset_ID: int, rt: float,
+                      frame_rate: float = FRAME_RATE) -> Dict[str, Any]:
+    return screen_trial(*trial_arrays(dataframes, asset_ID), rt=rt, frame_rate=frame_rate)
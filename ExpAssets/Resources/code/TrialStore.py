@@ -0,0 +1,199 @@
+# Session-level accumulation of per-trial tracking data, as exported by OptiTracker
+#
+#   Each trial's frames are annotated with the trial's details and written to their own csv
+#   immediately (so a crash loses at most the trial in progress), then held per asset until
+#   write(), which binds each asset's trials once and writes the session file.
+#
+#   Trials are held as a list rather than bound onto a running session frame: binding per
+#   trial copies everything stored so far, so clean-up time grew with every trial (quadratic
+#   over a session), while the data held in memory is the same either way.
+#
+#   Session files are written trial by trial, and each trial's location within them (rows &
+#   bytes) recorded in a manifest, {prefix}_{suffix}_manifest.csv, one row per
+#   (participant_id, block_num, trial_num, attempt, asset). sessionManifest uses it to load a single
+#   trial's slice of a session file (memory-mapped), rather than reading & filtering the lot.
+#   Each trial's column types are recorded alongside, as a slice read on its own would have
+#   its types inferred from its rows alone (e.g. a trial's constant trial_num read as boolean).
+#
+#   A recycled trial is re-run under the same block & trial number, so each is stored with its
+#   attempt (from 1); later attempts' trial files are suffixed -A{attempt} rather than overwriting.
+
+import os
+import mmap
+import datatable as dt
+from datatable import f
+from typing import Any, Dict, Iterable, List, Tuple
+
+from Logs import get_logger, log_data, DEBUG, INFO
+
+FILE_PREFIX = "GripAperture"
+
+MANIFEST_COLS = ("participant_id", "block_num", "trial_num", "attempt", "asset", "path", "row_start", "nrows", "byte_start", "byte_end", "types")
+
+# Read types, as inference would make e.g. a single participant's IDs (all 1) boolean
+MANIFEST_TYPES = {
+    "participant_id": dt.str32, "block_num": dt.int32, "trial_num": dt.int32, "attempt": dt.int32,
+    "asset": dt.str32, "path": dt.str32,
+    "row_start": dt.int64, "nrows": dt.int64, "byte_start": dt.int64, "byte_end": dt.int64, "types": dt.str32,
+}
+
+# Column types fread can be told to read; narrower ints are read as int32, and others (e.g. void, all NA) inferred
+FREAD_TYPES = ("bool8", "int32", "int64", "float32", "float64", "str32", "str64")
+
+log = get_logger("data")
+
+
+class trialStore:
+    def __init__(self, assets: Iterable[str], suffix: str, prefix: str = FILE_PREFIX, directory: str = ".") -> None:
+        # file names: {prefix}_B{block}-T{trial}[-A{attempt}]_{asset}_{suffix}.csv per trial, {prefix}_{asset}_{suffix}.csv per session
+        self.suffix = suffix
+        self.prefix = prefix
+        self.directory = directory
+
+        self.trials = {asset: [] for asset in assets}
+        self.keys = {asset: [] for asset in assets}     # (participant_id, block_num, trial_num, attempt) per trial held
+
+    def trial_path(self, asset: str, block_num: int, trial_num: int, attempt: int = 1) -> str:
+        trial = f"B{block_num}-T{trial_num}" + (f"-A{attempt}" if attempt > 1 else "")
+        return os.path.join(self.directory, f"{self.prefix}_{trial}_{asset}_{self.suffix}.csv")
+
+    def session_path(self, asset: str) -> str:
+        return os.path.join(self.directory, f"{self.prefix}_{asset}_{self.suffix}.csv")
+
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, f"{self.prefix}_{self.suffix}_manifest.csv")
+
+    # Annotates (in place) & writes a trial's frames, keeping them for the session file
+    def add(self, trial_frames: Dict[str, dt.Frame], annotations: Dict[str, Any], block_num: int, trial_num: int,
+            attempt: int = 1) -> None:
+        for asset, frame in trial_frames.items():
+            frame[:, dt.update(**annotations)]
+
+            path = self.trial_path(asset, block_num, trial_num, attempt)
+            frame.to_csv(path)
+            log_data(log, DEBUG, "Wrote %s", path, path=path, rows=frame.nrows)
+
+            self.trials.setdefault(asset, []).append(frame)
+            self.keys.setdefault(asset, []).append((annotations.get("participant_id"), block_num, trial_num, attempt))
+
+    # Number of rows held for asset
+    def nrows(self, asset: str) -> int:
+        return sum(frame.nrows for frame in self.trials.get(asset, []))
+
+    # All trials held for asset, as one frame
+    def session_frame(self, asset: str) -> dt.Frame:
+        frames = self.trials.get(asset)
+        return dt.rbind(*frames) if frames else dt.Frame()
+
+    # Rows already in a session file being appended to; from the manifest, else counted (files predating it)
+    def _rows_written(self, path: str, manifest: dt.Frame) -> int:
+        if not os.path.exists(path) or not os.path.getsize(path):
+            return 0
+
+        if manifest is not None:
+            entries = manifest[f.path == os.path.basename(path), :]
+            if entries.nrows:
+                return int(entries[:, dt.max(f.row_start + f.nrows)][0, 0])
+
+        with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            lines = mm[:].count(b"\n")
+        return max(0, lines - 1)
+
+    # Writes (by default, appends to) each asset's session file, trial by trial, & the manifest locating each trial; returns paths written
+    def write(self, append: bool = True) -> Dict[str, str]:
+        manifest_path = self.manifest_path()
+        manifest = read_manifest(manifest_path) if append and os.path.exists(manifest_path) else None
+
+        paths, entries = {}, []
+        for asset, frames in self.trials.items():
+            path = self.session_path(asset)
+            row = self._rows_written(path, manifest) if append else 0
+
+            with open(path, 'ab' if append else 'wb') as file:
+                for frame, key in zip(frames, self.keys[asset]):
+                    if not frame.ncols:
+                        continue
+
+                    header, body = frame.to_csv().encode().split(b"\n", 1)
+                    if not file.tell():
+                        file.write(header + b"\n")
+
+                    start = file.tell()
+                    file.write(body)
+                    entries.append((*key, asset, os.path.basename(path), row, frame.nrows, start, file.tell(),
+                                    ";".join(fread_type(stype) for stype in frame.stypes)))
+                    row += frame.nrows
+
+            log_data(log, INFO, "Wrote %s", path, path=path, rows=self.nrows(asset))
+            paths[asset] = path
+
+        dt.Frame(entries, names=list(MANIFEST_COLS)).to_csv(manifest_path, append=append)
+        log_data(log, DEBUG, "Wrote %s", manifest_path, path=manifest_path, rows=len(entries))
+
+        return paths
+
+
+# # # # # # # # # # # # # #
+# Queries                 #
+# # # # # # # # # # # # # #
+
+# Type a column written with stype is read back as (see FREAD_TYPES)
+def fread_type(stype: dt.stype) -> str:
+    if stype in (dt.stype.int8, dt.stype.int16):
+        return "int32"
+    return stype.name if stype.name in FREAD_TYPES else "auto"
+
+# fread columns= for types recorded by fread_type(); given as names, fread would take them for column names
+def fread_columns(types: str) -> List:
+    return [dt.stype(name) if name != "auto" else ... for name in types.split(";")]
+
+
+def read_manifest(path: str) -> dt.Frame:
+    if not os.path.getsize(path):
+        return dt.Frame(names=list(MANIFEST_COLS))
+    return dt.fread(path, columns=MANIFEST_TYPES)
+
+# Loads trials' slices of session files, located by a trialStore manifest
+#       e.g. sessionManifest("GripAperture_framedata_manifest.csv").load("RigidBodies", participant_id=3, block_num=1, trial_num=4)
+class sessionManifest:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.directory = os.path.dirname(path)
+        self.entries = read_manifest(path)
+
+    # Manifest rows matching every criterion supplied (None: any)
+    def select(self, asset: str = None, participant_id: Any = None, block_num: int = None, trial_num: int = None,
+               attempt: int = None) -> dt.Frame:
+        criteria = {
+            "asset": asset, "participant_id": participant_id, "block_num": block_num, "trial_num": trial_num,
+            "attempt": attempt,
+        }
+
+        rows = self.entries
+        for column, value in criteria.items():
+            if value is not None:
+                # participant IDs are read as strings, being numeric in sessions but not necessarily elsewhere
+                rows = rows[f[column] == (str(value) if column == "participant_id" else value), :]
+
+        return rows
+
+    # (participant_id, block_num, trial_num, attempt) of each trial held for asset, in session order
+    def trials(self, asset: str) -> List[Tuple]:
+        rows = self.select(asset)[:, ["participant_id", "block_num", "trial_num", "attempt"]]
+        return list(zip(*rows.to_list())) if rows.nrows else []
+
+    # Rows of the matching trials only, read from their session files via mmap; empty if none match
+    def load(self, asset: str, participant_id: Any = None, block_num: int = None, trial_num: int = None,
+             attempt: int = None) -> dt.Frame:
+        rows = self.select(asset, participant_id, block_num, trial_num, attempt)
+        if not rows.nrows:
+            return dt.Frame()
+
+        slices = []
+        for name, start, end, types in zip(*rows[:, ["path", "byte_start", "byte_end", "types"]].to_list()):
+            with open(os.path.join(self.directory, name), 'rb') as file, \
+                    mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                header = mm[:mm.find(b"\n") + 1]
+                slices.append(dt.fread(text=header + mm[start:end], columns=fread_columns(types)))
+
+        return dt.rbind(*slices) if len(slices) > 1 else slices[0]
@@ -14,6 +14,10 @@
 
 __author__ = "Brett Feltmate"
 
+from time import perf_counter
+
+IMPORTS_STARTED = perf_counter()
+
 import klibs
 from klibs import P
 
@@ -30,13 +34,27 @@ from random import randrange, shuffle
 
 import datatable as dt
 
-from OptiTracker import OptiTracker
+from OptiTracker import OptiTracker, DATAFRAME_ASSETS, DESCFRAME_ASSETS, PREWARM_STAGES
+from TrialStore import trialStore
+from CaptureLog import capture_path
+from TrialScreening import screen_dataframes
+from Logs import get_logger, log_data, configure_logging, shutdown_logging, INFO
 from get_key_state import get_key_state
 
+log = get_logger("experiment")
+
+IMPORT_TIME = perf_counter() - IMPORTS_STARTED
+
+# Columns of GripAperture_startup_timing.csv (see report_startup())
+STARTUP_STAGES = ("imports", "setup") + PREWARM_STAGES
+
 # timing constants
 GO_SIGNAL_ONSET = (500, 2000)
 RESPONSE_TIMEOUT = 5000
 
+# longest wait (s) at trial start for hand samples to arrive, before falling back on the spacebar hold
+TRACKING_WAIT = 0.25
+
 # audio constants
 TONE_DURATION = 50
 TONE_SHAPE = "sine"
@@ -67,6 +85,11 @@ KBYG = "KBYG"
 class GBYK_GripAperture(klibs.Experiment):
 
     def setup(self):
+        setup_started = perf_counter()
+
+        # levelled, rate-limited & queued (see Logs.py); data goes to csv files, not the console
+        configure_logging(P.log_level, log_file=P.log_file, console=P.log_to_console)
+
         # Define standard units
         PX_CM = round(P.ppi / 2.54)
 
@@ -107,21 +130,53 @@ class GBYK_GripAperture(klibs.Experiment):
                 block_nums=[1, 3], trial_counts=P.trials_per_practice_block
             )
 
-        # setup optitracker
-        self.opti = OptiTracker()
-
-        self.optidata = {
-            "Prefix": dt.Frame(),
-            "MarkerSets": dt.Frame(),
-            "LegacyMarkerSet": dt.Frame(),
-            "LabeledMarkerSet": dt.Frame(),
-            "RigidBodies": dt.Frame(),
-            "Skeletons": dt.Frame(),
-            "AssetRigidBodies": dt.Frame(),
-            "AssetMarkers": dt.Frame(),
-        }
+        # setup optitracker: live, recording packets received for later replay; or replaying such a recording
+        client, capture = None, None
+        if P.natnet_replay:
+            from ReplayNatNetClient import ReplayNatNetClient
+
+            client = ReplayNatNetClient(P.natnet_replay, speed=P.natnet_replay_speed)
+        elif P.natnet_capture:
+            capture = capture_path("GripAperture", P.participant_id)
+
+        self.opti = OptiTracker(
+            async_client=P.natnet_async_client, client=client, capture_path=capture
+        )
+
+        # connect (& fetch model definitions) in the background, while instructions are up
+        if P.prewarm_tracker:
+            self.opti.prewarm()
+
+        # hand-at-rest detection; spacebar hold used whenever hand isn't being tracked
+        self.rest = None
+        if P.mocap_rest_detection:
+            self.rest = self.opti.watch_rest(P.hand_rigid_body_ID)
+
+        # per-trial frames, written per trial & (at clean-up) per session; see TrialStore.py
+        self.optidata = trialStore(DATAFRAME_ASSETS, "framedata")
+        self.optidesc = trialStore(DESCFRAME_ASSETS, "framedesc")
+
+        # per-trial pose prediction error, by rigid body
+        self.optipred = dt.Frame()
+
+        # per-trial validity screening metrics
+        self.optiscreen = dt.Frame()
+
+        # attempts per (block, trial); recycled trials re-run under the same numbers
+        self.attempts = {}
 
-        self.optidesc = {"MarkerSets": dt.Frame(), "RigidBodies": dt.Frame()}
+        # frames exported (& screened) at the end of trial(), until stored by trial_clean_up()
+        self.trial_frames = None
+
+        # optional browser view of tracking quality, for the experimenter
+        self.monitor = None
+        if P.live_monitor:
+            from Monitor import liveMonitor
+
+            self.monitor = liveMonitor(self.opti).start()
+            log.info("Live tracking monitor: %s", self.monitor.url())
+
+        self.startup_timing = {"imports": IMPORT_TIME, "setup": perf_counter() - setup_started}
 
     def block(self):
         # grab task
@@ -141,6 +196,29 @@ class GBYK_GripAperture(klibs.Experiment):
 
         any_key()
 
+        if P.block_number == 1:
+            self.report_startup()
+
+    # Logs time spent importing, in setup(), and connecting to the tracker (see OptiTracker.prewarm())
+    #   Every stage gets a column, NA where not reached, so rows appended across sessions line up
+    def report_startup(self):
+        self.opti.await_prewarm()
+        timing = {**self.startup_timing, **self.opti.startup_timing}
+
+        log_data(
+            log, INFO,
+            "Startup (ms): " + ", ".join(f"{stage}: {t * 1000:.1f}" for stage, t in timing.items()),
+            **{f"{stage}_ms": t * 1000 for stage, t in timing.items()},
+        )
+
+        row = {"participant_id": [P.participant_id]}
+        for stage in STARTUP_STAGES:
+            row[f"{stage}_ms"] = [timing[stage] * 1000 if stage in timing else None]
+
+        dt.Frame(row, stypes={f"{stage}_ms": dt.float64 for stage in STARTUP_STAGES}).to_csv(
+            "GripAperture_startup_timing.csv", append=True
+        )
+
     def setup_response_collector(self):
         # TODO: Not sure if optitracker can be integrated with ResponseCollector...
         pass
@@ -172,6 +250,7 @@ class GBYK_GripAperture(klibs.Experiment):
     def trial(self):
         hide_mouse_cursor()
         self.opti.start()
+        self.trial_started = perf_counter()
 
         # start optitracker
         reach_completed = False
@@ -181,37 +260,55 @@ class GBYK_GripAperture(klibs.Experiment):
         if self.block_task == KBYG:
             self.present_stimuli(show_target=True)
 
+        # go delay runs from when the hand has settled at rest; leaving rest restarts it, warned until back
+        warned = False
         while self.evm.before("go_signal"):
-            if get_key_state("space") == 0:
+            if not self.hand_settled():
+                self.evm.reset()
+
+            elif self.moved_prematurely():
                 self.evm.reset()
 
-                fill()
-                message(
-                    "Please keep your hand at rest until the go signal.",
-                    location=P.screen_c,
-                )
-                flip()
+                if not warned:
+                    self.present_stimuli(show_target=self.block_task == KBYG, rest_warning=True)
+                    warned = True
+
+            elif warned:
+                self.present_stimuli(show_target=self.block_task == KBYG)
+                warned = False
+
+        self.go()
 
         while self.evm.before("response_timeout"):
-            if get_key_state("space") == 1:
+            rt = self.movement_onset()
+            if rt is None:
                 ui_request()
             else:
-                rt = self.evm.time_elapsed
                 break
 
+        if rt is None:
+            rt = -1
+
+        self.rt = rt
+
         if self.block_task == GBYK:
-            print("target revealed")
+            log.debug("target revealed")
             self.present_stimuli(show_target=True)
 
         while self.evm.before("response_timeout"):
             q = pump(True)
             if key_pressed("space", queue=q):
-                mt = self.evm.time_elapsed - rt
+                mt = self.evm.time_elapsed - self.go_time - rt
                 reach_completed = True
                 break
 
         self.opti.stop()
 
+        # screened here, so a failed attempt is raised before klibs logs it; klibs then calls trial_clean_up()
+        # (once, from its handler) to store it, marked as recycled
+        self.trial_frames = self.opti.dataexport()
+        self.failures = self.screen_trial(self.trial_frames)
+
         if not reach_completed:
 
             fill()
@@ -223,6 +320,9 @@ class GBYK_GripAperture(klibs.Experiment):
             while feedback_period.counting():
                 ui_request()
 
+        if self.failures:
+            raise TrialException(f"Trial failed screening: {', '.join(self.failures)}")
+
         return {
             "block_num": P.block_number,
             "trial_num": P.trial_number,
@@ -237,90 +337,133 @@ class GBYK_GripAperture(klibs.Experiment):
             "reach_completed": reach_completed,
         }
 
-    def trial_clean_up(self):
-        trial_frames = self.opti.dataexport()
-
-        for asset in trial_frames.keys():
-            frame = trial_frames[asset]
-            frame[
-                :,
-                dt.update(
-                    **{
+    # Mocap used for rest detection while hand is being tracked, otherwise spacebar hold
+    def mocap_rest(self):
+        return self.rest is not None and self.rest.receiving()
+
+    # Whether hand has come to rest this trial (spacebar trials begin with it held, so at rest)
+    def hand_settled(self):
+        if self.mocap_rest():
+            return self.rest.settled
+
+        # no hand samples yet this trial; given a moment to arrive, before falling back on the spacebar
+        if self.rest is not None and self.rest.last_update is None:
+            return perf_counter() - self.trial_started > TRACKING_WAIT
+
+        return True
+
+    # Whether hand has left rest, having settled there, before the go signal
+    def moved_prematurely(self):
+        if self.mocap_rest():
+            return self.rest.settled and not self.rest.at_rest
+
+        return get_key_state("space") == 0
+
+    # Marks go signal onset (trial time, ms); response times run from here, and departures from rest are onsets
+    def go(self):
+        self.go_time = self.evm.time_elapsed
+
+        if self.rest is not None:
+            self.rest.arm()
+
+    # Response time (ms from go signal onset) once movement has begun, otherwise None
+    def movement_onset(self):
+        if self.mocap_rest():
+            if self.rest.onset is None:
+                return None
+
+            # backdated to the mocap frame at which the hand left rest
+            return self.evm.time_elapsed - self.rest.since(self.rest.onset) * 1000 - self.go_time
+
+        if get_key_state("space") == 1:
+            return None
+
+        return self.evm.time_elapsed - self.go_time
+
+    # Counts this attempt at the current trial & screens its frames; returns failures the trial is recycled on
+    def screen_trial(self, trial_frames):
+        key = (P.block_number, P.trial_number)
+        self.attempt = self.attempts[key] = self.attempts.get(key, 0) + 1
+
+        if not P.screen_trials:
+            return []
+
+        screening = screen_dataframes(trial_frames, P.hand_rigid_body_ID, self.rt)
+        failures = [f for f in screening.pop("failures") if f in P.recycle_trials_on]
+
+        self.optiscreen = dt.rbind(
+            self.optiscreen,
+            dt.Frame(
+                [
+                    {
                         "participant_id": P.participant_id,
-                        "practicing": P.practicing,
                         "block_num": P.block_number,
                         "trial_num": P.trial_number,
-                        "task_type": self.block_task,
-                        "target_size": self.target_size,
-                        "target_loc": self.target_loc,
-                        "distractor_size": self.distractor_size,
-                        "distractor_loc": self.distractor_loc,
+                        "attempt": self.attempt,
+                        "recycled": ";".join(failures),
+                        **screening,
                     }
-                ),
-            ]
-            print("----------------------------------\n\n")
-            print(f"data from B{P.block_number}-T{P.trial_number} clean up:\n")
-            print(frame)
-            print("----------------------------------\n\n")
-            frame.to_csv(
-                f"GripAperture_B{P.block_number}-T{P.trial_number}_{asset}_framedata.csv"
-            )
+                ]
+            ),
+        )
+        return failures
 
-            self.optidata[asset] = dt.rbind(self.optidata[asset], frame)
+    def trial_clean_up(self):
+        # frames are handed over by trial(); None if already stored (or trial() raised before exporting them)
+        trial_frames, self.trial_frames = self.trial_frames, None
+        if trial_frames is None:
+            return
+
+        annotations = {
+            "participant_id": P.participant_id,
+            "practicing": P.practicing,
+            "block_num": P.block_number,
+            "trial_num": P.trial_number,
+            "attempt": self.attempt,
+            "recycled": ";".join(self.failures),
+            "task_type": self.block_task,
+            "target_size": self.target_size,
+            "target_loc": self.target_loc,
+            "distractor_size": self.distractor_size,
+            "distractor_loc": self.distractor_loc,
+        }
 
-        trial_frames = self.opti.descexport()
+        self.optidata.add(trial_frames, annotations, P.block_number, P.trial_number, self.attempt)
+        self.optidesc.add(self.opti.descexport(), annotations, P.block_number, P.trial_number, self.attempt)
 
-        for asset in trial_frames.keys():
-            frame = trial_frames[asset]
-            frame[
-                :,
-                dt.update(
-                    **{
+        prediction_errors = self.opti.prediction_errors()
+        if prediction_errors:
+            frame = dt.Frame(
+                [
+                    {
                         "participant_id": P.participant_id,
-                        "practicing": P.practicing,
                         "block_num": P.block_number,
                         "trial_num": P.trial_number,
-                        "task_type": self.block_task,
-                        "target_size": self.target_size,
-                        "target_loc": self.target_loc,
-                        "distractor_size": self.distractor_size,
-                        "distractor_loc": self.distractor_loc,
+                        "attempt": self.attempt,
+                        "asset_ID": asset_ID,
+                        **summary,
                     }
-                ),
-            ]
-            print("----------------------------------\n\n")
-            print(f"desc from B{P.block_number}-T{P.trial_number} clean up:\n")
-            print(frame)
-            print("----------------------------------\n\n")
-            frame.to_csv(
-                f"GripAperture_B{P.block_number}-T{P.trial_number}_{asset}_framedesc.csv"
+                    for asset_ID, summary in prediction_errors.items()
+                ]
             )
-
-            self.optidesc[asset] = dt.rbind(self.optidesc[asset], frame)
+            self.optipred = dt.rbind(self.optipred, frame)
 
     def clean_up(self):
+        if self.monitor is not None:
+            log.info("Live monitor CPU usage: %.2f%%", self.monitor.cpu_usage() * 100)
+            self.monitor.stop()
 
-        for asset in self.optidata.keys():
-            print("----------------------------------\n\n")
-            print("exp data final clean_up:\n")
-            print(self.optidata[asset])
-            print("----------------------------------\n\n")
+        self.opti.stop_capture()
 
-            self.optidata[asset].to_csv(
-                f"GripAperture_{asset}_framedata.csv", append=True
-            )
+        self.optidata.write()
+        self.optidesc.write()
 
-        for asset in self.optidesc.keys():
-            print("----------------------------------\n\n")
-            print("exp desc final clean_up:\n")
-            print(self.optidesc[asset])
-            print("----------------------------------\n\n")
+        self.optipred.to_csv("GripAperture_prediction_error.csv", append=True)
+        self.optiscreen.to_csv("GripAperture_trial_screening.csv", append=True)
 
-            self.optidesc[asset].to_csv(
-                f"GripAperture_{asset}_framedesc.csv", append=True
-            )
+        shutdown_logging()
 
-    def present_stimuli(self, trial_prep=False, show_target=False, gbyk_dev=False):
+    def present_stimuli(self, trial_prep=False, show_target=False, gbyk_dev=False, rest_warning=False):
         fill()
 
         if trial_prep:
@@ -335,6 +478,12 @@ class GBYK_GripAperture(klibs.Experiment):
                 location=[P.screen_c[0], P.screen_c[1] // 3],
             )
 
+        if rest_warning:
+            message(
+                "Please keep your hand at rest until the go signal.",
+                location=[P.screen_c[0], P.screen_c[1] // 3],
+            )
+
         distractor_holder = self.placeholders[DISTRACTOR][self.distractor_size]
         distractor_holder.fill = GRUE
 
@@ -0,0 +1,11 @@
+# Modules under ExpAssets/Resources/code import one another by bare name, as klibs runs them
+import os
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CODE_DIR = os.path.join(PROJECT_DIR, "ExpAssets", "Resources", "code")
+
+# experiment.py (importable only where klibs is installed) sits at the project root
+for path in (CODE_DIR, PROJECT_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,123 @@
+# AsyncNatNetClient against a stand-in Motive command server on loopback
+import asyncio
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from AsyncNatNetClient import AsyncNatNetClient
+
+CLOCK_FREQUENCY = 10_000_000
+WAIT = 30
+
+
+# Answers NAT_CONNECT with server info, & FrameRate / Bitstream commands; ignores everything else
+class fakeMotive:
+    def __init__(self) -> None:
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(0.1)
+        self.port = self.sock.getsockname()[1]
+        self.commands = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def packet(message_id: int, payload: bytes) -> bytes:
+        return struct.pack("<HH", message_id, len(payload)) + payload
+
+    def _serve(self) -> None:
+        while not self._stop.is_set():
+            try:
+                data, client = self.sock.recvfrom(64 * 1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+
+            message_id = struct.unpack_from("<H", data)[0]
+            if message_id == AsyncNatNetClient.NAT_CONNECT:
+                info = b"Motive".ljust(256, b"\0") + bytes([3, 1, 0, 0]) + bytes([4, 1, 0, 0])
+                self.sock.sendto(self.packet(AsyncNatNetClient.NAT_SERVERINFO, info + struct.pack("<Q", CLOCK_FREQUENCY)), client)
+
+            elif message_id == AsyncNatNetClient.NAT_REQUEST:
+                command = data[4:].split(b"\0")[0].decode()
+                self.commands.append(command)
+                if command == "FrameRate":
+                    reply = struct.pack("<I", 120)
+                elif command == "Bitstream":
+                    reply = b"Bitstream,4.1\0"
+                else:
+                    self.sock.sendto(self.packet(AsyncNatNetClient.NAT_UNRECOGNIZED_REQUEST, b""), client)
+                    continue
+                self.sock.sendto(self.packet(AsyncNatNetClient.NAT_RESPONSE, reply), client)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.sock.close()
+
+
+@pytest.fixture
+def connected(tmp_path):
+    server = fakeMotive()
+    client = AsyncNatNetClient()
+    client.settings.update(server_ip="127.0.0.1", local_ip="127.0.0.1", command_port=server.port,
+                           use_multicast=False, multicast="255.255.255.255",
+                           description_cache_dir=str(tmp_path))
+    client.description_listener = lambda descriptions: None
+
+    assert client.startup()
+    assert client.server_info_received.wait(WAIT)
+    yield client, server
+
+    client.shutdown()
+    server.close()
+
+
+def test_server_info_on_connect(connected):
+    client, _ = connected
+
+    assert client.get_clock_frequency() == CLOCK_FREQUENCY
+    assert list(client.get_nat_net_version_server()[:2]) == [4, 1]
+
+
+def test_commands_from_many_threads(connected):
+    client, server = connected
+    commands = ["FrameRate", "Bitstream"] * 4
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = list(pool.map(client.send_command_async, commands))
+    responses = [future.result(WAIT) for future in futures]
+
+    assert responses == [120 if c == "FrameRate" else "Bitstream,4.1" for c in commands]
+    assert sorted(server.commands) == sorted(commands)
+
+
+def test_awaited_on_the_loop(connected):
+    client, _ = connected
+
+    async def both():
+        return await asyncio.gather(client.request("FrameRate"), client.request("Bitstream"))
+
+    assert asyncio.run_coroutine_threadsafe(both(), client.loop).result(WAIT) == [120, "Bitstream,4.1"]
+
+    with pytest.raises(ValueError):
+        asyncio.run_coroutine_threadsafe(client.request("Nonsense"), client.loop).result(WAIT)
+
+
+def test_shutdown_is_immediate_and_loop_reused(connected):
+    client, _ = connected
+    loop = client.loop
+
+    began = time.perf_counter()
+    client.shutdown()
+    assert time.perf_counter() - began < 0.5       # no receive threads to time out
+
+    assert client.startup()
+    assert client.loop is loop
+    assert client.send_command_async("FrameRate").result(WAIT) == 120
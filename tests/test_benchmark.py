@@ -0,0 +1,82 @@
+# Session benchmark: synthetic frames shaped as NatNetClient's, a short session run end to end, & its thresholds
+import json
+import os
+
+import pytest
+
+from Benchmark import (
+    syntheticClient, run_benchmark, check_thresholds, main, HAND_ID, MARKER_SET, REACH_ONSET, REACH_DURATION,
+    REACH_DISTANCE, CLOCK_FREQUENCY, SERVER_LATENCY
+)
+from OptiTracker import DATAFRAME_ASSETS
+
+
+def test_trial_frames_follow_the_reach():
+    client = syntheticClient(rate=100, markers=3, trial_duration=2.0)
+    frames = list(client.trial_frames())
+    assert len(frames) == 200
+    assert [frame['Prefix'][0][0][0] for frame in frames[:3]] == [1, 2, 3]
+
+    hand = lambda frame: next(body for body in frame['RigidBodies'][0] if body[0] == HAND_ID)
+    at_rest, reached = hand(frames[int(REACH_ONSET * 100) - 1]), hand(frames[-1])
+    assert abs(at_rest[1]) < 0.005
+    assert reached[1] == pytest.approx(REACH_DISTANCE, abs=0.005)
+    assert len(frames[0]['MarkerSets'][0]) == 3
+    assert frames[0]['MarkerSets'][0][0][0] == MARKER_SET
+
+    # suffix stamps: transmit - exposure is the server latency, in clock ticks
+    suffix = frames[0]['Suffix'][0][0]
+    assert suffix[4] - suffix[3] == int(SERVER_LATENCY * CLOCK_FREQUENCY)
+
+    # frame numbers continue across trials, as from a server left running
+    assert next(client.trial_frames())['Prefix'][0][0][0] == 201
+
+
+def test_descriptions_on_startup():
+    client = syntheticClient(rigid_bodies=3, markers=5)
+    received = []
+    client.description_listener = received.append
+
+    assert client.startup()
+    [descriptions] = received
+    assert len(descriptions['MarkerSets'][0]) == 5
+    assert [bodies[0]['asset_ID'] for bodies in descriptions['RigidBodies']] == [HAND_ID, HAND_ID + 1, HAND_ID + 2]
+
+
+def test_short_session(tmp_path):
+    duration, rate = REACH_ONSET + REACH_DURATION + 0.2, 60
+    results = run_benchmark(str(tmp_path), blocks=2, trials=3, rate=rate, trial_duration=duration)
+
+    assert results["trials"] == 6
+    assert results["frames"] == 6 * int(duration * rate)
+    assert results["rows"]["RigidBodies"] == 6 * int(duration * rate) * 2
+    assert len(results["cleanup_ms"]) == 6
+
+    for asset in DATAFRAME_ASSETS:
+        if results["rows"][asset]:
+            assert os.path.exists(tmp_path / f"GripAperture_{asset}_framedata.csv")
+    assert os.path.exists(tmp_path / "GripAperture_B2-T3_RigidBodies_framedata.csv")
+    assert os.path.exists(tmp_path / "GripAperture_trial_screening.csv")
+
+
+def test_threshold_breaches():
+    results = {
+        "peak_rss_mb": 100.0, "cleanup_p95_ms": 5.0, "cleanup_growth": 1.1, "final_write_s": 0.1, "headroom": 20.0,
+    }
+    assert check_thresholds(results) == []
+
+    slow = dict(results, cleanup_p95_ms=500.0, headroom=1.0, peak_rss_mb=None)
+    breaches = check_thresholds(slow)
+    assert len(breaches) == 2
+    assert breaches[0].startswith("p95 clean-up")
+    assert breaches[1].startswith("ingest headroom")
+
+
+def test_exit_code_from_thresholds(tmp_path, capsys):
+    args = ["--blocks", "1", "--trials", "2", "--trial-duration", "0.5", "--out", str(tmp_path)]
+
+    assert main(args + ["--json", str(tmp_path / "pass.json")]) == 0
+    assert json.loads((tmp_path / "pass.json").read_text())["breaches"] == []
+
+    assert main(args + ["--min-headroom", "1e12"]) == 1
+    assert "FAIL: ingest headroom" in capsys.readouterr().out
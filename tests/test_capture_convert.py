@@ -0,0 +1,130 @@
+# Capture conversion: frames decoded by row emitters into columns, split by version & chunk, joined in frame order
+import struct
+
+import datatable as dt
+import pytest
+
+from CaptureLog import captureWriter
+from CaptureConvert import (
+    frame_sections, column_buffers, decode_frame, split_capture, convert_capture, NAT_SERVERINFO, NAT_FRAMEOFDATA
+)
+from ChannelSeries import channelSeries
+
+
+def message(message_id: int, payload: bytes) -> bytes:
+    return struct.pack('<HH', message_id, len(payload) & 0xFFFF) + payload
+
+
+def server_info(version: tuple) -> bytes:
+    return message(NAT_SERVERINFO, b'Motive'.ljust(256, b'\0') + bytes([3, 1, 0, 0]) + bytes(version + (0, 0))
+                   + struct.pack('<Q', 10_000_000))
+
+
+def section(count: int, body: bytes = b'') -> bytes:
+    return struct.pack('<II', count, len(body)) + body
+
+
+def force_plate(plate_ID: int, samples: list) -> bytes:
+    return section(1, struct.pack('<II', plate_ID, 1) + struct.pack(f'<I{len(samples)}f', len(samples), *samples))
+
+
+# A frame of one named marker set, one rigid body & one labeled marker, each placed by frame number
+def frame(n: int, version: tuple = (4, 1), plate: bytes = None) -> bytes:
+    x = n * 0.001
+    body = struct.pack('<I', n)
+    body += section(1, b'Hand\0' + struct.pack('<I3f', 1, x, 0.5, 0.25))
+    body += section(0)
+    body += section(1, struct.pack('<I8fh', 7, x, 0.1, 0.2, 1.0, 0.0, 0.0, 0.0, 0.0002, 1))
+    body += section(0)
+    if version >= (4, 1):
+        body += section(0)
+    body += section(1, struct.pack('<I4fhf', (3 << 16) | 12, x, 0.5, 0.25, 0.014, 0, 0.0003))
+    body += plate if plate is not None else section(0)
+    body += section(0)
+    body += struct.pack('<IIQQQQ', 0, 0, n, n * 10, n * 10 + 5, n * 10 + 9)
+    if version >= (4, 1):
+        body += struct.pack('<II', n, 0)
+    body += struct.pack('<h', 1)
+    return message(NAT_FRAMEOFDATA, body)
+
+
+def capture(path, frames: list, version: tuple = (4, 1)) -> str:
+    writer = captureWriter(str(path))
+    writer.mark()
+    writer.write(server_info(version), 0.0)
+    for n in frames:
+        writer.write(frame(n, version), n / 120)
+    writer.close()
+    return str(path)
+
+
+def test_asset_markers_only_from_4_1():
+    assert 'AssetMarkers' in dict(frame_sections((4, 1)))
+    assert 'AssetMarkers' in dict(frame_sections(None))
+    assert 'AssetMarkers' not in dict(frame_sections((3, 1)))
+
+
+@pytest.mark.parametrize("version", [(4, 1), (3, 1)])
+def test_frame_decoded_into_columns(version):
+    packet = frame(42, version)
+    columns = column_buffers(version)
+
+    assert decode_frame(packet, version, columns, received=1.5) == len(packet)
+
+    rigid_body = columns['RigidBodies']
+    assert rigid_body[0] == [7]
+    assert rigid_body[1][0] == pytest.approx(0.042)
+    assert rigid_body[-2:] == [[42], [1.5]]         # frame_number, received
+
+    labeled = columns['LabeledMarkerSet']
+    assert (labeled[0], labeled[1]) == ([12], [3])  # marker & model IDs, decoded from the encoded ID
+    assert columns['MarkerSets'][0] == ['Hand']
+    assert columns['Suffix'][2] == [42]
+
+
+def test_channels_scanned_when_series_given():
+    packet = frame(5, plate=force_plate(2, [1.0, 2.0, 3.0]))
+    channels = channelSeries()
+
+    assert decode_frame(packet, (4, 1), column_buffers((4, 1)), channels=channels) == len(packet)
+    plates = channels.to_frames()['ForcePlates']
+    assert plates[:, 'value'].to_list()[0] == [1.0, 2.0, 3.0]
+    assert set(plates[:, 'frame_number'].to_list()[0]) == {5}
+
+    # without a series, the section is skipped whole
+    assert decode_frame(packet, (4, 1), column_buffers((4, 1))) == len(packet)
+
+
+def test_ranges_split_by_chunk_and_version(tmp_path):
+    path = str(tmp_path / "s.natcap")
+    writer = captureWriter(path)
+    writer.mark()
+    writer.write(server_info((3, 1)))
+    for n in range(1, 6):
+        writer.write(frame(n, (3, 1)))
+    writer.write(server_info((4, 1)))
+    for n in range(6, 9):
+        writer.write(frame(n))
+    writer.close()
+
+    ranges = split_capture(path, chunk_frames=2)
+    assert [(r.frames, r.version[:2]) for r in ranges] == [(2, (3, 1)), (2, (3, 1)), (1, (3, 1)), (2, (4, 1)), (1, (4, 1))]
+    assert all(a.end <= b.start for a, b in zip(ranges, ranges[1:]))
+
+
+def test_parallel_conversion_matches_serial(tmp_path):
+    path = capture(tmp_path / "s.natcap", range(1, 301))
+
+    serial = convert_capture(path, str(tmp_path / "serial"), workers=1, chunk_frames=64)
+    parallel = convert_capture(path, str(tmp_path / "parallel"), workers=2, chunk_frames=64)
+    assert serial["frames"] == parallel["frames"] == 300
+    assert serial["ranges"] == 5
+
+    for asset in ("RigidBodies", "LabeledMarkerSet", "MarkerSets", "Suffix"):
+        one = dt.fread(str(tmp_path / "serial" / f"s_{asset}.jay"))
+        many = dt.fread(str(tmp_path / "parallel" / f"s_{asset}.jay"))
+        assert one.to_list() == many.to_list()
+        assert one[:, 'frame_number'].to_list()[0] == list(range(1, 301))
+
+    # sections with no rows aren't written
+    assert not (tmp_path / "serial" / "s_Skeletons.jay").exists()
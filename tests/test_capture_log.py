@@ -0,0 +1,35 @@
+# Session captures: numbered rather than overwritten when a session is run again
+import pytest
+
+from CaptureLog import captureReader, captureWriter, capture_path
+
+
+def write_capture(path, packets):
+    writer = captureWriter(path)
+    writer.mark()
+    for packet in packets:
+        writer.write(packet)
+    writer.close()
+
+
+def test_capture_path_numbers_repeat_sessions(tmp_path):
+    first = capture_path("GripAperture", 3, str(tmp_path))
+    assert first.endswith("GripAperture_3.natcap")
+    write_capture(first, [b"\x07\x00first"])
+
+    second = capture_path("GripAperture", 3, str(tmp_path))
+    assert second.endswith("GripAperture_3-2.natcap")
+    write_capture(second, [b"\x07\x00second"])
+
+    assert capture_path("GripAperture", 3, str(tmp_path)).endswith("GripAperture_3-3.natcap")
+    assert [r.packet for r in captureReader(first) if not r.is_mark] == [b"\x07\x00first"]
+
+
+def test_writer_refuses_existing_capture(tmp_path):
+    path = str(tmp_path / "GripAperture_3.natcap")
+    write_capture(path, [b"\x07\x00kept"])
+
+    with pytest.raises(FileExistsError):
+        captureWriter(path)
+
+    assert [r.packet for r in captureReader(path) if not r.is_mark] == [b"\x07\x00kept"]
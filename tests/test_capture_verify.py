@@ -0,0 +1,134 @@
+# Capture verification: frames walked from counts & sizes; bad sections, headers, frame numbers & truncation reported
+import os
+import struct
+
+import pytest
+
+from CaptureLog import captureWriter, RECORD, HEADER
+from CaptureVerify import verify_frame, verify_capture, main
+
+V41, V31 = (4, 1), (3, 1)
+
+
+def with_header(message_id: int, payload: bytes) -> bytes:
+    return struct.pack('<HH', message_id, len(payload)) + payload
+
+
+def counted(count: int, body: bytes = b'') -> bytes:
+    return struct.pack('<II', count, len(body)) + body
+
+
+# A well formed frame, as streamed: sections in packet order, the suffix, then the zero end of data tag
+def frame_packet(frame_number: int, version: tuple = V41) -> bytes:
+    sections = [
+        struct.pack('<I', frame_number),
+        counted(1, b'Grippy\0' + struct.pack('<I6f', 2, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6)),
+        counted(0),
+        counted(2, struct.pack('<I8fh', 1, *[0.5] * 8, 1) + struct.pack('<I8fh', 2, *[0.25] * 8, 1)),
+        counted(1, struct.pack('<II', 9, 1) + struct.pack('<I8fh', 91, *[0.0] * 8, 1)),
+    ]
+    if version >= V41:
+        sections.append(counted(1, struct.pack('<II', 5, 0) + struct.pack('<I', 1) + struct.pack('<I4fhf', 51, 0, 0, 0, 0.01, 0, 0)))
+    sections += [
+        counted(1, struct.pack('<I4fhf', 3, 0.1, 0.2, 0.3, 0.014, 0, 0.0002)),
+        counted(1, struct.pack('<II', 1, 2) + struct.pack('<I2f', 2, 1.0, 2.0) + struct.pack('<I', 0)),
+        counted(0),
+        struct.pack('<IIQQQQ', 0, 0, frame_number, 1, 2, 3)
+        + (struct.pack('<II', 0, 0) if version >= V41 else b'')
+        + struct.pack('<h', 0),
+        struct.pack('<I', 0),
+    ]
+    return with_header(7, b''.join(sections))
+
+
+def server_info(version: tuple) -> bytes:
+    return with_header(1, b'Motive'.ljust(256, b'\0') + bytes([3, 1, 0, 0]) + bytes(version + (0, 0)) + bytes(8))
+
+
+def write_capture(path, connections) -> str:
+    writer = captureWriter(str(path))
+    for version, packets in connections:
+        writer.mark()
+        writer.write(server_info(version))
+        for packet in packets:
+            writer.write(packet)
+    writer.close()
+    return str(path)
+
+
+@pytest.mark.parametrize("version", [V41, V31])
+def test_clean_frames_walk_to_the_end(version):
+    assert verify_frame(frame_packet(1, version), version, deep=True) is None
+
+
+def test_section_size_disagreement_located():
+    packet = bytearray(frame_packet(1))
+    marker_sets = struct.unpack_from('<I', packet, 12)[0]
+    rigid_bodies = 8 + 8 + marker_sets + 8          # header, prefix, MarkerSets, empty LegacyMarkerSet
+    struct.pack_into('<I', packet, rigid_bodies + 4, 38 * 2 + 4)
+
+    section, offset, message = verify_frame(bytes(packet), V41)
+    assert section == 'RigidBodies'
+    assert offset == rigid_bodies + 8 + 38 * 2
+    assert "packet_size declares 80" in message
+
+
+def test_version_mismatch_and_end_of_data_tag():
+    # read as 3.1, the asset section is taken for labeled markers
+    section, _, message = verify_frame(frame_packet(1, V41), V31)
+    assert section == 'LabeledMarkerSet'
+    assert "packet_size declares 38" in message
+
+    packet = bytearray(frame_packet(1))
+    packet[-4:] = b'\x01\0\0\0'
+    assert verify_frame(bytes(packet), V41)[:2] == ('Suffix', len(packet) - 4)
+
+
+def test_clean_capture(tmp_path, capsys):
+    path = write_capture(tmp_path / "clean.natcap", [
+        (V41, [frame_packet(n) for n in range(1, 50)]),
+        (V41, [frame_packet(n) for n in range(1, 10)]),       # a reconnect may restart frame numbers
+        (V31, [frame_packet(n, V31) for n in range(10, 20)]),
+    ])
+
+    problems, stats = verify_capture(path, deep=True)
+    assert problems == []
+    assert stats["frames"] == 49 + 9 + 10
+
+    assert main([path]) == 0
+    assert "no problems found" in capsys.readouterr().out
+
+
+def test_corrupted_capture_reported(tmp_path, capsys):
+    bad_header = bytearray(frame_packet(3))
+    struct.pack_into('<H', bad_header, 2, 12)
+    path = write_capture(tmp_path / "bad.natcap", [
+        (V41, [frame_packet(1), frame_packet(2), bytes(bad_header), frame_packet(2), frame_packet(5)]),
+    ])
+
+    problems, stats = verify_capture(path)
+    assert stats["bad_packets"] == 2
+    assert [(p.frame_number, p.section) for p in problems] == [(3, 'Header'), (2, 'Prefix')]
+
+    # offsets locate the bad bytes within the file
+    header_problem = problems[0]
+    with open(path, 'rb') as f:
+        f.seek(header_problem.file_offset)
+        assert struct.unpack('<H', f.read(2))[0] == 12
+
+    assert main([path, "--limit", "1"]) == 1
+    out = capsys.readouterr().out
+    assert "2 bad packets" in out
+    assert "1 more" in out
+
+
+def test_truncated_capture_reported(tmp_path):
+    path = write_capture(tmp_path / "cut.natcap", [(V41, [frame_packet(n) for n in range(1, 6)])])
+    os.truncate(path, os.path.getsize(path) - 20)
+
+    problems, stats = verify_capture(path)
+    assert stats["frames"] == 4
+    [problem] = problems
+    assert problem.section == 'Capture'
+    assert problem.file_offset == problem.record_offset     # at the record header of the partial packet
+    assert problem.record_offset > HEADER.size + RECORD.size
@@ -0,0 +1,90 @@
+# Analog channels: force plate & device sections scanned into per-channel float32 views, stored contiguously per channel
+import struct
+
+import numpy as np
+import pytest
+
+from ChannelSeries import channelBuffer, channelSeries, CHANNEL_COLS
+from DataUnpackers import forcePlatesData, devicesData
+
+VERSION = [4, 1]
+
+
+# Section bytes for {asset_ID: [samples per channel]}
+def analog_section(assets: dict) -> bytes:
+    body = b''
+    for asset_ID, channels in assets.items():
+        body += struct.pack('<II', asset_ID, len(channels))
+        for samples in channels:
+            body += struct.pack(f'<I{len(samples)}f', len(samples), *samples)
+    return struct.pack('<II', len(assets), len(body)) + body
+
+
+PLATES = analog_section({1: [[0.5, 1.5, 2.5], [-1.0]], 2: [[]]})
+
+
+def test_channels_viewed_in_place():
+    section = forcePlatesData(PLATES + b'\xff' * 8, VERSION, lazy=True)
+    channels = section.channels()
+
+    assert list(channels) == [(1, 0), (1, 1), (2, 0)]
+    assert channels[(1, 0)].tolist() == [0.5, 1.5, 2.5]
+    assert channels[(1, 0)].dtype == np.float32
+    assert channels[(2, 0)].size == 0
+    assert section.relative_offset() == len(PLATES)
+
+
+def test_scanned_rows_match_parsed():
+    scanned = list(devicesData(PLATES, VERSION, lazy=True).rows())
+    parsed = devicesData(PLATES, VERSION).data()
+
+    assert scanned == [(1, "Device", 0, 0.5), (1, "Device", 0, 1.5), (1, "Device", 0, 2.5), (1, "Device", 1, -1.0)]
+    assert [(row['parent_ID'], row['parent_type'], row['value']) for row in parsed] == [
+        (asset_ID, parent_type, value) for asset_ID, parent_type, _, value in scanned
+    ]
+
+
+@pytest.mark.parametrize("slack", [-4, 4])
+def test_packet_size_mismatch_rejected(slack):
+    count, packet_size = struct.unpack_from('<II', PLATES)
+    corrupt = struct.pack('<II', count, packet_size + slack) + PLATES[8:] + bytes(8)
+
+    with pytest.raises(ValueError):
+        forcePlatesData(corrupt, VERSION, lazy=True).channels()
+
+
+def test_buffer_grows_and_indexes_frames():
+    buffer = channelBuffer(samples=4, frames=2)
+    for frame_number in range(10, 15):
+        buffer.append(frame_number, np.arange(3, dtype=np.float32) + frame_number)
+
+    assert buffer.nsamples == 15
+    assert buffer.series().tolist()[:6] == [10, 11, 12, 11, 12, 13]
+    assert buffer.frame(4).tolist() == [14, 15, 16]
+
+    frame_numbers, starts = buffer.frame_index()
+    assert frame_numbers.tolist() == [10, 11, 12, 13, 14]
+    assert starts.tolist() == [0, 3, 6, 9, 12]
+
+    per_sample, sample = buffer.sample_index()
+    assert per_sample.tolist() == np.repeat([10, 11, 12, 13, 14], 3).tolist()
+    assert sample.tolist() == [0, 1, 2] * 5
+
+
+def test_series_across_frames_and_export():
+    series = channelSeries()
+    for frame_number in (1, 2):
+        series.append("ForcePlate", frame_number, forcePlatesData(PLATES, VERSION, lazy=True).channels())
+    series.append("Device", 2, {(7, 0): np.array([9.0], dtype=np.float32)})
+
+    assert len(series) == 4
+    assert series.channels("ForcePlate") == [(1, 0), (1, 1), (2, 0)]
+    assert series.series("ForcePlate", 1, 0).tolist() == [0.5, 1.5, 2.5] * 2
+    assert series.series("ForcePlate", 9, 9).size == 0
+
+    plates = series.to_frames()["ForcePlate"]
+    assert plates.names == CHANNEL_COLS
+    assert plates.nrows == 8
+    assert plates[:, 'frame_number'].to_list()[0] == [1, 1, 1, 2, 2, 2, 1, 2]
+    assert plates[:, 'sample'].to_list()[0] == [0, 1, 2, 0, 1, 2, 0, 0]
+    assert series.to_frames()["Device"][:, 'value'].to_list()[0] == [9.0]
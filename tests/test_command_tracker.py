@@ -0,0 +1,117 @@
+# commandTracker: one request on the wire at a time, retried when unanswered, late responses absorbed
+import threading
+
+import pytest
+from concurrent.futures import TimeoutError, CancelledError
+
+from CommandTracker import commandTracker, NAT_UNRECOGNIZED_REQUEST
+
+NAT_RESPONSE = 3
+TIMEOUT = 0.05
+WAIT = 2.0
+
+
+class fakeSocket:
+    def __init__(self) -> None:
+        self.sent = []
+        self._sent = threading.Condition()
+
+    def sender(self, command_str: str):
+        def send() -> int:
+            with self._sent:
+                self.sent.append(command_str)
+                self._sent.notify_all()
+            return len(command_str)
+        return send
+
+    # Blocks until n sends have been made in total
+    def await_sent(self, n: int) -> list:
+        with self._sent:
+            assert self._sent.wait_for(lambda: len(self.sent) >= n, WAIT)
+            return list(self.sent)
+
+
+def test_requests_sent_one_at_a_time():
+    tracker, wire = commandTracker(), fakeSocket()
+    first = tracker.request("Bitstream", wire.sender("Bitstream"), timeout=WAIT)
+    second = tracker.request("FrameRate", wire.sender("FrameRate"), timeout=WAIT)
+
+    assert wire.sent == ["Bitstream"]
+    assert tracker.outstanding() == 2
+
+    tracker.resolve(NAT_RESPONSE, "4.1")
+    assert first.result(0) == "4.1"
+    assert wire.sent == ["Bitstream", "FrameRate"]
+
+    tracker.resolve(NAT_RESPONSE, 120)
+    assert second.result(0) == 120
+    assert tracker.outstanding() == 0
+
+
+def test_unanswered_request_retried_then_times_out():
+    tracker, wire = commandTracker(), fakeSocket()
+    future = tracker.request("Bitstream", wire.sender("Bitstream"), timeout=TIMEOUT, retries=2)
+
+    with pytest.raises(TimeoutError):
+        future.result(WAIT)
+
+    assert wire.sent == ["Bitstream"] * 3
+    assert tracker.outstanding() == 0
+
+
+def test_response_to_retry_settles_request():
+    tracker, wire = commandTracker(), fakeSocket()
+    future = tracker.request("Bitstream", wire.sender("Bitstream"), timeout=TIMEOUT, retries=2)
+
+    wire.await_sent(2)
+    tracker.resolve(NAT_RESPONSE, "4.1")
+
+    assert future.result(0) == "4.1"
+
+
+def test_late_response_absorbed():
+    tracker, wire = commandTracker(), fakeSocket()
+    first = tracker.request("Bitstream", wire.sender("Bitstream"), timeout=WAIT / 4, retries=1)
+    wire.await_sent(2)      # first attempt went unanswered in time; re-sent
+    second = tracker.request("FrameRate", wire.sender("FrameRate"), timeout=WAIT)
+
+    # answers to both attempts arrive: the first settles the request, the second mustn't settle the next
+    tracker.resolve(NAT_RESPONSE, "4.1")
+    assert wire.sent == ["Bitstream", "Bitstream"]
+    tracker.resolve(NAT_RESPONSE, "4.1")
+
+    assert first.result(0) == "4.1"
+    assert wire.await_sent(3)[-1] == "FrameRate"
+    assert not second.done()
+
+    tracker.resolve(NAT_RESPONSE, 120)
+    assert second.result(0) == 120
+
+
+def test_missing_late_response_stops_being_awaited():
+    tracker, wire = commandTracker(), fakeSocket()
+    first = tracker.request("Bitstream", wire.sender("Bitstream"), timeout=TIMEOUT, retries=1)
+    wire.await_sent(2)
+    second = tracker.request("FrameRate", wire.sender("FrameRate"), timeout=WAIT)
+
+    tracker.resolve(NAT_RESPONSE, "4.1")    # only one attempt ever answered
+
+    assert first.result(0) == "4.1"
+    assert wire.await_sent(3)[-1] == "FrameRate"
+    assert not second.done()
+    tracker.cancel_all()
+
+
+def test_unrecognized_and_cancelled_requests_fail():
+    tracker, wire = commandTracker(), fakeSocket()
+    unknown = tracker.request("Nonsense", wire.sender("Nonsense"), timeout=WAIT)
+    queued = tracker.request("FrameRate", wire.sender("FrameRate"), timeout=WAIT)
+
+    tracker.resolve(NAT_UNRECOGNIZED_REQUEST, None)
+    with pytest.raises(ValueError):
+        unknown.result(0)
+
+    tracker.cancel_all()
+    with pytest.raises(CancelledError):
+        queued.result(0)
+    assert tracker.outstanding() == 0
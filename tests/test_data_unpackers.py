@@ -0,0 +1,83 @@
+# Record fast paths: rows read by struct from scanned sections match those Construct parses
+import struct
+
+import pytest
+
+from DataUnpackers import markerSetsData, skeletonsData, assetsData, rigidBodiesData
+
+VERSION = [4, 1]
+RIGID_BODY = struct.Struct('<I8fh')
+ASSET_MARKER = struct.Struct('<I4fhf')
+
+
+def section(body: bytes, child_count: int) -> bytes:
+    return struct.pack('<II', child_count, len(body)) + body
+
+
+def rigid_body(asset_ID: int) -> bytes:
+    return RIGID_BODY.pack(asset_ID, asset_ID * 0.5, 0.25, -0.5, 1.0, 0.0, 0.0, 0.0, 0.0001 * asset_ID, 1)
+
+
+MARKER_SETS = section(
+    b'Hand\x00' + struct.pack('<I6f', 2, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0)
+    + b'all\x00' + struct.pack('<I3f', 1, -1.0, -2.0, -3.0)
+    + b'empty\x00' + struct.pack('<I', 0),
+    child_count=3,
+)
+
+SKELETONS = section(
+    struct.pack('<II', 1, 2) + rigid_body(11) + rigid_body(12)
+    + struct.pack('<II', 2, 1) + rigid_body(21),
+    child_count=2,
+)
+
+ASSETS = section(
+    struct.pack('<II', 5, 1) + rigid_body(5) + struct.pack('<I', 2)
+    + ASSET_MARKER.pack(51, 0.5, 0.5, 0.5, 0.01, 0, 0.0005) + ASSET_MARKER.pack(52, 1.5, 1.5, 1.5, 0.01, 1, 0.001)
+    + struct.pack('<II', 6, 0) + struct.pack('<I', 1)
+    + ASSET_MARKER.pack(61, -0.5, -0.5, -0.5, 0.02, 0, 0.002),
+    child_count=2,
+)
+
+
+def parsed_rows(unpacker: type, packet: bytes) -> list:
+    parsed = unpacker(packet, VERSION)
+    return [tuple(child[field] for field in unpacker.FIELDS) for child in parsed._children()]
+
+
+@pytest.mark.parametrize("unpacker, packet, n_rows", [
+    (markerSetsData, MARKER_SETS, 3),
+    (skeletonsData, SKELETONS, 3),
+    (assetsData, ASSETS, 3),
+])
+def test_scanned_rows_match_parsed(unpacker, packet, n_rows):
+    trailing = packet + b'\xff' * 16        # sections are handed the rest of the frame
+
+    scanned = unpacker(trailing, VERSION, lazy=True)
+
+    assert scanned._framedata is None
+    assert list(scanned.rows()) == parsed_rows(unpacker, packet)
+    assert len(list(scanned.rows())) == n_rows
+    assert scanned.relative_offset() == len(packet)
+
+
+def test_marker_set_names_lead_rows():
+    rows = list(markerSetsData(MARKER_SETS, VERSION, lazy=True).rows())
+
+    assert [row[0] for row in rows] == ['Hand', 'Hand', 'all']
+    assert rows[1] == ('Hand', 2.0, 2.5, 3.0)
+
+
+def test_skeleton_bones_read_as_rigid_bodies():
+    bones = list(skeletonsData(SKELETONS, VERSION, lazy=True).rows())
+    bodies = list(rigidBodiesData(section(rigid_body(11) + rigid_body(12) + rigid_body(21), 3), VERSION, lazy=True).rows())
+
+    assert bones == bodies
+
+
+def test_packet_size_mismatch_rejected():
+    child_count, packet_size = struct.unpack_from('<II', SKELETONS)
+    corrupt = struct.pack('<II', child_count, packet_size + 4) + SKELETONS[8:] + bytes(4)
+
+    with pytest.raises(ValueError):
+        skeletonsData(corrupt, VERSION, lazy=True)
@@ -0,0 +1,91 @@
+# Model definition cache: hits count as the latest seen; held definitions are re-validated on each startup
+import socket
+
+import pytest
+
+from DescriptionCache import descriptionCache
+from NatNetClient import NatNetClient
+
+HAND = {"RigidBodies": [[{"asset_ID": 1}]], "MarkerSets": []}
+HAND_AND_CUP = {"RigidBodies": [[{"asset_ID": 1}], [{"asset_ID": 2}]], "MarkerSets": []}
+
+
+def test_descriptions_persist_across_instances(tmp_path):
+    key = descriptionCache.key(b"modeldef")
+    descriptionCache(str(tmp_path)).put(key, HAND)
+
+    reopened = descriptionCache(str(tmp_path))
+    assert reopened.get(key) == HAND
+    assert reopened.latest() == HAND
+    assert reopened.get(descriptionCache.key(b"other")) is None
+
+
+def test_cache_hit_becomes_latest(tmp_path):
+    cache = descriptionCache(str(tmp_path))
+    hand, hand_and_cup = descriptionCache.key(b"hand"), descriptionCache.key(b"hand & cup")
+    cache.put(hand, HAND)
+    cache.put(hand_and_cup, HAND_AND_CUP)
+
+    # models reverted to an earlier definition: served from cache, & so what the next run should trust
+    assert cache.get(hand) == HAND
+    assert cache.latest() == HAND
+    assert descriptionCache(str(tmp_path)).latest() == HAND
+
+
+def test_unreadable_entries_are_misses(tmp_path):
+    cache = descriptionCache(str(tmp_path))
+    key = descriptionCache.key(b"modeldef")
+    cache.put(key, HAND)
+
+    (tmp_path / f"{key}.json").write_text("{ truncated")
+    assert descriptionCache(str(tmp_path)).get(key) is None
+
+
+@pytest.fixture
+def offline_client(monkeypatch, tmp_path):
+    client = NatNetClient()
+    client.settings.update(server_ip="127.0.0.1", use_multicast=False, description_cache_dir=str(tmp_path))
+    client.description_cache = descriptionCache(str(tmp_path))
+
+    # loopback sockets in place of a server connection; requests are recorded, not sent
+    def loopback(*_) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("127.0.0.1", 0))
+        return sock
+
+    monkeypatch.setattr(client, "_NatNetClient__create_data_socket", loopback)
+    monkeypatch.setattr(client, "_NatNetClient__create_command_socket", loopback)
+    client.requests = []
+    monkeypatch.setattr(client, "send_request", lambda sock, command, *_: client.requests.append(command))
+
+    client.delivered = []
+    client.description_listener = client.delivered.append
+
+    yield client
+
+    # a closed socket doesn't wake a blocked recvfrom; a datagram does, once threads are told to stop
+    client.stop_threads = True
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as waker:
+        for sock in (client.data_socket, client.command_socket):
+            waker.sendto(b"", sock.getsockname())
+    client.shutdown()
+
+
+def test_startup_serves_held_descriptions_and_rerequests(offline_client):
+    offline_client.current_descriptions = HAND     # held from the previous trial's connection
+
+    assert offline_client.startup()
+
+    assert offline_client.delivered == [HAND]
+    assert NatNetClient.NAT_REQUEST_MODELDEF in offline_client.requests
+    assert offline_client.modeldef_pending
+
+
+def test_startup_serves_trusted_cache(offline_client):
+    offline_client.description_cache.put(descriptionCache.key(b"modeldef"), HAND_AND_CUP)
+    offline_client.settings["trust_cached_descriptions"] = True
+
+    assert offline_client.startup()
+
+    assert offline_client.delivered == [HAND_AND_CUP]
+    assert NatNetClient.NAT_REQUEST_MODELDEF in offline_client.requests
@@ -0,0 +1,87 @@
+# Streaming & batch low-pass filters: the scipy and numpy batch paths, and per-frame streaming, all agree
+import numpy as np
+import pytest
+
+import Filters
+from Filters import biquadCascade, butter_sos, filtfilt, savgol, sosfilt
+
+FRAME_RATE = 120
+
+
+def trajectory(n_frames: int = 240, n_channels: int = 3, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(0, 0.01, (n_frames, n_channels)).cumsum(axis=0) + 0.5
+
+
+def test_butter_sos_matches_scipy():
+    signal = pytest.importorskip("scipy.signal")
+
+    impulse = np.zeros(200)
+    impulse[0] = 1.0
+
+    # sections may be ordered (and gain split) differently; the cascade's response is what must agree
+    for order, cutoff in [(2, 6.0), (4, 10.0), (6, 20.0)]:
+        expected = signal.butter(order, cutoff, fs=FRAME_RATE, output="sos")
+        actual = butter_sos(order, cutoff, FRAME_RATE)
+        assert np.allclose(signal.sosfilt(actual, impulse), signal.sosfilt(expected, impulse), atol=1e-12)
+
+
+@pytest.mark.parametrize("n_channels", [1, 2, 3, 6])
+def test_scipy_and_numpy_paths_match(monkeypatch, n_channels):
+    pytest.importorskip("scipy.signal")
+    sos = butter_sos(4, 10.0, FRAME_RATE)
+    x = trajectory(n_channels=n_channels)
+
+    with_scipy = sosfilt(sos, x)
+    monkeypatch.setattr(Filters, "_scipy_sosfilt", None)
+    with_numpy = sosfilt(sos, x)
+
+    assert with_scipy.shape == x.shape
+    assert np.allclose(with_scipy, with_numpy, atol=1e-12)
+
+
+def test_streaming_matches_batch():
+    sos = butter_sos(4, 10.0, FRAME_RATE)
+    x = trajectory()
+
+    cascade = biquadCascade(sos, n_channels=3)
+    streamed = np.array([cascade.step(sample).copy() for sample in x])
+
+    assert np.allclose(streamed, sosfilt(sos, x), atol=1e-12)
+
+
+def test_sosfilt_along_other_axis():
+    sos = butter_sos(2, 6.0, FRAME_RATE)
+    x = trajectory()
+
+    assert np.allclose(sosfilt(sos, x.T, axis=1), sosfilt(sos, x).T)
+
+
+def test_primed_filters_hold_constant_input():
+    sos = butter_sos(4, 10.0, FRAME_RATE)
+    x = np.full((50, 3), [0.1, -0.2, 0.3])
+
+    assert np.allclose(sosfilt(sos, x), x)
+    assert np.allclose(filtfilt(sos, x), x)
+
+
+def test_filtfilt_is_zero_phase():
+    sos = butter_sos(4, 10.0, FRAME_RATE)
+    t = np.arange(480) / FRAME_RATE
+    x = np.sin(2 * np.pi * 1.0 * t)[:, None]
+
+    causal = sosfilt(sos, x)
+    zero_phase = filtfilt(sos, x)
+
+    # well inside the pass band: the causal filter lags, the zero-phase one doesn't
+    middle = slice(60, -60)
+    assert np.abs(zero_phase - x)[middle].max() < 0.01
+    assert np.abs(causal - x)[middle].max() > 0.05
+
+
+def test_savgol_preserves_polynomials():
+    t = np.arange(60, dtype=np.float64) / FRAME_RATE
+    x = (1 + 2 * t - 3 * t ** 2)[:, None]
+
+    inner = slice(5, -5)
+    assert np.allclose(savgol(x, 7, 2)[inner], x[inner])
+    assert np.allclose(savgol(x, 7, 2, deriv=1, frame_rate=FRAME_RATE)[inner, 0], (2 - 6 * t)[inner])
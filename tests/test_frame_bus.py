@@ -0,0 +1,96 @@
+# Shared-memory frame bus: rows, frame numbers & layouts reach subscribers, including in another process
+import multiprocessing
+import uuid
+
+import numpy as np
+import pytest
+
+from FrameBus import frameBusPublisher, frameBusSubscriber
+
+COLUMNS = ["rb1_pos_x", "rb1_pos_y", "rb1_pos_z"]
+
+
+@pytest.fixture
+def bus():
+    publisher = frameBusPublisher(f"gbyk_test_{uuid.uuid4().hex[:8]}", capacity=4, max_columns=8)
+    publisher.set_layout(COLUMNS)
+    yield publisher
+    publisher.close()
+
+
+def row(*values: float) -> np.ndarray:
+    return np.array(values, dtype=np.float32)
+
+
+def test_subscriber_sees_rows_and_frame_numbers(bus):
+    subscriber = frameBusSubscriber(bus.name)
+    assert subscriber.latest() is None
+
+    seq = bus.publish(row(0.1, 0.2, 0.3), frame_number=2 ** 40 + 1)
+    latest_seq, latest = subscriber.latest()
+
+    assert latest_seq == seq
+    assert subscriber.columns == COLUMNS
+    assert np.allclose(latest, [0.1, 0.2, 0.3])
+    assert subscriber.frame_number(seq) == 2 ** 40 + 1
+    subscriber.close()
+
+
+def test_lapped_frames_are_skipped(bus):
+    subscriber = frameBusSubscriber(bus.name)
+    for n in range(1, 11):
+        bus.publish(row(n, n, n), frame_number=n)
+
+    frames = subscriber.frames_since()
+    assert [seq for seq, _ in frames] == [7, 8, 9, 10]
+    assert [int(view[0]) for _, view in frames] == [7, 8, 9, 10]
+
+    assert subscriber.row(2) is None
+    assert subscriber.frame_number(2) is None
+    assert subscriber.frames_since() == []
+    subscriber.close()
+
+
+def test_layout_changes_picked_up(bus):
+    subscriber = frameBusSubscriber(bus.name)
+    subscriber.latest()
+
+    bus.set_layout(COLUMNS + ["rb2_pos_x"])
+    bus.publish(row(1, 2, 3, 4))
+
+    _, latest = subscriber.latest()
+    assert subscriber.column("rb2_pos_x") == 3
+    assert latest.tolist() == [1, 2, 3, 4]
+
+    with pytest.raises(ValueError):
+        bus.set_layout([f"c{i}" for i in range(9)])
+    subscriber.close()
+
+
+def test_no_bus_to_attach_to():
+    with pytest.raises(FileNotFoundError):
+        frameBusSubscriber(f"gbyk_test_{uuid.uuid4().hex[:8]}")
+
+
+def subscribe_and_report(name: str, ready, results) -> None:
+    subscriber = frameBusSubscriber(name)
+    ready.set()
+    while subscriber.sequence() < 3:
+        pass
+    results.put([(subscriber.frame_number(seq), view.tolist()) for seq, view in subscriber.frames_since(0)])
+    subscriber.close()
+
+
+def test_subscriber_in_another_process(bus):
+    context = multiprocessing.get_context("spawn")
+    ready, results = context.Event(), context.Queue()
+    process = context.Process(target=subscribe_and_report, args=(bus.name, ready, results))
+    process.start()
+
+    assert ready.wait(30)
+    for n in range(1, 4):
+        bus.publish(row(n, -n, 0.5), frame_number=1000 + n)
+
+    assert results.get(timeout=30) == [(1000 + n, [n, -n, 0.5]) for n in range(1, 4)]
+    process.join(30)
+    assert process.exitcode == 0
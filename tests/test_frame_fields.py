@@ -0,0 +1,9 @@
+# Frame data rows: the layouts consumers index by must be those the unpackers emit
+from CaptureConvert import frame_sections
+from FrameFields import FRAME_FIELDS
+
+
+def test_frame_fields_match_unpackers():
+    for asset, unpacker in frame_sections((4, 1)):
+        if unpacker is not None:
+            assert FRAME_FIELDS[asset] == unpacker.FIELDS, asset
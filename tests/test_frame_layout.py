@@ -0,0 +1,71 @@
+# Wide frame layout: column slots from model definitions, one row written per frame
+import numpy as np
+
+from FrameLayout import RIGID_BODY_FIELDS, MARKER_FIELDS, frameLayout, wideFrameBuffer
+
+DESCRIPTIONS = {
+    "RigidBodies": [
+        [{"asset_ID": 3}, {"asset_ID": 3}],     # one entry per marker of the body
+        [{"asset_ID": 7}],
+    ],
+    "MarkerSets": [
+        [{"parent_name": "Hand", "asset_name": "Thumb"}, {"parent_name": "Hand", "asset_name": "Index"}],
+    ],
+}
+
+
+def frame(frame_number: int, bodies=(), markers=()) -> dict:
+    return {
+        "Prefix": [[(frame_number,)]],
+        "RigidBodies": [[(asset_ID, *pos, 1.0, 0.0, 0.0, 0.0, 0.0002, 1) for asset_ID, pos in bodies]],
+        "MarkerSets": [[("Hand", *pos) for pos in markers]],
+    }
+
+
+def test_layout_from_descriptions():
+    layout = frameLayout.from_descriptions(DESCRIPTIONS)
+
+    assert list(layout.rigid_body_slots) == [3, 7]
+    assert len(layout) == 2 * len(RIGID_BODY_FIELDS) + 2 * len(MARKER_FIELDS)
+    assert layout.columns[layout.rigid_body(7, "pos_y")] == ["rb7_pos_y"]
+    assert layout.columns[layout.marker("Hand", 1)] == ["Hand:Index_pos_x", "Hand:Index_pos_y", "Hand:Index_pos_z"]
+    assert layout == frameLayout.from_descriptions(DESCRIPTIONS)
+
+
+def test_frames_written_to_their_slots():
+    buffer = wideFrameBuffer(frameLayout.from_descriptions(DESCRIPTIONS))
+
+    buffer.write(frame(10, bodies=[(7, (0.1, 0.2, 0.3))], markers=[(1.0, 2.0, 3.0), (4.0, 5.0, 6.0)]))
+    buffer.write(frame(11, bodies=[(3, (0.4, 0.5, 0.6)), (99, (9.0, 9.0, 9.0))]))
+
+    np.testing.assert_allclose(buffer.rigid_body(7)[:, :3], [[0.1, 0.2, 0.3], [np.nan] * 3], rtol=1e-6)
+    np.testing.assert_allclose(buffer.rigid_body(3, "pos_z").ravel(), [np.nan, 0.6], rtol=1e-6)
+    np.testing.assert_array_equal(buffer.marker("Hand", 1), [[4.0, 5.0, 6.0], [np.nan] * 3])
+    assert list(buffer.frame_numbers()) == [10, 11]
+
+
+def test_frame_numbers_exact_beyond_float32():
+    buffer = wideFrameBuffer(frameLayout.from_descriptions(DESCRIPTIONS), capacity=2)
+    first = 2 ** 24 + 1         # not representable as float32
+
+    for frame_number in range(first, first + 5):     # past capacity, so grown
+        buffer.write(frame(frame_number, bodies=[(3, (0.0, 0.0, float(frame_number % 7)))]))
+
+    exported = buffer.to_frame()
+    assert exported.names[0] == "frame_number"
+    assert exported[:, "frame_number"].to_list()[0] == list(range(first, first + 5))
+    assert exported[:, "rb3_pos_z"].to_list()[0] == [float(n % 7) for n in range(first, first + 5)]
+    assert buffer.last_frame_number() == first + 4
+
+
+def test_export_survives_clear():
+    buffer = wideFrameBuffer(frameLayout.from_descriptions(DESCRIPTIONS))
+    buffer.write(frame(1, bodies=[(3, (0.1, 0.1, 0.1))]))
+
+    exported = buffer.to_frame()
+    buffer.clear()
+    buffer.write(frame(2, bodies=[(3, (0.2, 0.2, 0.2))]))
+
+    assert buffer.nrows == 1
+    assert exported[:, "frame_number"].to_list()[0] == [1]
+    assert abs(exported[0, "rb3_pos_x"] - 0.1) < 1e-6
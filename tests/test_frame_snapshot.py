@@ -0,0 +1,83 @@
+# Latest-frame snapshot: per body state & velocity, and reads that are never torn by a concurrent writer
+import math
+import threading
+
+from FrameSnapshot import snapshotBuffer
+
+RATE = 100.0
+
+
+def test_velocity_from_consecutive_frames():
+    snapshot = snapshotBuffer(RATE)
+    snapshot.publish(1, {7: (0.0, 0.0, 0.0)}, timestamp=10.0)
+
+    first = snapshot.read(7)
+    assert (first.frame_number, first.timestamp) == (1, 10.0)
+    assert math.isnan(first.speed)
+
+    # two frames on (one dropped): displacement over 0.02s
+    snapshot.publish(3, {7: (0.006, 0.008, 0.0)}, timestamp=10.02)
+    state = snapshot.read(7)
+    assert state.pos == (0.006, 0.008, 0.0)
+    assert [round(v, 9) for v in state.vel] == [0.3, 0.4, 0.0]
+    assert round(state.speed, 9) == 0.5
+
+
+def test_absent_bodies_keep_last_state():
+    snapshot = snapshotBuffer(RATE)
+    snapshot.publish(1, {1: (0.1, 0.1, 0.1), 2: (0.2, 0.2, 0.2)})
+    snapshot.publish(2, {1: (0.3, 0.3, 0.3)})
+
+    assert snapshot.read(1).frame_number == 2
+    assert snapshot.read(2).frame_number == 1
+    assert snapshot.read(2).pos == (0.2, 0.2, 0.2)
+    assert snapshot.read(3) is None
+    assert snapshot.sequence() == 2
+
+
+def test_grows_past_capacity():
+    snapshot = snapshotBuffer(RATE, capacity=2)
+    snapshot.publish(1, {asset_ID: (float(asset_ID), 0.0, 0.0) for asset_ID in range(5)})
+
+    assert [snapshot.read(asset_ID).pos[0] for asset_ID in range(5)] == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+def test_reset_forgets_velocity_history():
+    snapshot = snapshotBuffer(RATE)
+    snapshot.publish(1, {1: (0.0, 0.0, 0.0)})
+    snapshot.reset()
+    snapshot.publish(2, {1: (1.0, 0.0, 0.0)})       # a jump between trials, not a velocity
+
+    assert math.isnan(snapshot.read(1).speed)
+    assert snapshot.read(1).pos == (1.0, 0.0, 0.0)
+
+
+def test_concurrent_reads_are_consistent():
+    snapshot = snapshotBuffer(RATE)
+    snapshot.publish(0, {1: (0.0, 0.0, 0.0)}, timestamp=0.0)
+    done = threading.Event()
+    torn, reads = [], [0]
+
+    def reader() -> None:
+        while not done.is_set():
+            state = snapshot.read(1)
+            if state is None:
+                continue
+            reads[0] += 1
+            # every field of a frame's row is written from its frame number; a mix means a torn read
+            if state.pos != (state.frame_number,) * 3 or state.timestamp != state.frame_number:
+                torn.append(state)
+
+    threads = [threading.Thread(target=reader) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+
+    for n in range(1, 20000):
+        snapshot.publish(n, {1: (float(n),) * 3, 2: (0.0, 0.0, 0.0)}, timestamp=float(n))
+
+    done.set()
+    for thread in threads:
+        thread.join()
+
+    assert reads[0] > 0
+    assert torn == []
@@ -0,0 +1,73 @@
+# Marker gap filling: cubic interpolation, and reconstruction from a parent rigid body's pose
+import datatable as dt
+import numpy as np
+
+from BatchAnalysis import _aperture_by_trial
+from GapFilling import MAX_RESIDUAL, fill_trajectory
+from Transforms import quat_rotate
+
+
+def rotating_body(n: int = 60):
+    angle = np.arange(n) / 60.0
+    rot = np.stack([np.cos(angle / 2), np.zeros(n), np.zeros(n), np.sin(angle / 2)], axis=1)
+    pos = np.stack([np.linspace(0, 0.3, n), np.full(n, 0.1), np.full(n, 0.2)], axis=1)
+    marker = pos + quat_rotate(rot, np.broadcast_to([0.05, 0.0, 0.0], (n, 3)))
+    return pos, rot, marker
+
+
+def test_rigid_fill_reconstructs_marker():
+    body_pos, body_rot, marker = rotating_body()
+    invalid = np.zeros(len(marker), dtype=bool)
+    invalid[20:30] = True
+
+    filled, gaps = fill_trajectory(np.where(invalid[:, None], np.nan, marker), invalid,
+                                   body_pos=body_pos, body_rot=body_rot, body_invalid=np.zeros(len(marker), dtype=bool))
+
+    np.testing.assert_allclose(filled, marker, atol=1e-12)
+    assert gaps["n_filled"] == 10 and gaps["n_unfilled"] == 0
+
+
+def test_rigid_fill_interpolates_where_body_lost():
+    body_pos, body_rot, marker = rotating_body()
+    invalid = np.zeros(len(marker), dtype=bool)
+    invalid[20:30] = True
+    body_invalid = np.zeros(len(marker), dtype=bool)
+    body_invalid[24:26] = True
+
+    filled, gaps = fill_trajectory(np.where(invalid[:, None], np.nan, marker), invalid,
+                                   body_pos=body_pos, body_rot=body_rot, body_invalid=body_invalid)
+
+    assert np.isfinite(filled).all()
+    np.testing.assert_allclose(filled[24:26], marker[24:26], atol=1e-4)
+    assert gaps["n_filled"] == 10
+
+
+def test_long_gaps_left_unfilled():
+    _, _, marker = rotating_body()
+    invalid = np.zeros(len(marker), dtype=bool)
+    invalid[10:40] = True
+
+    filled, gaps = fill_trajectory(marker, invalid, max_gap=12)
+
+    assert np.isnan(filled[10:40]).all()
+    assert gaps["n_unfilled"] == 30
+
+
+def test_aperture_markers_screened_on_residual(tmp_path):
+    n = 60
+    residual = np.full(n, MAX_RESIDUAL / 10)
+    residual[20:40] = MAX_RESIDUAL * 4      # a stretch too long to fill
+
+    rows = {name: [] for name in ("participant_id", "block_num", "trial_num", "frame_number", "asset_ID",
+                                  "pos_x", "pos_y", "pos_z", "param", "residual")}
+    for frame_number in range(n):
+        for asset_ID, x, r in ((1, 0.1, residual[frame_number]), (2, 0.18, MAX_RESIDUAL / 10)):
+            for name, value in zip(rows, (1, 1, 1, frame_number, asset_ID, x, 0.2, 0.3, 0, r)):
+                rows[name].append(value)
+    dt.Frame(rows).to_csv(str(tmp_path / "GripAperture_LabeledMarkerSet_framedata.csv"))
+
+    aperture = _aperture_by_trial(str(tmp_path), (1, 2), max_gap=12)[(1, 1, 1, 1)]
+
+    assert np.isnan(aperture[20:40]).all()
+    np.testing.assert_allclose(aperture[:20], 0.08, atol=1e-6)
+    np.testing.assert_allclose(aperture[40:], 0.08, atol=1e-6)
@@ -0,0 +1,95 @@
+# Logging: JSON-lines records with structured fields, per-category rate limits, lazily formatted arguments
+import json
+import logging
+import uuid
+
+import pytest
+
+from Logs import (
+    get_logger, log_data, configure_logging, shutdown_logging, set_rate_limits, rateLimitFilter, consoleFormatter,
+    CONSOLE_FORMAT, DEBUG, INFO, WARNING
+)
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "session.log"
+    configure_logging(INFO, log_file=str(path), console=False)
+    yield path
+    shutdown_logging()
+
+
+def records(path) -> list:
+    shutdown_logging()      # flushes the queue
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def category() -> str:
+    return f"test.{uuid.uuid4().hex[:6]}"
+
+
+def test_structured_fields_written_as_json(log_file):
+    name = category()
+    log_data(get_logger(name), INFO, "Captured %d packets", 42, path="s.natcap", packets=42)
+    get_logger(name).debug("below the configured level")
+
+    [entry] = records(log_file)
+    assert entry["category"] == name
+    assert entry["level"] == "INFO"
+    assert entry["message"] == "Captured 42 packets"
+    assert (entry["path"], entry["packets"]) == ("s.natcap", 42)
+
+
+def test_arguments_formatted_only_when_emitted(log_file):
+    formatted = []
+
+    class expensive:
+        def __str__(self) -> str:
+            formatted.append(True)
+            return "expensive"
+
+    logger = get_logger(category())
+    logger.debug("value: %s", expensive())
+    log_data(logger, DEBUG, "value: %s", expensive(), field=1)
+    assert formatted == []
+
+    logger.warning("value: %s", expensive())
+    assert records(log_file)[0]["message"] == "value: expensive"
+    assert formatted
+
+
+def test_rate_limit_per_category(log_file):
+    noisy, quiet = category(), category()
+    set_rate_limits({noisy: (0.001, 3)})
+
+    for i in range(10):
+        get_logger(noisy).warning("dropped frame %d", i)
+    get_logger(quiet).warning("unaffected")
+
+    entries = records(log_file)
+    assert [e["message"] for e in entries if e["category"] == noisy] == [f"dropped frame {i}" for i in range(3)]
+    assert [e["message"] for e in entries if e["category"] == quiet] == ["unaffected"]
+
+
+def test_suppressed_count_reported_with_next_record():
+    limit = rateLimitFilter(rate=1.0, burst=1)
+    record = lambda: logging.LogRecord("gbyk.natnet", WARNING, __file__, 0, "late packet", None, None)
+
+    assert limit.filter(record())
+    assert not limit.filter(record())
+    assert not limit.filter(record())
+
+    limit.last -= 1.0       # a second passes; one token accrues
+    passed = record()
+    assert limit.filter(passed)
+    assert passed.suppressed == 2
+
+    line = consoleFormatter(CONSOLE_FORMAT).format(passed)
+    assert "[natnet] late packet (2 similar suppressed)" in line
+
+
+def test_unconfigured_loggers_stay_quiet(capsys):
+    shutdown_logging()
+    get_logger(category()).info("not shown")
+
+    assert capsys.readouterr().err == ""
@@ -0,0 +1,82 @@
+# Live monitor: state built from the tracker's latest row, served (rate-limited) over localhost HTTP
+import json
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+
+from Benchmark import syntheticClient, MARKER_SET
+from Monitor import liveMonitor, MAX_MARKERS
+from OptiTracker import OptiTracker
+
+
+def tracker_after(frames: int, markers: int = 8) -> OptiTracker:
+    client = syntheticClient(markers=markers)
+    tracker = OptiTracker(client=client)
+    tracker.start()
+    for i, frame_data in enumerate(client.trial_frames()):
+        if i == frames:
+            break
+        tracker.recieve_dataframe(frame_data)
+    return tracker
+
+
+def test_state_before_any_frame():
+    state = liveMonitor(tracker_after(0)).build_state()
+
+    assert state["markers"] == []
+    assert state["aperture"] is None
+
+
+def test_state_from_latest_row():
+    tracker = tracker_after(30)
+    state = liveMonitor(tracker).build_state()
+
+    row = tracker.wideframe.last_row()
+    first, second = tracker.layout.marker(MARKER_SET, 0), tracker.layout.marker(MARKER_SET, 1)
+
+    assert state["frame_number"] == tracker.last_frame_number
+    assert len(state["markers"]) == 8
+    assert state["aperture"] == pytest.approx(float(np.linalg.norm(row[first] - row[second])))
+
+
+def test_markers_decimated_and_named_aperture():
+    tracker = tracker_after(5, markers=200)
+    names = (f"{MARKER_SET}:Marker3", f"{MARKER_SET}:Marker4")
+    state = liveMonitor(tracker, aperture_markers=names).build_state()
+
+    row = tracker.wideframe.last_row()
+    assert len(state["markers"]) <= MAX_MARKERS
+    assert state["aperture"] == pytest.approx(float(np.linalg.norm(
+        row[tracker.layout.marker(MARKER_SET, 2)] - row[tracker.layout.marker(MARKER_SET, 3)])))
+
+    assert liveMonitor(tracker, aperture_markers=("nope", "nada")).build_state()["aperture"] is None
+
+
+@pytest.fixture
+def served():
+    tracker = tracker_after(10)
+    monitor = liveMonitor(tracker, port=0, rate=0.01).start()      # state rebuilt at most every 100s
+    host, port = monitor._server.server_address
+    yield tracker, monitor, f"http://{host}:{port}"
+    monitor.stop()
+
+
+def get(url: str) -> bytes:
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return response.read()
+
+
+def test_served_state_is_rate_limited(served):
+    tracker, monitor, base = served
+    first = json.loads(get(base + "/state"))
+
+    client_frames = syntheticClient().trial_frames()
+    for _ in range(20):
+        tracker.recieve_dataframe(next(client_frames))
+
+    assert json.loads(get(base + "/state")) == first
+    assert b"tracking monitor" in get(base + "/")
+    with pytest.raises(urllib.error.HTTPError):
+        get(base + "/elsewhere")
@@ -0,0 +1,128 @@
+# Pose prediction as OptiTracker runs it: fed at exposure time, with the server clock read once per connection
+import numpy as np
+import pytest
+
+import OptiTracker as optitracker
+from Benchmark import syntheticClient, HAND_ID, REACH_ONSET, REACH_DURATION, SERVER_LATENCY
+from OptiTracker import OptiTracker
+from Prediction import kalmanPredictor
+
+
+class frameClock:
+    def __init__(self, rate: float) -> None:
+        self.now = 1000.0
+        self.period = 1 / rate
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def tick(self) -> None:
+        self.now += self.period
+
+
+class countingClient(syntheticClient):
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.frequency_reads = 0
+
+    def get_clock_frequency(self) -> int:
+        self.frequency_reads += 1
+        return super().get_clock_frequency()
+
+
+# Tracker fed a synthetic trial's frames at their nominal rate; stops after `until` s of the trial
+def tracked_trial(monkeypatch, until: float = None, client: syntheticClient = None):
+    client = client or syntheticClient()
+    clock = frameClock(client.rate)
+    monkeypatch.setattr(optitracker, "time", clock)
+
+    tracker = OptiTracker(client=client)
+    tracker.start()
+    for i, frame_data in enumerate(client.trial_frames()):
+        if until is not None and i >= until * client.rate:
+            break
+        clock.tick()
+        tracker.recieve_dataframe(frame_data)
+
+    return tracker, clock
+
+
+def test_clock_frequency_read_once_per_connection(monkeypatch):
+    client = countingClient(trial_duration=0.5)
+    tracker, _ = tracked_trial(monkeypatch, client=client)
+
+    assert client.frequency_reads == 1
+    assert tracker.latency == pytest.approx(SERVER_LATENCY, rel=1e-3)
+
+    tracker.stop()
+    tracker.start()
+    for frame_data in client.trial_frames():
+        tracker.recieve_dataframe(frame_data)
+    assert client.frequency_reads == 2
+
+
+def test_prediction_leads_mid_reach(monkeypatch):
+    tracker, clock = tracked_trial(monkeypatch, until=REACH_ONSET + REACH_DURATION / 2)
+
+    state = tracker.predict(HAND_ID, clock.now + 0.05)
+    current = tracker.rigid_body_state(HAND_ID)
+
+    # peak speed of a 0.3m minimum-jerk reach over 0.8s: 1.875 * 0.3 / 0.8
+    assert state.speed == pytest.approx(0.703, abs=0.05)
+    assert state.pos[0] > current.pos[0] + 0.02
+    assert tracker.predict(HAND_ID + 99) is None
+
+
+# # # #
+# kalmanPredictor alone
+# # # #
+
+RATE = 120.0
+
+
+def feed(predictor: kalmanPredictor, path, frames, latency: float = 0.0) -> None:
+    for frame_number in frames:
+        t = frame_number / RATE
+        predictor.update(frame_number, t, path(t), latency)
+
+
+def accelerating(t: float):
+    return (0.1 + 0.5 * t + 0.5 * 2.0 * t * t, 0.2, -0.3 * t)
+
+
+def test_extrapolates_constant_acceleration():
+    predictor = kalmanPredictor(RATE)
+    assert predictor.predict(0.0) is None
+
+    feed(predictor, accelerating, range(120))
+
+    t = 119 / RATE + 0.05
+    pos, vel = predictor.predict(t)
+    assert np.allclose(pos, accelerating(t), atol=1e-4)
+    assert np.allclose(vel, (0.5 + 2.0 * t, 0.0, -0.3), atol=1e-2)
+
+
+def test_errors_scored_at_latency_horizon():
+    predictor = kalmanPredictor(RATE)
+    feed(predictor, accelerating, range(60), latency=3 / RATE)
+
+    summary = predictor.error_summary()
+    assert summary["n_predictions"] == 60 - 3
+    assert summary["max_error"] >= summary["p95_error"] >= summary["mean_error"]
+    assert len(predictor._pending) == 3
+
+    predictor.reset()
+    assert predictor.predict(1.0) is None
+    assert predictor.error_summary()["n_predictions"] == 0
+
+
+def test_dropped_frames_use_frame_interval():
+    every_frame, with_gaps = kalmanPredictor(RATE), kalmanPredictor(RATE)
+    feed(every_frame, accelerating, range(60), latency=1 / RATE)
+    feed(with_gaps, accelerating, [n for n in range(60) if n % 5], latency=1 / RATE)
+
+    t = 59 / RATE
+    assert np.allclose(with_gaps.predict(t)[0], every_frame.predict(t)[0], atol=1e-4)
+
+    # predictions made for the dropped frames are discarded, never scored
+    assert with_gaps.error_summary()["n_predictions"] < every_frame.error_summary()["n_predictions"]
@@ -0,0 +1,75 @@
+# Response times as experiment.py measures them: from go signal onset, not trial start
+import time
+
+import pytest
+
+pytest.importorskip("klibs")
+
+import experiment
+from Replay import replayEvents, scriptedKeyboard
+from RestDetector import restDetector
+from TrialScreening import screen_dataframes, ANTICIPATION
+
+from test_trial_screening import HAND, reach, trial_dataframes
+
+GO_DELAY = 1.5      # s; within GO_SIGNAL_ONSET
+
+
+# Experiment as far as response timing goes (klibs' constructor bypassed, as in Replay.py)
+def timed_experiment(monkeypatch, rest: restDetector = None, key_events: list = ()) -> experiment.GBYK_GripAperture:
+    exp = experiment.GBYK_GripAperture.__new__(experiment.GBYK_GripAperture)
+    exp.evm = replayEvents(speed=1.0)
+    exp.rest = rest
+
+    keyboard = scriptedKeyboard(exp.evm)
+    keyboard.begin_trial(list(key_events))
+    monkeypatch.setattr(experiment, "get_key_state", keyboard.get_key_state)
+
+    return exp
+
+
+# Moves the trial clock on by s, as though that long had passed
+def advance(exp: experiment.GBYK_GripAperture, s: float) -> None:
+    exp.evm._started -= s
+
+
+def test_spacebar_rt_from_go_signal(monkeypatch):
+    exp = timed_experiment(monkeypatch, key_events=[[0, "space", True], [GO_DELAY * 1000 + 250, "space", False]])
+
+    advance(exp, GO_DELAY)
+    exp.go()
+    assert exp.movement_onset() is None
+
+    advance(exp, 0.3)
+    rt = exp.movement_onset()
+    assert 290 <= rt < 320          # not ~GO_DELAY + 300
+
+
+def test_mocap_rt_from_go_signal(monkeypatch):
+    rest = restDetector(rest_frames=1)
+    exp = timed_experiment(monkeypatch, rest)
+
+    now = time.perf_counter()
+    rest.update(1, now, (0.0, 0.0, 0.0), float("nan"))
+    rest.update(2, now, (0.0, 0.0, 0.0), 0.0)
+    assert rest.at_rest
+
+    advance(exp, GO_DELAY)
+    exp.go()
+    advance(exp, 0.2)
+
+    # left rest 50ms ago; onset backdated to that frame
+    rest.update(3, time.perf_counter() - 0.05, (0.0, 0.0, 0.0), 1.0)
+    rt = exp.movement_onset()
+    assert 140 <= rt < 170
+
+
+def test_early_release_screened_as_anticipation(monkeypatch):
+    exp = timed_experiment(monkeypatch, key_events=[[0, "space", True], [GO_DELAY * 1000 + 40, "space", False]])
+
+    advance(exp, GO_DELAY)
+    exp.go()
+    advance(exp, 0.05)
+    rt = exp.movement_onset()
+
+    assert ANTICIPATION in screen_dataframes(trial_dataframes(reach()), HAND, rt)["failures"]
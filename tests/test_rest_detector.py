@@ -0,0 +1,157 @@
+# restDetector: entering & leaving rest (with hysteresis), and the events stamped on leaving
+import pytest
+
+from Benchmark import syntheticClient, HAND_ID
+from OptiTracker import OptiTracker
+from RestDetector import restDetector, PREMATURE, ONSET, REST_SPEED, MOVE_SPEED, ZONE_RADIUS, ZONE_MARGIN
+
+ORIGIN = (0.0, 0.0, 0.0)
+
+
+class frameFeed:
+    def __init__(self, detector: restDetector) -> None:
+        self.detector = detector
+        self.frame_number = 0
+
+    def __call__(self, speed: float, pos=ORIGIN, frames: int = 1) -> None:
+        for _ in range(frames):
+            self.frame_number += 1
+            self.detector.update(self.frame_number, float(self.frame_number), pos, speed)
+
+
+def settled(rest_frames: int = 3):
+    detector = restDetector(rest_frames=rest_frames)
+    feed = frameFeed(detector)
+    feed(0.0, frames=rest_frames)
+    assert detector.at_rest
+    return detector, feed
+
+
+def test_rest_needs_consecutive_still_frames():
+    detector = restDetector(rest_frames=3)
+    feed = frameFeed(detector)
+
+    feed(float("nan"))          # first frame has no speed; ignored
+    feed(0.0, frames=2)
+    feed(REST_SPEED * 1.5)      # not still: count starts over
+    feed(0.0, frames=2)
+    assert not detector.at_rest
+
+    feed(0.0)
+    assert detector.at_rest
+
+
+def test_not_yet_settled_is_not_a_departure():
+    detector = restDetector(rest_frames=3)
+    feed = frameFeed(detector)
+
+    feed(float("nan"))
+    feed(0.0, frames=2)
+    assert (detector.at_rest, detector.settled) == (False, False)
+
+    feed(0.0)
+    feed(MOVE_SPEED * 2)
+    assert (detector.at_rest, detector.settled) == (False, True)
+    assert detector.premature.kind == PREMATURE
+
+
+def test_speed_hysteresis():
+    detector, feed = settled()
+
+    # between the enter & exit thresholds: stays at rest
+    feed((REST_SPEED + MOVE_SPEED) / 2, frames=5)
+    assert detector.at_rest
+
+    feed(MOVE_SPEED * 1.5)
+    assert not detector.at_rest
+
+    # and, once moving, the same in-between speed doesn't count as still
+    feed((REST_SPEED + MOVE_SPEED) / 2, frames=5)
+    assert not detector.at_rest
+
+
+def test_zone_captured_with_margin():
+    detector, feed = settled()
+
+    # beyond the radius, but within the margin: still at rest
+    feed(0.0, pos=(ZONE_RADIUS + ZONE_MARGIN / 2, 0.0, 0.0))
+    assert detector.at_rest
+
+    feed(0.0, pos=(ZONE_RADIUS + ZONE_MARGIN * 2, 0.0, 0.0))
+    assert not detector.at_rest
+
+
+def test_leaving_before_arm_is_premature():
+    detector, feed = settled()
+
+    feed(MOVE_SPEED * 2)
+    assert detector.premature.kind == PREMATURE
+    assert detector.premature.frame_number == feed.frame_number
+    assert detector.onset is None
+
+
+def test_onset_is_first_departure_after_arm():
+    detector, feed = settled()
+    detector.arm()
+
+    feed(MOVE_SPEED * 2)
+    onset_frame = feed.frame_number
+
+    feed(0.0, frames=3)         # back at rest, and away again
+    feed(MOVE_SPEED * 2)
+
+    assert detector.premature is None
+    assert detector.onset.kind == ONSET
+    assert detector.onset.frame_number == onset_frame
+
+
+def test_reset_clears_events_and_captured_zone():
+    detector, feed = settled()
+    feed(MOVE_SPEED * 2)
+    detector.reset()
+
+    assert (detector.premature, detector.onset, detector.at_rest, detector.armed) == (None, None, False, False)
+    assert not detector.settled
+    assert not detector.receiving()
+
+    # zone re-captured wherever the hand next comes to rest
+    far = (1.0, 1.0, 1.0)
+    feed(0.0, pos=far, frames=3)
+    assert detector.at_rest
+    feed(0.0, pos=far)
+    assert detector.at_rest
+
+
+def test_thresholds_must_be_ordered():
+    with pytest.raises(ValueError):
+        restDetector(rest_speed=MOVE_SPEED, move_speed=REST_SPEED)
+
+
+def hand_frame(frame_number: int, pos, tracked: bool = True) -> dict:
+    return {
+        "Prefix": [[(frame_number,)]],
+        "RigidBodies": [[(HAND_ID, *pos, 1.0, 0.0, 0.0, 0.0, 0.0002, int(tracked))]],
+        "Suffix": [[(0, 0, frame_number / 120, 0, 0, 0, 0, 0, 0, 0, 0)]],
+    }
+
+
+def test_untracked_frames_never_reach_detector():
+    tracker = OptiTracker(client=syntheticClient())
+    detector = tracker.watch_rest(HAND_ID, restDetector(rest_frames=3))
+    tracker.start()
+
+    rest_pos = (0.1, 0.1, 0.1)
+    for frame_number in range(1, 10):
+        tracker.recieve_dataframe(hand_frame(frame_number, rest_pos))
+    assert detector.at_rest
+    last_update = detector.last_update
+
+    # tracking lost: position reported at the origin, far outside the start zone
+    tracker.recieve_dataframe(hand_frame(10, (0.0, 0.0, 0.0), tracked=False))
+    assert detector.at_rest
+    assert detector.last_update == last_update
+
+    tracker.recieve_dataframe(hand_frame(11, rest_pos))
+    assert detector.at_rest
+    assert detector.premature is None
+    tracker.stop()
@@ -0,0 +1,32 @@
+# Cached parser bytecode must be keyed identically from run to run, and parse correctly when reused
+import os
+
+from construct import Construct, Int32ul, Struct, stream_read
+
+from StructRegistry import compile_cached
+
+
+# Has no code generation of its own, so construct links it in, by id(), to the generated source
+class doubledByte(Construct):
+    def _parse(self, stream, context, path):
+        return stream_read(stream, 1, path)[0] * 2
+
+
+def make_struct() -> Struct:
+    return Struct("value" / Int32ul, "doubled" / doubledByte())
+
+
+def test_cache_key_independent_of_object_ids(tmp_path):
+    first = compile_cached(make_struct(), str(tmp_path))
+    second = compile_cached(make_struct(), str(tmp_path))
+
+    assert first.modulename == second.modulename
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_cached_bytecode_parses(tmp_path):
+    compile_cached(make_struct(), str(tmp_path))
+    reused = compile_cached(make_struct(), str(tmp_path))
+
+    parsed = reused.parse((21).to_bytes(4, "little") + bytes([3]))
+    assert (parsed.value, parsed.doubled) == (21, 6)
@@ -0,0 +1,84 @@
+# Rigid body transforms: quaternion conversions agree with one another, and table calibration inverts world poses
+import numpy as np
+import pytest
+
+from Transforms import (
+    quat_normalize, quat_multiply, quat_conjugate, quat_rotate, quat_to_matrix, quat_to_euler, quat_mean,
+    tableCalibration, table_to_screen
+)
+
+rng = np.random.default_rng(29)
+QUATS = quat_normalize(rng.normal(size=(50, 4)))
+VECTORS = rng.normal(size=(50, 3))
+
+# Table tilted 10 degrees about x, 1.2m from the world origin
+TILT = np.array([np.cos(np.radians(5)), np.sin(np.radians(5)), 0.0, 0.0])
+ORIGIN = np.array([0.4, 0.75, -1.2])
+
+
+def rotation(axis: int, angle: np.ndarray) -> np.ndarray:
+    c, s = np.cos(angle), np.sin(angle)
+    i, j = {0: (1, 2), 1: (2, 0), 2: (0, 1)}[axis]
+    m = np.zeros(angle.shape + (3, 3))
+    m[..., axis, axis] = 1
+    m[..., i, i], m[..., i, j], m[..., j, i], m[..., j, j] = c, -s, s, c
+    return m
+
+
+def test_rotation_paths_agree():
+    by_matrix = np.einsum("nij,nj->ni", quat_to_matrix(QUATS), VECTORS)
+
+    assert np.allclose(quat_rotate(QUATS, VECTORS), by_matrix)
+    assert np.allclose(quat_rotate(QUATS, by_matrix, inverse=True), VECTORS)
+
+    # q v q*, as a pure quaternion
+    pure = np.concatenate([np.zeros((50, 1)), VECTORS], axis=1)
+    assert np.allclose(quat_multiply(quat_multiply(QUATS, pure), quat_conjugate(QUATS))[:, 1:], by_matrix)
+
+
+def test_euler_angles_rebuild_matrix():
+    roll, pitch, yaw = quat_to_euler(QUATS).T
+    rebuilt = rotation(2, yaw) @ rotation(1, pitch) @ rotation(0, roll)
+
+    assert np.allclose(rebuilt, quat_to_matrix(QUATS))
+
+
+def test_mean_ignores_quaternion_sign():
+    samples = quat_normalize(TILT + rng.normal(0, 1e-4, (20, 4)))
+    samples[::2] *= -1      # same orientations, opposite hemisphere
+
+    assert abs(quat_mean(samples) @ TILT) == pytest.approx(1.0, abs=1e-8)     # q & -q: same orientation
+
+
+def test_calibration_inverts_world_poses():
+    world_rot = np.tile(TILT, (30, 1))
+    calibration = tableCalibration.from_samples(ORIGIN + rng.normal(0, 1e-4, (30, 3)), world_rot)
+
+    on_table = rng.uniform(-0.3, 0.3, (10, 3))
+    world = ORIGIN + quat_rotate(np.tile(TILT, (10, 1)), on_table)
+
+    assert np.allclose(calibration.positions_to_table(world), on_table, atol=1e-3)
+    assert np.allclose(calibration.rotations_to_table(world_rot)[:, 0], 1.0)
+
+    out = np.empty(3)
+    assert calibration.frame_to_table(world[0], out=out) is out
+    assert np.allclose(out, calibration.positions_to_table(world[:1])[0])
+
+
+def test_calibration_cached_once(tmp_path):
+    path = str(tmp_path / "table.json")
+    with pytest.raises(ValueError):
+        tableCalibration.cached(path)
+
+    first = tableCalibration.cached(path, np.tile(ORIGIN, (5, 1)), np.tile(TILT, (5, 1)))
+    again = tableCalibration.cached(path)       # no samples needed once cached
+
+    assert np.allclose(again.origin, first.origin)
+    assert np.allclose(again.orientation, first.orientation)
+
+
+def test_table_to_screen_uses_surface_axes():
+    # 2cm right, 1m above the surface, 3cm towards the participant
+    px = table_to_screen([0.02, 1.0, 0.03], px_per_cm=40, screen_c=(960, 540))
+
+    assert np.allclose(px, [960 + 80, 540 + 120])
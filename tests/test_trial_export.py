@@ -0,0 +1,45 @@
+# Exports hand over ownership: frames exported for one trial must be unaffected by the next
+from Benchmark import syntheticClient
+from OptiTracker import OptiTracker
+
+
+def run_trial(tracker: OptiTracker, client: syntheticClient) -> None:
+    tracker.start()
+    client.play()
+    tracker.stop()
+
+
+def make_tracker():
+    client = syntheticClient(trial_duration=0.25, seed=0)
+    return OptiTracker(client=client), client
+
+
+def test_wideexport_unchanged_by_later_frames():
+    tracker, client = make_tracker()
+
+    run_trial(tracker, client)
+    first = tracker.wideexport()
+    expected = first.to_list()
+    assert first.nrows == 30
+
+    run_trial(tracker, client)
+    second = tracker.wideexport()
+
+    assert first.to_list() == expected
+    assert second.nrows == 30
+    assert second[0, 'frame_number'] == first[-1, 'frame_number'] + 1
+
+
+def test_dataexport_unchanged_by_later_frames():
+    tracker, client = make_tracker()
+
+    run_trial(tracker, client)
+    first = tracker.dataexport()
+    expected = {asset: frame.to_list() for asset, frame in first.items()}
+    assert first['RigidBodies'].nrows == 2 * 30
+
+    run_trial(tracker, client)
+    second = tracker.dataexport()
+
+    assert {asset: frame.to_list() for asset, frame in first.items()} == expected
+    assert second['Prefix'][0, 'frame_number'] == 31
@@ -0,0 +1,92 @@
+# Post-trial screening decisions, from OptiTracker.dataexport()-shaped buffers
+import numpy as np
+import datatable as dt
+
+from Kinematics import FRAME_RATE
+from TrialScreening import (
+    screen_dataframes, LOST_FRAMES, OCCLUDED, NO_MOVEMENT, ANTICIPATION, NO_RESPONSE, NO_DATA
+)
+
+HAND = 1
+N_FRAMES = 240      # 2s @ 120Hz
+
+
+# Hand reaching 0.3m along x over the middle second, from rest at (0.1, 0.1, 0.1)
+def reach(n_frames: int = N_FRAMES, distance: float = 0.3) -> np.ndarray:
+    t = np.clip((np.arange(n_frames) - FRAME_RATE / 2) / FRAME_RATE, 0, 1)
+    pos = np.full((n_frames, 3), 0.1)
+    pos[:, 0] += distance * (10 * t ** 3 - 15 * t ** 4 + 6 * t ** 5)
+    return pos
+
+
+def trial_dataframes(pos: np.ndarray, received: np.ndarray = None, validity: np.ndarray = None,
+                     error: np.ndarray = None) -> dict:
+    frame_numbers = np.arange(1000, 1000 + len(pos))
+    received = frame_numbers if received is None else received
+    validity = np.ones(len(pos), dtype=np.int32) if validity is None else validity
+    error = np.full(len(pos), 0.0002) if error is None else error
+
+    return {
+        "Prefix": dt.Frame(frame_number=received.tolist()),
+        "RigidBodies": dt.Frame(
+            frame_number=frame_numbers.tolist(), asset_ID=[HAND] * len(pos),
+            pos_x=pos[:, 0].tolist(), pos_y=pos[:, 1].tolist(), pos_z=pos[:, 2].tolist(),
+            error=error.tolist(), tracking_validity=validity.tolist(),
+        ),
+    }
+
+
+def test_clean_reach_passes():
+    metrics = screen_dataframes(trial_dataframes(reach()), HAND, rt=350)
+
+    assert metrics["failures"] == []
+    assert metrics["n_frames"] == N_FRAMES
+    assert metrics["prop_lost"] == 0
+    assert abs(metrics["path_length"] - 0.3) < 1e-6
+
+
+def test_stationary_hand_fails_movement():
+    metrics = screen_dataframes(trial_dataframes(reach(distance=0.0)), HAND, rt=350)
+
+    assert metrics["failures"] == [NO_MOVEMENT]
+
+
+def test_dropped_frames_fail():
+    frame_numbers = np.arange(1000, 1000 + N_FRAMES)
+    received = np.delete(frame_numbers, np.arange(10, 10 + N_FRAMES // 10))   # 10% never arrived
+
+    metrics = screen_dataframes(trial_dataframes(reach(), received=received), HAND, rt=350)
+
+    assert metrics["failures"] == [LOST_FRAMES]
+    assert abs(metrics["prop_lost"] - 0.1) < 0.01
+
+
+def test_long_occlusion_fails():
+    validity = np.ones(N_FRAMES, dtype=np.int32)
+    validity[:40] = 0       # > MAX_OCCLUSION frames, though > MIN_VALID_SAMPLES valid overall
+
+    metrics = screen_dataframes(trial_dataframes(reach(), validity=validity), HAND, rt=350)
+
+    assert metrics["failures"] == [OCCLUDED]
+    assert metrics["longest_occlusion"] == 40
+
+
+def test_high_marker_error_counts_as_occluded():
+    error = np.full(N_FRAMES, 0.0002)
+    error[100:140] = 0.02       # tracked, but fit poorly
+
+    metrics = screen_dataframes(trial_dataframes(reach(), error=error), HAND, rt=350)
+
+    assert metrics["failures"] == [OCCLUDED]
+    assert metrics["longest_occlusion"] == 40
+
+
+def test_response_time_checks():
+    assert screen_dataframes(trial_dataframes(reach()), HAND, rt=50)["failures"] == [ANTICIPATION]
+    assert screen_dataframes(trial_dataframes(reach()), HAND, rt=None)["failures"] == [NO_RESPONSE]
+
+
+def test_missing_hand_is_no_data():
+    metrics = screen_dataframes(trial_dataframes(reach()), HAND + 1, rt=350)
+
+    assert metrics["failures"] == [NO_DATA]
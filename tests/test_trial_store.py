@@ -0,0 +1,54 @@
+# trialStore session files & manifest, and sessionManifest's loading of single trials from them
+import datatable as dt
+
+from TrialStore import sessionManifest, trialStore
+
+
+def trial_frames(trial_num: int, nrows: int = 3) -> dict:
+    return {
+        "RigidBodies": dt.Frame(
+            frame_number=list(range(trial_num * 10, trial_num * 10 + nrows)),
+            pos_x=[0.5 * i for i in range(nrows)],
+            tracking_valid=[True] * nrows,
+        )
+    }
+
+
+def store_trials(directory, trials, participant_id=1):
+    store = trialStore(["RigidBodies"], "framedata", directory=str(directory))
+    for trial_num, attempt in trials:
+        annotations = {"participant_id": participant_id, "block_num": 1, "trial_num": trial_num, "attempt": attempt}
+        store.add(trial_frames(trial_num), annotations, 1, trial_num, attempt)
+    store.write()
+    return sessionManifest(store.manifest_path())
+
+
+def test_load_keeps_session_types(tmp_path):
+    manifest = store_trials(tmp_path, [(1, 1), (2, 1)])
+
+    trial = manifest.load("RigidBodies", participant_id=1, block_num=1, trial_num=2)
+
+    # constant within the trial, so inferred as boolean were the slice read on its own
+    assert trial[:, "trial_num"].stype == dt.stype.int32
+    assert trial[:, "block_num"].stype == dt.stype.int32
+    assert trial[:, "frame_number"].to_list()[0] == [20, 21, 22]
+    assert trial[:, "tracking_valid"].stype == dt.stype.bool8
+
+
+def test_load_selects_attempt(tmp_path):
+    manifest = store_trials(tmp_path, [(1, 1), (1, 2), (2, 1)])
+
+    assert manifest.trials("RigidBodies") == [("1", 1, 1, 1), ("1", 1, 1, 2), ("1", 1, 2, 1)]
+    assert manifest.load("RigidBodies", trial_num=1).nrows == 6
+    assert manifest.load("RigidBodies", trial_num=1, attempt=2)[:, "attempt"].to_list() == [[2, 2, 2]]
+    assert (tmp_path / "GripAperture_B1-T1-A2_RigidBodies_framedata.csv").exists()
+
+
+def test_load_across_appended_sessions(tmp_path):
+    store_trials(tmp_path, [(1, 1)], participant_id=1)
+    manifest = store_trials(tmp_path, [(1, 1)], participant_id=2)
+
+    second = manifest.load("RigidBodies", participant_id=2)
+    assert second[:, "participant_id"].to_list() == [[2, 2, 2]]
+    assert manifest.select("RigidBodies", participant_id=2)[0, "row_start"] == 3
+    assert manifest.load("RigidBodies", participant_id=3).nrows == 0